@@ -0,0 +1,381 @@
+import argparse
+import os
+import re
+import sys
+import time
+from collections import deque
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+
+from calculs import (
+    CHOIX_IMPACT,
+    MARGE_PRUDENCE_PCT,
+    TAUX_ENDETTEMENT_MAX_PCT,
+    _calculer_details_prets_tableaux,
+    _remboursement_anticipe_tableaux,
+    calculer_taeg,
+)
+from export import FORMATS, exporter, informations_dossier, preparer_simulation
+
+# --- Paramètres par défaut (identiques à ceux de la barre latérale de l'application) ---
+
+VALEURS_PAR_DEFAUT = {
+    "frais_notaire_pct": 7.5,
+    "apport_souhaite_pct": 20.0,
+    "taux_assurance_pct": 0.34,
+    "taux_endettement_max_pct": TAUX_ENDETTEMENT_MAX_PCT,
+    "frais_dossier": 1000.0,
+    "frais_garantie_pct": 1.0,
+}
+
+MOTIF_COLONNE_TAUX = re.compile(r"^taux_(\d+)_ans$")
+
+# Colonnes facultatives du remboursement anticipé : le montant et l'année vont ensemble, le choix d'impact a une valeur par défaut
+COLONNES_REMBOURSEMENT_ANTICIPE = ("montant_remboursement_anticipe", "annee_remboursement", "choix_impact")
+
+# Schémas des fichiers de résultats, hors identifiant (son type est celui du fichier d'entrée). Ils sont fixés
+# d'avance : un premier lot vide (que des achats comptant) ne doit pas imposer des colonnes de type nul au fichier.
+CHAMPS_COMPARATIF = [
+    ("montant_a_emprunter", pa.float64()),
+    ("duree_annees", pa.int64()),
+    ("taux_nominal_pct", pa.float64()),
+    ("mensualite_avec_assurance", pa.float64()),
+    ("mensualite_hors_assurance", pa.float64()),
+    ("cout_total_credit", pa.float64()),
+    ("salaire_mensuel_minimum", pa.float64()),
+    ("taux_endettement_pct", pa.float64()),
+    ("taeg_pct", pa.float64()),
+    ("salaire_manquant", pa.float64()),
+    ("verdict", pa.string()),
+]
+CHAMPS_REMBOURSEMENT_ANTICIPE = [
+    ("duree_annees", pa.int64()),
+    ("choix_impact", pa.string()),
+    ("gain_interets", pa.float64()),
+    ("gain_assurance", pa.float64()),
+    ("gain_total", pa.float64()),
+    ("nouvelle_duree_totale_ans", pa.float64()),
+    ("duree_reduite_mois", pa.float64()),
+    ("nouvelle_mensualite", pa.float64()),
+    ("reduction_mensualite", pa.float64()),
+]
+
+
+def schemas_resultats(type_identifiant: pa.DataType) -> tuple:
+    """Retourne les schémas (comparatif, remboursements) des fichiers de résultats, pour un type d'identifiant donné."""
+    return (
+        pa.schema([("id", type_identifiant), *CHAMPS_COMPARATIF]),
+        pa.schema([("id", type_identifiant), *CHAMPS_REMBOURSEMENT_ANTICIPE]),
+    )
+
+
+# --- Lecture et écriture par morceaux ---
+
+def lire_par_lots(chemin: Path, taille_lot: int):
+    """Lit un fichier CSV ou Parquet morceau par morceau, sans le charger entièrement en mémoire."""
+    if chemin.suffix.lower() == ".parquet":
+        for lot in pq.ParquetFile(chemin).iter_batches(batch_size=taille_lot):
+            yield lot.to_pandas()
+    else:
+        yield from pd.read_csv(chemin, chunksize=taille_lot)
+
+
+class EcrivainParLots:
+    """
+    Écrit des DataFrames successifs dans un même fichier CSV ou Parquet, sans les accumuler en mémoire.
+
+    Chaque lot est converti au schéma donné ; sans schéma, celui du premier lot est retenu pour tout le fichier.
+    """
+
+    def __init__(self, chemin: Path, schema: pa.Schema = None):
+        self.chemin = chemin
+        self.parquet = chemin.suffix.lower() == ".parquet"
+        self.schema = schema
+        self._ecrivain = None
+
+    def ecrire(self, df: pd.DataFrame):
+        table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+        if self._ecrivain is None:
+            if self.parquet:
+                self._ecrivain = pq.ParquetWriter(self.chemin, table.schema)
+            else:
+                self._ecrivain = pacsv.CSVWriter(self.chemin, table.schema)
+        self._ecrivain.write_table(table)
+
+    def fermer(self):
+        if self._ecrivain is not None:
+            self._ecrivain.close()
+
+
+# --- Calculs sur un lot de dossiers ---
+
+def _colonne(lot: pd.DataFrame, nom: str, parties: tuple = ()) -> np.ndarray:
+    """
+    Retourne une colonne du lot, la somme de ses parties (ex. salaire_a + salaire_b) ou la valeur par défaut.
+
+    Une cellule vide prend la valeur par défaut de la colonne s'il y en a une, sinon 0 (ex. salaire_b absent).
+    """
+    if nom in lot.columns:
+        return lot[nom].fillna(VALEURS_PAR_DEFAUT.get(nom, 0)).to_numpy(dtype=float)
+    presentes = [partie for partie in parties if partie in lot.columns]
+    if presentes:
+        return lot[presentes].fillna(0).to_numpy(dtype=float).sum(axis=1)
+    if nom in VALEURS_PAR_DEFAUT:
+        return np.full(len(lot), VALEURS_PAR_DEFAUT[nom])
+    raise KeyError(f"Colonne manquante dans le fichier d'entrée : {nom}")
+
+
+def traiter_lot(lot: pd.DataFrame) -> tuple:
+    """
+    Calcule, pour un lot de dossiers, le tableau comparatif des prêts et les simulations de remboursement anticipé.
+
+    Chaque dossier est décrit par une ligne : prix du bien, frais de notaire, apport, salaires, épargne,
+    taux d'assurance, frais de dossier et de garantie et une colonne `taux_<durée>_ans` par durée de prêt. Les colonnes
+    `montant_remboursement_anticipe`, `annee_remboursement` et `choix_impact` sont facultatives.
+
+    Returns:
+        tuple: (comparatif, remboursements), deux DataFrames au format long (une ligne par dossier et par durée).
+    """
+    remboursement_anticipe = any(colonne in lot.columns for colonne in COLONNES_REMBOURSEMENT_ANTICIPE)
+    for colonne in COLONNES_REMBOURSEMENT_ANTICIPE[:2]:
+        if remboursement_anticipe and colonne not in lot.columns:
+            raise KeyError(f"Colonne manquante dans le fichier d'entrée : {colonne} (le remboursement anticipé demande {' et '.join(COLONNES_REMBOURSEMENT_ANTICIPE[:2])})")
+    identifiants = lot["id"].to_numpy() if "id" in lot.columns else lot.index.to_numpy()
+
+    # --- Synthèse du financement (onglet Configuration) ---
+    prix_bien = _colonne(lot, "prix_bien")
+    epargne_totale = _colonne(lot, "epargne_totale", ("epargne_a", "epargne_b"))
+    salaire_total = _colonne(lot, "salaire_total", ("salaire_a", "salaire_b"))
+    taux_endettement_max_pct = _colonne(lot, "taux_endettement_max_pct")
+    cout_total_projet = prix_bien * (1 + _colonne(lot, "frais_notaire_pct") / 100)
+    # Apport par défaut : l'objectif en % du prix, relevé à l'épargne disponible et plafonné au prix du bien.
+    # Il remplace aussi les cellules vides d'une colonne `apport` fournie.
+    apport_objectif = prix_bien * _colonne(lot, "apport_souhaite_pct") / 100
+    apport = np.minimum(np.maximum(apport_objectif, epargne_totale), prix_bien)
+    if "apport" in lot.columns:
+        apport_saisi = lot["apport"].to_numpy(dtype=float)
+        apport = np.where(np.isnan(apport_saisi), apport, apport_saisi)
+    montant_a_emprunter = cout_total_projet - apport
+
+    # --- Comparatif des prêts : une ligne par dossier et par durée ---
+    colonnes_taux = {int(MOTIF_COLONNE_TAUX.match(c).group(1)): c for c in lot.columns if MOTIF_COLONNE_TAUX.match(c)}
+    durees = np.array(sorted(colonnes_taux))
+    taux = lot[[colonnes_taux[duree] for duree in durees]].to_numpy(dtype=float)
+
+    details = _calculer_details_prets_tableaux(
+        montant_a_emprunter[:, None],
+        taux,
+        durees[None, :],
+        _colonne(lot, "taux_assurance_pct")[:, None],
+        salaire_total[:, None],
+        taux_endettement_max_pct[:, None]
+    )
+    forme = details["mensualite_avec_assurance"].shape
+
+    comparatif = pd.DataFrame({
+        "id": np.repeat(identifiants, len(durees)),
+        "montant_a_emprunter": np.repeat(montant_a_emprunter, len(durees)),
+        **{cle: np.broadcast_to(valeurs, forme).ravel() for cle, valeurs in details.items()},
+    })
+    comparatif["taeg_pct"] = calculer_taeg(
+        montant_a_emprunter[:, None],
+        details["mensualite_avec_assurance"],
+        durees[None, :],
+        _colonne(lot, "frais_dossier")[:, None],
+        _colonne(lot, "frais_garantie_pct")[:, None]
+    ).ravel()
+    comparatif["salaire_manquant"] = np.maximum(comparatif["salaire_mensuel_minimum"] - np.repeat(salaire_total, len(durees)), 0.0)
+    seuil = np.repeat(taux_endettement_max_pct, len(durees))
+    comparatif["verdict"] = np.select(
+        [comparatif["taux_endettement_pct"] > seuil, comparatif["taux_endettement_pct"] > seuil - MARGE_PRUDENCE_PCT],
+        ["Élevé", "Prudent"],
+        "Faisable"
+    )
+    comparatif = comparatif[np.repeat(montant_a_emprunter > epargne_totale, len(durees))]
+
+    # --- Remboursement anticipé (facultatif) ---
+    remboursements = pd.DataFrame()
+    if remboursement_anticipe:
+        montant_ra = lot["montant_remboursement_anticipe"].fillna(0).to_numpy(dtype=float)[:, None]
+        annee_ra = lot["annee_remboursement"].fillna(0).to_numpy(dtype=int)[:, None]
+        choix = lot["choix_impact"] if "choix_impact" in lot.columns else pd.Series(CHOIX_IMPACT[0], index=lot.index)
+        reduire_duree = (choix.to_numpy() != CHOIX_IMPACT[1])[:, None]
+        duree_initiale_mois = durees[None, :] * 12
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sim_ra = _remboursement_anticipe_tableaux(
+                reduire_duree,
+                details["mensualite_hors_assurance"],
+                duree_initiale_mois,
+                taux / 1200,
+                annee_ra * 12,
+                montant_ra
+            )
+        gain_assurance = (details["mensualite_avec_assurance"] - details["mensualite_hors_assurance"]) * sim_ra["duree_reduite_mois"]
+        valide = ((montant_ra > 0) & (annee_ra * 12 < duree_initiale_mois) & (montant_a_emprunter > epargne_totale)[:, None]).ravel()
+
+        remboursements = pd.DataFrame({
+            "id": np.repeat(identifiants, len(durees)),
+            "duree_annees": np.broadcast_to(durees[None, :], forme).ravel(),
+            "choix_impact": np.where(np.broadcast_to(reduire_duree, forme).ravel(), CHOIX_IMPACT[0], CHOIX_IMPACT[1]),
+            "gain_interets": sim_ra["gain_interets"].ravel(),
+            "gain_assurance": gain_assurance.ravel(),
+            "gain_total": (sim_ra["gain_interets"] + gain_assurance).ravel(),
+            "nouvelle_duree_totale_ans": sim_ra["nouvelle_duree_totale_ans"].ravel(),
+            "duree_reduite_mois": sim_ra["duree_reduite_mois"].ravel(),
+            "nouvelle_mensualite": sim_ra["nouvelle_mensualite"].ravel(),
+            "reduction_mensualite": sim_ra["reduction_mensualite"].ravel(),
+        })[valide]
+
+    return comparatif, remboursements
+
+
+def traiter_et_exporter(lot: pd.DataFrame, formats: list, dossier: Path) -> tuple:
+    """
+    Traite un lot comme `traiter_lot`, puis exporte chaque dossier dans un fichier par format
+    (`<dossier>/<id>.xlsx`, `.zip` ou `.pdf`). Les fichiers sont écrits un à un : seul le lot est en mémoire.
+    """
+    comparatif, remboursements = traiter_lot(lot)
+    identifiants = lot["id"].to_numpy() if "id" in lot.columns else lot.index.to_numpy()
+    prix_bien = _colonne(lot, "prix_bien")
+    frais_notaire_pct = _colonne(lot, "frais_notaire_pct")
+    epargne_totale = _colonne(lot, "epargne_totale", ("epargne_a", "epargne_b"))
+    salaire_total = _colonne(lot, "salaire_total", ("salaire_a", "salaire_b"))
+    taux_assurance_pct = _colonne(lot, "taux_assurance_pct")
+    taux_endettement_max_pct = _colonne(lot, "taux_endettement_max_pct")
+    remboursement_anticipe = "montant_remboursement_anticipe" in lot.columns
+
+    for position, (identifiant, df_prets) in enumerate(comparatif.groupby("id", sort=False)):
+        # Les dossiers sans emprunt sont absents du comparatif : on retrouve la ligne du lot par son identifiant
+        ligne = np.flatnonzero(identifiants == identifiant)[0]
+        montant_a_emprunter = df_prets["montant_a_emprunter"].iloc[0]
+        informations = informations_dossier(
+            prix_bien[ligne],
+            frais_notaire_pct[ligne],
+            prix_bien[ligne] * (1 + frais_notaire_pct[ligne] / 100) - montant_a_emprunter,
+            montant_a_emprunter,
+            epargne_totale[ligne],
+            salaire_total[ligne],
+            taux_assurance_pct[ligne],
+            taux_endettement_max_pct[ligne]
+        )
+        remboursement = None
+        if remboursement_anticipe:
+            remboursement = {
+                "montant_remboursement_anticipe": float(np.nan_to_num(lot["montant_remboursement_anticipe"].iloc[ligne])),
+                "annee_remboursement": int(np.nan_to_num(lot["annee_remboursement"].iloc[ligne])),
+                "choix_impact": lot["choix_impact"].iloc[ligne] if "choix_impact" in lot.columns else CHOIX_IMPACT[0],
+            }
+        simulation = preparer_simulation(
+            informations, df_prets, montant_a_emprunter, taux_assurance_pct[ligne], remboursement=remboursement,
+            titre=f"Simulation de prêt immobilier — dossier {identifiant}"
+        )
+        for format_export in formats:
+            exporter(simulation, format_export, dossier / f"{identifiant}{FORMATS[format_export][0]}")
+
+    return comparatif, remboursements
+
+
+# --- Point d'entrée ---
+
+def executer(entree: Path, sortie: str, taille_lot: int, processus: int, exports: list = None, dossier_exports: Path = None) -> dict:
+    """
+    Traite un fichier de dossiers par lots et écrit les résultats au même format que l'entrée.
+
+    Les lots sont répartis sur un pool de processus ; le nombre de lots en cours est borné
+    pour que la mémoire utilisée ne dépende pas de la taille du fichier. Avec `exports`
+    (`xlsx`, `csv`, `pdf`), chaque dossier est en plus exporté dans `dossier_exports`.
+
+    Returns:
+        dict: Le nombre de dossiers traités, la durée et le débit (dossiers par seconde).
+    """
+    extension = entree.suffix.lower()
+    lots = lire_par_lots(entree, taille_lot)
+    premier_lot = next(lots, None)
+    if premier_lot is not None:
+        lots = chain([premier_lot], lots)
+        identifiants = premier_lot["id"] if "id" in premier_lot.columns else premier_lot.index
+        schema_comparatif, schema_remboursements = schemas_resultats(pa.Array.from_pandas(identifiants).type)
+    else:
+        schema_comparatif = schema_remboursements = None
+    ecrivain_comparatif = EcrivainParLots(Path(f"{sortie}_comparatif{extension}"), schema_comparatif)
+    ecrivain_remboursements = EcrivainParLots(Path(f"{sortie}_remboursement_anticipe{extension}"), schema_remboursements)
+
+    traiter = traiter_lot
+    arguments = ()
+    if exports:
+        dossier_exports = Path(dossier_exports or f"{sortie}_exports")
+        dossier_exports.mkdir(parents=True, exist_ok=True)
+        traiter = traiter_et_exporter
+        arguments = (exports, dossier_exports)
+
+    nombre_lignes = 0
+    debut = time.perf_counter()
+
+    def ecrire(resultat):
+        comparatif, remboursements = resultat
+        ecrivain_comparatif.ecrire(comparatif)
+        if not remboursements.empty:
+            ecrivain_remboursements.ecrire(remboursements)
+
+    def signaler():
+        duree = time.perf_counter() - debut
+        debit = f"{nombre_lignes / duree:,.0f}".replace(",", " ")
+        print(f"{nombre_lignes} dossiers traités en {duree:.1f} s ({debit} dossiers/s)", file=sys.stderr)
+
+    try:
+        if processus <= 1:
+            for lot in lots:
+                ecrire(traiter(lot, *arguments))
+                nombre_lignes += len(lot)
+                signaler()
+        else:
+            with ProcessPoolExecutor(max_workers=processus) as pool:
+                en_cours = deque()
+                for lot in lots:
+                    # On limite le nombre de lots en attente pour borner la mémoire
+                    if len(en_cours) >= 2 * processus:
+                        taille, futur = en_cours.popleft()
+                        ecrire(futur.result())
+                        nombre_lignes += taille
+                        signaler()
+                    en_cours.append((len(lot), pool.submit(traiter, lot, *arguments)))
+                while en_cours:
+                    taille, futur = en_cours.popleft()
+                    ecrire(futur.result())
+                    nombre_lignes += taille
+                    signaler()
+    finally:
+        ecrivain_comparatif.fermer()
+        ecrivain_remboursements.fermer()
+
+    duree = time.perf_counter() - debut
+    return {"dossiers": nombre_lignes, "duree_s": duree, "dossiers_par_s": nombre_lignes / duree if duree > 0 else 0.0}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Calcule en masse le comparatif des prêts et les remboursements anticipés d'un fichier de dossiers (CSV ou Parquet)."
+    )
+    parser.add_argument("entree", type=Path, help="Fichier de dossiers (.csv ou .parquet).")
+    parser.add_argument("--sortie", default="resultats", help="Préfixe des fichiers de résultats (défaut : resultats).")
+    parser.add_argument("--taille-lot", type=int, default=50_000, help="Nombre de dossiers lus et traités par lot.")
+    parser.add_argument("--processus", type=int, default=os.cpu_count(), help="Nombre de processus de calcul (1 : pas de pool).")
+    parser.add_argument("--exports", nargs="+", choices=list(FORMATS), default=[], help="Exporte aussi chaque dossier (xlsx, csv, pdf).")
+    parser.add_argument("--dossier-exports", type=Path, help="Dossier des fichiers exportés (défaut : <sortie>_exports).")
+    args = parser.parse_args(argv)
+
+    bilan = executer(args.entree, args.sortie, args.taille_lot, args.processus, args.exports, args.dossier_exports)
+    debit = f"{bilan['dossiers_par_s']:,.0f}".replace(",", " ")
+    print(f"Terminé : {bilan['dossiers']} dossiers en {bilan['duree_s']:.2f} s, soit {debit} dossiers/s.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+import argparse
+import inspect
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import calculs
+from facteurs import charger_table_facteurs
+from optimisation import optimiser_financement
+from export import exporter_octets, informations_dossier, preparer_simulation
+from portefeuille import Portefeuille
+from scenarios import BaseScenarios, calculer_comparatifs, normaliser_parametres
+
+BASELINE_PAR_DEFAUT = Path(__file__).resolve().parent / "baseline.json"
+
+# --- Jeux d'entrées fixes ---
+# Trois échelles : les 3 durées de l'application, 30 durées et 10 000 prêts.
+
+MONTANT = 250_000.0
+TAUX_ASSURANCE_PCT = 0.34
+SALAIRE_TOTAL = 5_000.0
+
+ECHELLES = {
+    "3": 3,
+    "30": 30,
+    "10k": 10_000,
+}
+
+
+def durees_taux(n: int) -> dict:
+    """Retourne une table durée -> taux de n entrées, déterministe."""
+    if n == 3:
+        return {15: 3.09, 20: 3.16, 25: 3.28}
+    # Au-delà de 30, les durées sont fractionnaires pour que chaque prêt ait une clé distincte
+    durees = np.arange(1, n + 1) if n <= 30 else np.linspace(5, 30, n)
+    taux = np.round(2.5 + 0.04 * durees, 2)
+    return {duree.item(): taux_pct.item() for duree, taux_pct in zip(durees, taux)}
+
+
+# --- Cas mesurés ---
+
+def preparer_cas() -> dict:
+    """
+    Construit les cas de mesure : un nom -> une fonction sans argument.
+
+    Les entrées sont calculées une fois ici, hors de la mesure.
+    """
+    import utils
+
+    # Les fonctions mises en cache (et éventuellement chronométrées) sont mesurées sans leurs enveloppes
+    creation_graph = inspect.unwrap(utils.creation_graph)
+
+    cas = {}
+    for echelle, n in ECHELLES.items():
+        table = durees_taux(n)
+        df_prets, _ = calculs.generer_tableau_comparatif(MONTANT, table, TAUX_ASSURANCE_PCT, SALAIRE_TOTAL)
+        prets = list(df_prets.itertuples(index=False))
+
+        cas[f"calculer_details_pret[{echelle}]"] = lambda table=table: [
+            calculs.calculer_details_pret(MONTANT, taux, duree, TAUX_ASSURANCE_PCT) for duree, taux in table.items()
+        ]
+        cas[f"calculer_remboursement_anticipe[{echelle}]"] = lambda prets=prets: [
+            calculs.calculer_remboursement_anticipe(
+                "Réduire la durée du prêt",
+                pret.mensualite_hors_assurance,
+                pret.duree_annees * 12,
+                pret.taux_nominal_pct / 1200,
+                1,
+                20_000
+            )
+            for pret in prets
+        ]
+        cas[f"generer_tableau_comparatif[{echelle}]"] = lambda table=table: calculs.generer_tableau_comparatif(
+            MONTANT, table, TAUX_ASSURANCE_PCT, SALAIRE_TOTAL
+        )
+        cas[f"creation_graph[{echelle}]"] = lambda df_prets=df_prets: creation_graph(df_prets, SALAIRE_TOTAL)
+
+    # Échéancier sur 25 ans (300 points par courbe), puis un portefeuille de 40 prêts bout à bout (12 000 points)
+    creation_graph_amortissement = inspect.unwrap(utils.creation_graph_amortissement)
+    echeancier = calculs.generer_tableau_amortissement(MONTANT, 3.5, 25, TAUX_ASSURANCE_PCT)
+    echeanciers = pd.concat([echeancier] * 40, ignore_index=True).assign(mois=lambda df: np.arange(1, len(df) + 1))
+    cas["creation_graph_amortissement[300]"] = lambda: creation_graph_amortissement(echeancier)
+    cas["creation_graph_amortissement[12k]"] = lambda: creation_graph_amortissement(echeanciers)
+
+    # Surface de sensibilité affichée à côté du graphique (taux par pas de 0,05 %, durées au mois près)
+    grille_taux = np.round(np.arange(0.5, 6.001, 0.05), 2)
+    grille_mois = np.arange(60, 361)
+    cas["calculer_surface_sensibilite[111x301]"] = lambda: calculs.calculer_surface_sensibilite(
+        MONTANT, grille_taux, grille_mois, TAUX_ASSURANCE_PCT, SALAIRE_TOTAL
+    )
+
+    # Portefeuille en colonnes : construction d'un million de prêts, en euros et en centimes
+    montants = np.random.default_rng(1).uniform(50_000, 500_000, 1_000_000).round(2)
+    taux_portefeuille = np.random.default_rng(2).uniform(0.5, 5.0, 1_000_000).round(2)
+    durees_portefeuille = np.random.default_rng(3).choice([10, 15, 20, 25], 1_000_000)
+    cas["portefeuille_calculer[1M]"] = lambda: Portefeuille.calculer(montants, taux_portefeuille, durees_portefeuille, TAUX_ASSURANCE_PCT)
+    cas["portefeuille_calculer_centimes[1M]"] = lambda: Portefeuille.calculer(
+        montants, taux_portefeuille, durees_portefeuille, TAUX_ASSURANCE_PCT, centimes=True
+    )
+
+    # Base de scénarios : comparaison de 1 000 scénarios enregistrés (résultats relus) et recalcul aux nouveaux taux
+    base = BaseScenarios(Path(tempfile.mkdtemp()) / "scenarios.sqlite")
+    parametres_scenarios = [
+        normaliser_parametres(MONTANT + 100 * indice, durees_taux(3), TAUX_ASSURANCE_PCT, SALAIRE_TOTAL)
+        for indice in range(1_000)
+    ]
+    identifiants = [
+        base.enregistrer(f"foyer_{indice % 50}", f"scenario_{indice}", MONTANT * 1.2, parametres_scenario)
+        for indice, parametres_scenario in enumerate(parametres_scenarios)
+    ]
+    cas["scenarios_comparer[1000]"] = lambda: base.comparer(identifiants)
+    cas["calculer_comparatifs[1000]"] = lambda: calculer_comparatifs(parametres_scenarios)
+
+    # Export d'une simulation (3 durées, remboursement anticipé, un tableau d'amortissement par durée)
+    df_prets, _ = calculs.generer_tableau_comparatif(MONTANT, durees_taux(3), TAUX_ASSURANCE_PCT, SALAIRE_TOTAL)
+    simulation = preparer_simulation(
+        informations_dossier(MONTANT / 1.075, 7.5, 0.0, MONTANT, 0.0, SALAIRE_TOTAL, TAUX_ASSURANCE_PCT),
+        df_prets,
+        MONTANT,
+        TAUX_ASSURANCE_PCT,
+        remboursement={"montant_remboursement_anticipe": 20_000, "annee_remboursement": 5, "choix_impact": "Réduire la durée du prêt"}
+    )
+    for format_export in ("xlsx", "csv", "pdf"):
+        cas[f"exporter_{format_export}[3]"] = lambda format_export=format_export: exporter_octets(simulation, format_export)
+
+    # Plan de financement optimal : 121 durées au mois près x 21 apports x 25 plans de remboursement anticipé
+    cas["optimiser_financement[63k]"] = lambda: optimiser_financement(
+        MONTANT / 1.075, 7.5, 60_000.0, 800.0, SALAIRE_TOTAL, durees_taux(3), TAUX_ASSURANCE_PCT, rendement_epargne_pct=2.4
+    )
+
+    # Facteurs d'actualisation : calcul direct contre lecture dans la table précalculée (taux sur la grille de 0,01 %)
+    table = charger_table_facteurs()
+    rng = np.random.default_rng(0)
+    taux_mensuel = np.round(rng.uniform(0.5, 6.0, 1_000_000), 2) / 1200
+    nombre_mois = rng.choice([120, 180, 240, 300], 1_000_000)
+    cas["actualisation_puissance[1M]"] = lambda: (1 + taux_mensuel)**-nombre_mois
+    cas["actualisation_table[1M]"] = lambda: table.actualisation(taux_mensuel, nombre_mois)
+
+    return cas
+
+
+def mesurer(fonction, repetitions: int, duree_min: float) -> dict:
+    """
+    Mesure le temps d'un appel : le nombre d'appels par répétition est ajusté pour durer
+    au moins `duree_min` secondes, et on garde le meilleur et le médian des répétitions.
+    """
+    nombre = 1
+    while True:
+        debut = time.perf_counter()
+        for _ in range(nombre):
+            fonction()
+        if time.perf_counter() - debut >= duree_min:
+            break
+        nombre *= 2
+
+    temps = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        for _ in range(nombre):
+            fonction()
+        temps.append((time.perf_counter() - debut) / nombre)
+
+    return {"meilleur_s": min(temps), "median_s": statistics.median(temps), "appels": nombre}
+
+
+def comparer(resultats: dict, reference: dict, seuil: float) -> list:
+    """Retourne la liste des cas dont le meilleur temps dépasse la référence de plus de `seuil` (ex. 0.25 = +25 %)."""
+    regressions = []
+    for nom, mesure in resultats.items():
+        if nom not in reference:
+            continue
+        ratio = mesure["meilleur_s"] / reference[nom]["meilleur_s"]
+        if ratio > 1 + seuil:
+            regressions.append((nom, ratio))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure les performances des calculs et des graphiques du simulateur.")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PAR_DEFAUT, help="Fichier JSON des temps de référence.")
+    parser.add_argument("--enregistrer", action="store_true", help="Enregistre les mesures comme nouvelle référence.")
+    parser.add_argument("--seuil", type=float, default=0.25, help="Régression tolérée par rapport à la référence (0.25 = +25 %%).")
+    parser.add_argument("--filtre", default="", help="Ne mesure que les cas dont le nom contient ce texte.")
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--duree-min", type=float, default=0.05, help="Durée minimale d'une répétition, en secondes.")
+    args = parser.parse_args(argv)
+
+    machine = {"python": platform.python_version(), "plateforme": platform.platform(), "numpy": np.__version__, "pandas": pd.__version__}
+    reference = {}
+    if args.baseline.exists():
+        contenu = json.loads(args.baseline.read_text(encoding="utf-8"))
+        reference = contenu["cas"]
+        # Les temps ne sont comparables qu'avec les versions de requirements.txt sur lesquelles la référence a été mesurée
+        for module in ("numpy", "pandas"):
+            if contenu["machine"].get(module) not in (None, machine[module]):
+                print(f"ATTENTION : référence mesurée avec {module} {contenu['machine'][module]}, {module} {machine[module]} installé", file=sys.stderr)
+
+    resultats = {}
+    for nom, fonction in preparer_cas().items():
+        if args.filtre not in nom:
+            continue
+        resultats[nom] = mesurer(fonction, args.repetitions, args.duree_min)
+        ligne = f"{nom:<45} {resultats[nom]['meilleur_s'] * 1000:>10.3f} ms"
+        if nom in reference:
+            ligne += f"  (x{resultats[nom]['meilleur_s'] / reference[nom]['meilleur_s']:.2f} vs référence)"
+        print(ligne)
+
+    if args.enregistrer:
+        contenu = {
+            "machine": machine,
+            "cas": {**reference, **resultats},
+        }
+        args.baseline.write_text(json.dumps(contenu, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        print(f"Référence enregistrée dans {args.baseline}")
+        return
+
+    regressions = comparer(resultats, reference, args.seuil)
+    for nom, ratio in regressions:
+        print(f"RÉGRESSION : {nom} est {ratio:.2f} fois plus lent que la référence", file=sys.stderr)
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+
+# Requêtes de référence : le dossier type de l'application (bien de 300 000 €, 5 000 € de salaire)
+REQUETES = {
+    "synthese": {"montant_bien": 300_000, "epargne_totale": 70_000},
+    "comparatif": {
+        "montant_a_emprunter": 252_500,
+        "durees_taux": {"15": 3.09, "20": 3.16, "25": 3.28},
+        "salaire_total": 5_000,
+    },
+    "remboursement-anticipe": {
+        "montant_emprunte": 252_500,
+        "taux_nominal_pct": 3.16,
+        "duree_annees": 20,
+        "annee_remboursement": 5,
+        "montant_remboursement_anticipe": 20_000,
+    },
+}
+
+
+def port_libre() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def lancer_service(port: int, processus: int) -> subprocess.Popen:
+    """Démarre le service dans un sous-processus et attend qu'il accepte les connexions."""
+    service = subprocess.Popen(
+        [sys.executable, str(RACINE / "service.py"), "--port", str(port), "--processus", str(processus)],
+        stderr=subprocess.DEVNULL
+    )
+    limite = time.monotonic() + 30
+    while time.monotonic() < limite:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return service
+        except OSError:
+            time.sleep(0.1)
+    service.kill()
+    raise RuntimeError("Le service n'a pas démarré.")
+
+
+async def client(hote: str, port: int, requete: bytes, fin: float, latences: list, erreurs: list):
+    """Envoie des requêtes en boucle sur une connexion persistante jusqu'à la date de fin."""
+    lecteur, ecrivain = await asyncio.open_connection(hote, port)
+    try:
+        while time.perf_counter() < fin:
+            debut = time.perf_counter()
+            ecrivain.write(requete)
+            await ecrivain.drain()
+            statut = int((await lecteur.readline()).split()[1])
+            taille = 0
+            while (entete := await lecteur.readline()) != b"\r\n":
+                nom, _, valeur = entete.decode("latin-1").partition(":")
+                if nom.lower() == "content-length":
+                    taille = int(valeur)
+            await lecteur.readexactly(taille)
+            latences.append(time.perf_counter() - debut)
+            if statut != 200:
+                erreurs.append(statut)
+    finally:
+        ecrivain.close()
+
+
+async def mesurer(hote: str, port: int, operation: str, taille_lot: int, concurrence: int, duree_s: float) -> dict:
+    """Mesure la latence et le débit avec `concurrence` clients simultanés pendant `duree_s` secondes."""
+    corps = REQUETES[operation] if taille_lot == 1 else [REQUETES[operation]] * taille_lot
+    corps = json.dumps(corps).encode()
+    requete = (
+        f"POST /{operation} HTTP/1.1\r\nHost: {hote}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(corps)}\r\n\r\n"
+    ).encode("latin-1") + corps
+
+    latences, erreurs = [], []
+    debut = time.perf_counter()
+    await asyncio.gather(*[client(hote, port, requete, debut + duree_s, latences, erreurs) for _ in range(concurrence)])
+    duree = time.perf_counter() - debut
+
+    latences_ms = sorted(latence * 1000 for latence in latences)
+    return {
+        "concurrence": concurrence,
+        "requetes": len(latences),
+        "requetes_par_s": len(latences) / duree,
+        "calculs_par_s": len(latences) * taille_lot / duree,
+        "p50_ms": statistics.median(latences_ms),
+        "p99_ms": latences_ms[int(0.99 * (len(latences_ms) - 1))],
+        "erreurs": len(erreurs),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Test de charge du service de tarification : latence p50/p99 et débit à concurrence croissante.")
+    parser.add_argument("--hote", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="Port d'un service déjà lancé (par défaut, un service est démarré pour le test).")
+    parser.add_argument("--processus", type=int, default=None, help="Nombre de processus du service démarré pour le test (défaut : nombre de CPU).")
+    parser.add_argument("--operation", choices=list(REQUETES), default="comparatif")
+    parser.add_argument("--taille-lot", type=int, default=1, help="Nombre de calculs par requête (1 : requête simple, sinon lot).")
+    parser.add_argument("--concurrences", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duree", type=float, default=5.0, help="Durée de chaque palier, en secondes.")
+    args = parser.parse_args(argv)
+
+    service = None
+    port = args.port
+    if port is None:
+        port = port_libre()
+        service = lancer_service(port, args.processus or os.cpu_count())
+
+    try:
+        print(f"/{args.operation}, {args.taille_lot} calcul(s) par requête, paliers de {args.duree:.0f} s")
+        print(f"{'clients':>8} {'requêtes/s':>12} {'calculs/s':>12} {'p50 (ms)':>10} {'p99 (ms)':>10} {'erreurs':>8}")
+        for concurrence in args.concurrences:
+            bilan = asyncio.run(mesurer(args.hote, port, args.operation, args.taille_lot, concurrence, args.duree))
+            print(
+                f"{bilan['concurrence']:>8} {bilan['requetes_par_s']:>12.0f} {bilan['calculs_par_s']:>12.0f} "
+                f"{bilan['p50_ms']:>10.2f} {bilan['p99_ms']:>10.2f} {bilan['erreurs']:>8}"
+            )
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+# --- Table précalculée des facteurs d'actualisation ---
+# La table contient v = (1 + r)^-n pour tous les taux annuels de 0 à 15 % par pas de 0,01 % et toutes
+# les durées de 0 à 360 mois. Les autres facteurs s'en déduisent sans puissance :
+#   mensualité = P * r / (1 - v_n)
+#   capital restant dû après k mensualités = P * (1 - v_(n-k)) / (1 - v_n)
+# Elle est enregistrée au format .npy et ouverte par projection en mémoire (memmap) : l'ouverture est
+# immédiate et les processus d'un même pool partagent les pages du fichier.
+
+PAS_TAUX_PCT = 0.01
+TAUX_MAX_PCT = 15.0
+DUREE_MAX_MOIS = 360
+FICHIER_PAR_DEFAUT = Path(__file__).resolve().parent / "facteurs_actualisation.npy"
+
+# Une ligne de part et d'autre de la grille, pour que l'interpolation soit exacte aux bornes
+_NOMBRE_TAUX = int(round(TAUX_MAX_PCT / PAS_TAUX_PCT)) + 1
+_POSITION_PAR_TAUX_MENSUEL = 1200 / PAS_TAUX_PCT
+
+
+def construire_table_facteurs() -> np.ndarray:
+    """Calcule la table (n_taux + 2, DUREE_MAX_MOIS + 1) des facteurs d'actualisation, ligne 1 = taux nul."""
+    taux_mensuels = np.arange(-1, _NOMBRE_TAUX + 1) / _POSITION_PAR_TAUX_MENSUEL
+    return (1 + taux_mensuels[:, None])**-np.arange(DUREE_MAX_MOIS + 1)[None, :]
+
+
+class TableFacteurs:
+    """
+    Accès vectorisé aux facteurs d'actualisation précalculés.
+
+    Les taux situés sur la grille (0,01 %) sont lus directement ; entre deux points, la valeur est
+    interpolée par un polynôme de degré 2 sur les trois points les plus proches (erreur relative
+    inférieure à 2e-9, soit moins d'un centime sur la mensualité d'un prêt de 300 000 €). Les taux
+    et durées hors de la table sont calculés directement.
+    """
+
+    def __init__(self, table: np.ndarray):
+        self.table = table
+        self._valeurs = table.reshape(-1)
+        self._largeur = table.shape[1]
+
+    def actualisation(self, taux_mensuel, nombre_mois) -> np.ndarray:
+        """Retourne (1 + taux_mensuel)^-nombre_mois, élément par élément."""
+        taux_mensuel, nombre_mois = np.broadcast_arrays(np.asarray(taux_mensuel, dtype=float), np.asarray(nombre_mois))
+        position = taux_mensuel * _POSITION_PAR_TAUX_MENSUEL
+        ligne = np.rint(position)
+        ecart = position - ligne
+
+        dans_table = (ligne >= 0) & (ligne < _NOMBRE_TAUX) & (nombre_mois >= 0) & (nombre_mois <= DUREE_MAX_MOIS)
+        if nombre_mois.dtype.kind == "f":
+            dans_table &= nombre_mois == np.rint(nombre_mois)
+        indice = np.where(dans_table, (ligne.astype(np.intp) + 1) * self._largeur + nombre_mois.astype(np.intp), self._largeur)
+
+        if np.all(np.abs(ecart) < 1e-9):
+            # Tous les taux sont sur la grille (aux erreurs d'arrondi près) : simple lecture
+            resultat = self._valeurs.take(indice)
+        else:
+            precedent = self._valeurs.take(indice - self._largeur)
+            courant = self._valeurs.take(indice)
+            suivant = self._valeurs.take(indice + self._largeur)
+            resultat = courant + ecart * (suivant - precedent) / 2 + ecart**2 * (precedent - 2 * courant + suivant) / 2
+
+        resultat = np.asarray(resultat)
+        if not dans_table.all():
+            hors_table = ~dans_table
+            resultat[hors_table] = (1 + taux_mensuel[hors_table])**-nombre_mois[hors_table]
+        return resultat
+
+    def facteur_annuite(self, taux_mensuel, nombre_mois) -> np.ndarray:
+        """Retourne (1 - (1 + r)^-n) / r, soit le capital remboursé par une mensualité de 1 € (n si r = 0)."""
+        taux_mensuel = np.asarray(taux_mensuel, dtype=float)
+        taux_positif = taux_mensuel != 0
+        return np.where(
+            taux_positif,
+            (1 - self.actualisation(taux_mensuel, nombre_mois)) / np.where(taux_positif, taux_mensuel, 1.0),
+            nombre_mois
+        )
+
+    def facteur_capital_restant(self, taux_mensuel, nombre_mois, mois_ecoules) -> np.ndarray:
+        """Retourne la part du capital initial restant due après `mois_ecoules` mensualités."""
+        taux_mensuel = np.asarray(taux_mensuel, dtype=float)
+        nombre_mois = np.asarray(nombre_mois)
+        taux_positif = taux_mensuel != 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(
+                taux_positif,
+                (1 - self.actualisation(taux_mensuel, nombre_mois - mois_ecoules)) / (1 - self.actualisation(taux_mensuel, nombre_mois)),
+                (nombre_mois - mois_ecoules) / nombre_mois
+            )
+
+
+@lru_cache(maxsize=None)
+def charger_table_facteurs(chemin: Path = FICHIER_PAR_DEFAUT) -> TableFacteurs:
+    """
+    Ouvre la table des facteurs en mémoire partagée, après l'avoir calculée et enregistrée si besoin.
+
+    Le fichier est écrit sous un nom temporaire puis renommé, si bien que plusieurs processus
+    peuvent le créer en même temps sans se gêner. Chaque processus n'ouvre la table qu'une fois.
+    """
+    chemin = Path(chemin)
+    if not chemin.exists():
+        chemin.parent.mkdir(parents=True, exist_ok=True)
+        temporaire = chemin.with_name(f"{chemin.stem}.{os.getpid()}.tmp.npy")
+        np.save(temporaire, construire_table_facteurs())
+        os.replace(temporaire, chemin)
+    return TableFacteurs(np.load(chemin, mmap_mode="r"))
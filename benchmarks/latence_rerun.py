@@ -0,0 +1,88 @@
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RACINE))
+
+from streamlit.testing.v1 import AppTest
+
+# Situation de référence saisie dans l'onglet Configuration
+SAISIES = {
+    "salaire_a": 3000,
+    "salaire_b": 2000,
+    "epargne_a": 70000,
+    "epargne_m_a": 500,
+}
+
+
+def preparer_application() -> AppTest:
+    """Lance l'application et remplit l'onglet Configuration pour qu'un emprunt soit nécessaire."""
+    application = AppTest.from_file(str(RACINE / "app.py"), default_timeout=120)
+    application.run()
+    application.number_input[0].set_value(300_000).run()
+    for cle, valeur in SAISIES.items():
+        application.number_input(key=cle).set_value(valeur).run()
+    return application
+
+
+def executer_section_remboursement(df_prets):
+    """Script minimal qui n'exécute que la section de remboursement anticipé, comme un rerun du fragment."""
+    from sections import section_remboursement_anticipe
+
+    section_remboursement_anticipe(df_prets)
+
+
+def resumer(titre: str, temps: list):
+    temps_ms = sorted(t * 1000 for t in temps)
+    print(titre)
+    print(f"  médiane : {statistics.median(temps_ms):.1f} ms")
+    print(f"  p90     : {temps_ms[int(0.9 * (len(temps_ms) - 1))]:.1f} ms")
+    print(f"  min     : {temps_ms[0]:.1f} ms")
+
+
+def mesurer_rerun_complet(repetitions: int) -> list:
+    """Modifie le montant du remboursement anticipé et mesure un rerun complet du script."""
+    application = preparer_application()
+    temps = []
+    for i in range(repetitions):
+        application.number_input(key="montant_remboursement_anticipe").set_value(10_000 + 500 * (i + 1))
+        debut = time.perf_counter()
+        application.run()
+        temps.append(time.perf_counter() - debut)
+    if application.exception:
+        raise RuntimeError(application.exception)
+    return temps
+
+
+def mesurer_rerun_fragment(repetitions: int) -> list:
+    """Mesure un rerun limité au fragment de remboursement anticipé (ce que fait Streamlit quand un de ses widgets change)."""
+    import calculs
+
+    df_prets, _ = calculs.generer_tableau_comparatif(260_000, {15: 3.09, 20: 3.16, 25: 3.28}, 0.34, 5_000)
+    section = AppTest.from_function(executer_section_remboursement, args=(df_prets,), default_timeout=120)
+    section.run()
+    temps = []
+    for i in range(repetitions):
+        section.number_input(key="montant_remboursement_anticipe").set_value(10_000 + 500 * (i + 1))
+        debut = time.perf_counter()
+        section.run()
+        temps.append(time.perf_counter() - debut)
+    if section.exception:
+        raise RuntimeError(section.exception)
+    return temps
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure la latence d'un rerun de l'application quand on modifie le remboursement anticipé.")
+    parser.add_argument("--repetitions", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    resumer("Rerun complet du script (avant le découpage en fragments) :", mesurer_rerun_complet(args.repetitions))
+    resumer("Rerun du seul fragment de remboursement anticipé :", mesurer_rerun_fragment(args.repetitions))
+
+
+if __name__ == "__main__":
+    main()
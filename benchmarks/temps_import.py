@@ -0,0 +1,66 @@
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+RACINE = Path(__file__).resolve().parent.parent
+
+# Modules de l'interface qui ne doivent pas être chargés par le cœur de calcul
+MODULES_INTERFACE = ("streamlit", "plotly")
+
+SCRIPT_MESURE = """
+import sys, time
+debut = time.perf_counter()
+import {module}
+duree = time.perf_counter() - debut
+charges = [m for m in {interdits!r} if m in sys.modules]
+print(duree, ",".join(charges))
+"""
+
+
+def mesurer_import(module: str, repetitions: int) -> tuple:
+    """
+    Mesure le temps d'import à froid d'un module, dans un interpréteur neuf à chaque répétition.
+
+    Returns:
+        tuple: (meilleur temps en secondes, liste des modules d'interface chargés par l'import).
+    """
+    temps = []
+    charges = []
+    for _ in range(repetitions):
+        sortie = subprocess.run(
+            [sys.executable, "-c", SCRIPT_MESURE.format(module=module, interdits=MODULES_INTERFACE)],
+            cwd=RACINE,
+            capture_output=True,
+            text=True,
+            check=True
+        ).stdout.split()
+        temps.append(float(sortie[0]))
+        charges = sortie[1].split(",") if len(sortie) > 1 else []
+    return min(temps), charges
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vérifie que le cœur de calcul s'importe vite et sans l'interface.")
+    parser.add_argument("--seuil", type=float, default=1.0, help="Temps d'import maximal autorisé pour `calculs`, en secondes.")
+    parser.add_argument("--repetitions", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    duree_calculs, charges = mesurer_import("calculs", args.repetitions)
+    duree_utils, _ = mesurer_import("utils", args.repetitions)
+    print(f"import calculs : {duree_calculs * 1000:.0f} ms")
+    print(f"import utils   : {duree_utils * 1000:.0f} ms (interface Streamlit)")
+
+    erreurs = []
+    if charges:
+        erreurs.append(f"`calculs` charge des modules d'interface : {', '.join(charges)}")
+    if duree_calculs > args.seuil:
+        erreurs.append(f"`calculs` s'importe en {duree_calculs:.2f} s (seuil : {args.seuil:.2f} s)")
+
+    for erreur in erreurs:
+        print(f"ÉCHEC : {erreur}", file=sys.stderr)
+    sys.exit(1 if erreurs else 0)
+
+
+if __name__ == "__main__":
+    main()
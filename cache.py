@@ -0,0 +1,189 @@
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+import pandas as pd
+
+# --- Estimation de l'empreinte mémoire ---
+
+def estimer_taille(objet) -> int:
+    """
+    Estime, en octets, la mémoire occupée par une valeur mise en cache.
+
+    Les DataFrames, tableaux NumPy et conteneurs usuels sont parcourus ; les figures Plotly
+    sont estimées à partir de leur représentation en dictionnaire.
+    """
+    if isinstance(objet, pd.DataFrame):
+        return int(objet.memory_usage(deep=True).sum())
+    if isinstance(objet, pd.Series):
+        return int(objet.memory_usage(deep=True))
+    if isinstance(objet, np.ndarray):
+        return objet.nbytes
+    if isinstance(objet, dict):
+        return sys.getsizeof(objet) + sum(estimer_taille(cle) + estimer_taille(valeur) for cle, valeur in objet.items())
+    if isinstance(objet, (list, tuple)):
+        return sys.getsizeof(objet) + sum(estimer_taille(element) for element in objet)
+    if hasattr(objet, "to_plotly_json"):
+        return estimer_taille(objet.to_plotly_json())
+    return sys.getsizeof(objet)
+
+
+# --- Construction des clés ---
+
+def _empreinte(valeur, condensat):
+    """Ajoute au condensat une représentation stable de la valeur."""
+    if isinstance(valeur, pd.DataFrame):
+        condensat.update(repr(list(valeur.columns)).encode())
+        condensat.update(pd.util.hash_pandas_object(valeur, index=True).to_numpy().tobytes())
+    elif isinstance(valeur, np.ndarray):
+        condensat.update(repr((valeur.dtype.str, valeur.shape)).encode())
+        condensat.update(np.ascontiguousarray(valeur).tobytes())
+    elif isinstance(valeur, dict):
+        condensat.update(b"{")
+        for cle in sorted(valeur, key=repr):
+            _empreinte(cle, condensat)
+            _empreinte(valeur[cle], condensat)
+        condensat.update(b"}")
+    elif isinstance(valeur, (list, tuple)):
+        condensat.update(b"[")
+        for element in valeur:
+            _empreinte(element, condensat)
+        condensat.update(b"]")
+    else:
+        condensat.update(repr(valeur).encode())
+
+
+def calculer_cle(*args, **kwargs) -> str:
+    """Calcule une clé de cache à partir des arguments d'un appel."""
+    condensat = hashlib.blake2b(digest_size=16)
+    _empreinte(args, condensat)
+    _empreinte(kwargs, condensat)
+    return condensat.hexdigest()
+
+
+# --- Cache LRU borné ---
+
+class CacheLRU:
+    """
+    Cache partagé entre les sessions, borné en nombre d'entrées (éviction LRU) et en durée de vie (TTL).
+
+    Il tient des compteurs de succès, d'échecs, d'évictions et d'expirations, ainsi qu'une
+    estimation de la mémoire occupée, pour permettre de le dimensionner.
+
+    Les valeurs ne sont pas copiées : la même instance (DataFrame, dictionnaire, figure) est rendue
+    à toutes les sessions. Elles doivent être traitées en lecture seule ; un appelant qui veut les
+    modifier travaille sur une copie (`df.copy()`, `copy.deepcopy(grille)`).
+    """
+
+    def __init__(self, nom: str, max_entrees: int = 128, ttl_s: float = 3600.0):
+        self.nom = nom
+        self.max_entrees = max_entrees
+        self.ttl_s = ttl_s
+        self._entrees = OrderedDict()  # clé -> (valeur, date d'expiration, taille en octets)
+        self._verrou = threading.Lock()
+        self.succes = 0
+        self.echecs = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.octets = 0
+
+    def lire(self, cle):
+        """Retourne (True, valeur) si la clé est en cache et n'a pas expiré, sinon (False, None)."""
+        with self._verrou:
+            entree = self._entrees.get(cle)
+            if entree is not None and entree[1] < time.monotonic():
+                self._retirer(cle)
+                self.expirations += 1
+                entree = None
+            if entree is None:
+                self.echecs += 1
+                return False, None
+            self._entrees.move_to_end(cle)
+            self.succes += 1
+            return True, entree[0]
+
+    def ecrire(self, cle, valeur):
+        """Ajoute une valeur au cache, en évinçant les entrées les moins récemment utilisées si besoin."""
+        taille = estimer_taille(valeur)
+        with self._verrou:
+            if cle in self._entrees:
+                self._retirer(cle)
+            self._entrees[cle] = (valeur, time.monotonic() + self.ttl_s, taille)
+            self.octets += taille
+            while len(self._entrees) > self.max_entrees:
+                self._retirer(next(iter(self._entrees)))
+                self.evictions += 1
+
+    def _retirer(self, cle):
+        _, _, taille = self._entrees.pop(cle)
+        self.octets -= taille
+
+    def vider(self):
+        with self._verrou:
+            self._entrees.clear()
+            self.octets = 0
+
+    def statistiques(self) -> dict:
+        """Retourne les compteurs du cache et son empreinte mémoire estimée."""
+        with self._verrou:
+            total = self.succes + self.echecs
+            return {
+                "nom": self.nom,
+                "entrees": len(self._entrees),
+                "max_entrees": self.max_entrees,
+                "ttl_s": self.ttl_s,
+                "succes": self.succes,
+                "echecs": self.echecs,
+                "taux_succes": self.succes / total if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "octets": self.octets,
+            }
+
+
+CACHES = {}
+
+
+def cache_borne(max_entrees: int = 128, ttl_s: float = 3600.0, normaliser=None):
+    """
+    Décorateur de mise en cache bornée (LRU + TTL).
+
+    Args:
+        max_entrees (int): Le nombre maximal d'entrées conservées.
+        ttl_s (float): La durée de vie d'une entrée, en secondes.
+        normaliser (callable, optional): Reçoit les arguments de l'appel et retourne (args, kwargs)
+            normalisés (ex. montants arrondis). La fonction est appelée avec ces arguments normalisés,
+            si bien que deux appels de même clé donnent exactement le même résultat.
+
+    Le cache est accessible par l'attribut `cache` de la fonction décorée et recensé dans `CACHES`.
+    La valeur retournée est partagée entre les sessions et ne doit pas être modifiée sur place
+    (voir `CacheLRU`).
+    """
+    def decorateur(fonction):
+        cache = CacheLRU(fonction.__name__, max_entrees, ttl_s)
+        CACHES[fonction.__name__] = cache
+
+        @wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            if normaliser is not None:
+                args, kwargs = normaliser(*args, **kwargs)
+            cle = calculer_cle(args, kwargs)
+            trouve, valeur = cache.lire(cle)
+            if not trouve:
+                valeur = fonction(*args, **kwargs)
+                cache.ecrire(cle, valeur)
+            return valeur
+
+        enveloppe.cache = cache
+        return enveloppe
+
+    return decorateur
+
+
+def statistiques_caches() -> pd.DataFrame:
+    """Retourne les statistiques de tous les caches, une ligne par cache."""
+    return pd.DataFrame([cache.statistiques() for cache in CACHES.values()])
@@ -0,0 +1,1500 @@
+import pandas as pd
+import numpy as np
+from math import log, ceil
+from datetime import date
+
+# --- Fonctions Utilitaires ---
+
+def formater_nombre(nombre: float) -> str:
+    """Formate un nombre en chaîne de caractères avec un espace comme séparateur de milliers."""
+    return f"{nombre:,.0f} €".replace(",", " ")
+
+def formater_duree(nombre_mois: float) -> str:
+    """Convertit un nombre de mois en une chaîne de caractères "X an(s) et Y mois"."""
+    nombre_mois = int(nombre_mois)
+    
+    if nombre_mois < 1:
+        return "moins d'un mois"
+
+    annees = nombre_mois // 12
+    mois_restants = nombre_mois % 12
+    
+    parts = []
+    if annees > 0:
+        s_an = "s" if annees > 1 else ""
+        parts.append(f"{annees} an{s_an}")
+    
+    if mois_restants > 0:
+        parts.append(f"{mois_restants} mois")
+        
+    return " et ".join(parts)
+
+MOIS_FR = ["janvier", "février", "mars", "avril", "mai", "juin", "juillet", "août", "septembre", "octobre", "novembre", "décembre"]
+
+def formater_mois_annee(jour: date) -> str:
+    """Formate une date en "mois année" (ex. "mars 2027"), sans dépendre de la locale du système."""
+    return f"{MOIS_FR[jour.month - 1]} {jour.year}"
+
+# --- Fonctions de Calcul Financier ---
+
+# Taux d'endettement maximal recommandé (HCSF) et marge en dessous de laquelle le dossier est jugé confortable
+TAUX_ENDETTEMENT_MAX_PCT = 35.0
+MARGE_PRUDENCE_PCT = 2.0
+
+def _calculer_details_prets_tableaux(
+    montant_emprunte,
+    taux_annuel_nominal_pct,
+    duree_annees,
+    taux_annuel_assurance_pct,
+    salaire_total=None,
+    taux_endettement_max_pct=TAUX_ENDETTEMENT_MAX_PCT
+) -> dict:
+    """
+    Calcule en une seule passe vectorisée les détails d'un lot de prêts.
+
+    Les arguments peuvent être des scalaires ou des tableaux de même taille (ou diffusables
+    entre eux, au sens NumPy). Les formules sont strictement celles de `calculer_details_pret`.
+
+    Returns:
+        dict: Un dictionnaire de tableaux NumPy, un élément par prêt.
+    """
+    montant_emprunte, taux_annuel_nominal_pct, duree_annees, taux_annuel_assurance_pct = np.broadcast_arrays(
+        np.asarray(montant_emprunte, dtype=float),
+        np.asarray(taux_annuel_nominal_pct, dtype=float),
+        np.asarray(duree_annees),
+        np.asarray(taux_annuel_assurance_pct, dtype=float),
+    )
+
+    # --- Conversion des pourcentages et des durées ---
+    taux_annuel_nominal = taux_annuel_nominal_pct / 100
+    taux_mensuel_nominal = taux_annuel_nominal / 12
+    nombre_mensualites = duree_annees * 12
+    taux_annuel_assurance = taux_annuel_assurance_pct / 100
+
+    # --- Calcul de la mensualité du crédit (hors assurance) ---
+    # Les taux nuls sont remplacés par 1 dans la formule d'annuité pour éviter la division par zéro,
+    # puis la branche "capital / nombre de mensualités" est sélectionnée par np.where.
+    taux_positif = taux_mensuel_nominal > 0
+    taux_calcul = np.where(taux_positif, taux_mensuel_nominal, 1.0)
+    mensualite_hors_assurance = np.where(
+        taux_positif,
+        (montant_emprunte * taux_calcul) / (1 - (1 + taux_calcul)**-nombre_mensualites),
+        montant_emprunte / nombre_mensualites
+    )
+
+    # --- Calcul de la mensualité de l'assurance ---
+    mensualite_assurance = (montant_emprunte * taux_annuel_assurance) / 12
+
+    # --- Totaux ---
+    mensualite_avec_assurance = mensualite_hors_assurance + mensualite_assurance
+    cout_total_credit = (mensualite_avec_assurance * nombre_mensualites) - montant_emprunte
+
+    # --- Calcul du salaire net mensuel minimum requis ---
+    salaire_minimum = mensualite_avec_assurance / (np.asarray(taux_endettement_max_pct, dtype=float) / 100)
+
+    resultats = {
+        "duree_annees": duree_annees,
+        "taux_nominal_pct": taux_annuel_nominal_pct,
+        "mensualite_avec_assurance": mensualite_avec_assurance,
+        "mensualite_hors_assurance": mensualite_hors_assurance,
+        "cout_total_credit": cout_total_credit,
+        "salaire_mensuel_minimum": salaire_minimum,
+    }
+
+    # --- Taux d'endettement (si le salaire est fourni) ---
+    if salaire_total is not None:
+        salaire_total = np.broadcast_to(np.asarray(salaire_total, dtype=float), mensualite_avec_assurance.shape)
+        salaire_positif = salaire_total > 0
+        resultats["taux_endettement_pct"] = np.where(
+            salaire_positif,
+            (mensualite_avec_assurance / np.where(salaire_positif, salaire_total, 1.0)) * 100,
+            100.0
+        )
+
+    return resultats
+
+
+def calculer_details_prets_lot(
+    montant_emprunte,
+    taux_annuel_nominal_pct,
+    duree_annees,
+    taux_annuel_assurance_pct,
+    salaire_total=None,
+    taux_endettement_max_pct=TAUX_ENDETTEMENT_MAX_PCT
+) -> pd.DataFrame:
+    """
+    Calcule les détails d'un lot de prêts immobiliers en une seule passe vectorisée.
+
+    Args:
+        montant_emprunte (array-like): Les montants empruntés.
+        taux_annuel_nominal_pct (array-like): Les taux d'intérêt annuels (hors assurance), en pourcentage.
+        duree_annees (array-like): Les durées des prêts en années.
+        taux_annuel_assurance_pct (array-like): Les taux d'assurance annuels, en pourcentage.
+        salaire_total (array-like, optional): Les salaires nets mensuels, pour le calcul du taux d'endettement.
+        taux_endettement_max_pct (array-like, optional): Le taux d'endettement maximal, pour le calcul du salaire minimum.
+
+    Returns:
+        pd.DataFrame: Une ligne par prêt, avec les mêmes colonnes que le dictionnaire
+        retourné par `calculer_details_pret` (et `taux_endettement_pct` si le salaire est fourni).
+    """
+    resultats = _calculer_details_prets_tableaux(
+        montant_emprunte,
+        taux_annuel_nominal_pct,
+        duree_annees,
+        taux_annuel_assurance_pct,
+        salaire_total,
+        taux_endettement_max_pct
+    )
+    return pd.DataFrame({cle: np.ravel(valeurs) for cle, valeurs in resultats.items()})
+
+
+def calculer_details_prets_df(df: pd.DataFrame, salaire_total=None) -> pd.DataFrame:
+    """
+    Calcule les détails d'un lot de prêts décrit par un DataFrame.
+
+    Le DataFrame doit contenir les colonnes `montant_emprunte`, `taux_nominal_pct`, `duree_annees`
+    et `taux_assurance_pct`. Une colonne `salaire_total` est utilisée si elle est présente
+    et que `salaire_total` n'est pas fourni.
+
+    Returns:
+        pd.DataFrame: Les résultats, alignés sur l'index du DataFrame d'entrée.
+    """
+    if salaire_total is None and 'salaire_total' in df.columns:
+        salaire_total = df['salaire_total'].to_numpy()
+
+    resultats = calculer_details_prets_lot(
+        df['montant_emprunte'].to_numpy(),
+        df['taux_nominal_pct'].to_numpy(),
+        df['duree_annees'].to_numpy(),
+        df['taux_assurance_pct'].to_numpy(),
+        salaire_total
+    )
+    resultats.index = df.index
+    return resultats
+
+
+def calculer_details_pret(montant_emprunte: float, taux_annuel_nominal_pct: float, duree_annees: int, taux_annuel_assurance_pct: float, taux_endettement_max_pct: float = TAUX_ENDETTEMENT_MAX_PCT) -> dict:
+    """
+    Calcule les détails d'un prêt immobilier pour une durée et un taux donnés.
+
+    Args:
+        montant_emprunte (float): Le montant total du prêt.
+        taux_annuel_nominal_pct (float): Le taux d'intérêt annuel du crédit (hors assurance), en pourcentage.
+        duree_annees (int): La durée du prêt en années.
+        taux_annuel_assurance_pct (float): Le taux d'assurance annuel, en pourcentage.
+        taux_endettement_max_pct (float): Le taux d'endettement maximal, en pourcentage (35 % par défaut).
+
+    Returns:
+        dict: Un dictionnaire contenant les détails calculés du prêt.
+    """
+    resultats = _calculer_details_prets_tableaux(
+        montant_emprunte,
+        taux_annuel_nominal_pct,
+        duree_annees,
+        taux_annuel_assurance_pct,
+        taux_endettement_max_pct=taux_endettement_max_pct
+    )
+    return {cle: valeurs.item() for cle, valeurs in resultats.items()}
+
+def calculer_synthese_financement(
+    montant_bien: float,
+    frais_notaire_pct: float,
+    apport_souhaite_pct: float,
+    epargne_totale: float,
+    apport: float = None
+) -> dict:
+    """
+    Calcule la synthèse du financement d'un projet : coût total, apport et montant à emprunter.
+
+    Args:
+        montant_bien (float): Le prix du bien.
+        frais_notaire_pct (float): Les frais de notaire, en pourcentage du prix du bien.
+        apport_souhaite_pct (float): L'apport souhaité, en pourcentage du prix du bien.
+        epargne_totale (float): L'épargne disponible du foyer.
+        apport (float, optional): L'apport retenu. Par défaut, le maximum entre l'apport souhaité
+            et l'épargne disponible, dans la limite du prix du bien.
+
+    Returns:
+        dict: Un dictionnaire contenant les éléments de la synthèse.
+    """
+    # 1. Calcul du coût total
+    frais_notaire_valeur = montant_bien * (frais_notaire_pct / 100)
+    cout_total_projet = montant_bien + frais_notaire_valeur
+
+    # 2. L'apport par défaut est le maximum entre l'apport souhaité (objectif) et l'épargne actuelle.
+    apport_objectif = montant_bien * (apport_souhaite_pct / 100)
+    apport_defaut = int(min(max(apport_objectif, epargne_totale), montant_bien))
+    if apport is None:
+        apport = apport_defaut
+
+    # 3. Le montant à emprunter est calculé sur la base de l'apport retenu.
+    montant_a_emprunter = cout_total_projet - apport
+
+    return {
+        "frais_notaire_valeur": frais_notaire_valeur,
+        "cout_total_projet": cout_total_projet,
+        "apport_objectif": apport_objectif,
+        "apport_valide": epargne_totale >= apport_objectif,
+        "epargne_pct": (epargne_totale / montant_bien) * 100,
+        "apport_defaut": apport_defaut,
+        "apport": apport,
+        "montant_a_emprunter": montant_a_emprunter,
+        "emprunt": montant_a_emprunter > epargne_totale,
+    }
+
+
+# --- TAEG ---
+# Le TAEG est le taux actuariel annuel qui égalise le montant effectivement mis à disposition
+# (montant emprunté moins les frais payés au départ : dossier, garantie) et la valeur actualisée
+# des mensualités, assurance comprise : TAEG = (1 + i)^12 - 1, où i est le taux mensuel solution.
+
+def _resoudre_taux_tableaux(fonction, bas, haut, depart, tolerance: float = 1e-12, iterations_max: int = 100) -> tuple:
+    """
+    Résout fonction(i) = 0 pour un tableau d'inconnues, par la méthode de Newton sécurisée par dichotomie.
+
+    `fonction` retourne la valeur et la dérivée en chaque point, et doit être décroissante sur [bas, haut].
+    L'intervalle est resserré à chaque itération selon le signe de la valeur ; un pas de Newton qui en
+    sortirait est remplacé par le milieu de l'intervalle, ce qui garantit la convergence.
+
+    Returns:
+        tuple: (racines, converge). Les racines valent NaN là où l'intervalle ne contient pas de solution
+        ou si la précision n'est pas atteinte en `iterations_max` itérations.
+    """
+    bas, haut, taux = (np.array(valeurs, dtype=float) for valeurs in np.broadcast_arrays(bas, haut, depart))
+    valeur_bas, _ = fonction(bas)
+    valeur_haut, _ = fonction(haut)
+    encadre = (valeur_bas >= 0) & (valeur_haut <= 0)
+    converge = ~encadre
+    taux = np.clip(taux, bas, haut)
+
+    for _ in range(iterations_max):
+        if converge.all():
+            break
+        valeur, derivee = fonction(taux)
+        bas = np.where(valeur > 0, taux, bas)
+        haut = np.where(valeur < 0, taux, haut)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = taux - valeur / derivee
+        hors_intervalle = ~((newton > bas) & (newton < haut))
+        suivant = np.where(hors_intervalle, (bas + haut) / 2, newton)
+
+        atteint = (valeur == 0) | (np.abs(suivant - taux) <= tolerance * (1 + np.abs(taux)))
+        taux = np.where(converge, taux, suivant)
+        converge |= atteint
+
+    return np.where(encadre & converge, taux, np.nan), encadre & converge
+
+
+def calculer_taeg(montant_emprunte, mensualite_avec_assurance, duree_annees, frais_dossier=0.0, frais_garantie_pct=0.0) -> np.ndarray:
+    """
+    Calcule le TAEG d'un ou plusieurs prêts à mensualités constantes, en une seule résolution vectorisée.
+
+    Args:
+        montant_emprunte (array-like): Les montants empruntés.
+        mensualite_avec_assurance (array-like): Les mensualités, assurance comprise.
+        duree_annees (array-like): Les durées des prêts en années.
+        frais_dossier (array-like): Les frais de dossier, en euros.
+        frais_garantie_pct (array-like): Les frais de garantie (caution ou hypothèque), en pourcentage du montant emprunté.
+
+    Returns:
+        np.ndarray: Les TAEG en pourcentage (NaN si le taux n'a pas de solution).
+    """
+    montant_emprunte, mensualite, duree_annees, frais_dossier, frais_garantie_pct = np.broadcast_arrays(
+        np.asarray(montant_emprunte, dtype=float),
+        np.asarray(mensualite_avec_assurance, dtype=float),
+        np.asarray(duree_annees, dtype=float),
+        np.asarray(frais_dossier, dtype=float),
+        np.asarray(frais_garantie_pct, dtype=float),
+    )
+    montant_net = montant_emprunte - frais_dossier - montant_emprunte * frais_garantie_pct / 100
+    nombre_mensualites = duree_annees * 12
+
+    def valeur_actualisee(taux):
+        # Facteur d'annuité (1 - (1+i)^-n) / i et sa dérivée ; développement limité au voisinage de 0
+        proche_zero = np.abs(taux) < 1e-9
+        taux_calcul = np.where(proche_zero, 1.0, taux)
+        actualisation = (1 + taux_calcul)**-nombre_mensualites
+        facteur = np.where(proche_zero, nombre_mensualites * (1 - (nombre_mensualites + 1) / 2 * taux), (1 - actualisation) / taux_calcul)
+        derivee = np.where(
+            proche_zero,
+            -nombre_mensualites * (nombre_mensualites + 1) / 2,
+            (nombre_mensualites * actualisation / (1 + taux_calcul) - facteur) / taux_calcul
+        )
+        return mensualite * facteur - montant_net, mensualite * derivee
+
+    # Départ : le taux de la mensualité hors frais, proche de la solution
+    taux_mensuel, _ = _resoudre_taux_tableaux(valeur_actualisee, -0.05, 1.0, 0.005)
+    return ((1 + taux_mensuel)**12 - 1) * 100
+
+
+def _taeg_flux_tableaux(montant_net, flux) -> np.ndarray:
+    """
+    Calcule le TAEG de prêts aux mensualités variables (ex. financement lissé en plusieurs tranches).
+
+    Args:
+        montant_net: Un tableau (n_prets,), le montant mis à disposition, frais déduits.
+        flux: Un tableau (n_prets, n_mois), les mensualités assurance comprise.
+
+    Returns:
+        np.ndarray: Les TAEG en pourcentage.
+    """
+    mois = np.arange(1, flux.shape[1] + 1)
+
+    def valeur_actualisee(taux):
+        actualisation = (1 + taux[:, None])**-mois[None, :]
+        return (flux * actualisation).sum(axis=1) - montant_net, -(flux * mois * actualisation).sum(axis=1) / (1 + taux)
+
+    taux_mensuel, _ = _resoudre_taux_tableaux(valeur_actualisee, np.full(len(montant_net), -0.05), 1.0, 0.005)
+    return ((1 + taux_mensuel)**12 - 1) * 100
+
+
+# --- Sensibilité au taux et à la durée ---
+# Dérivées analytiques de la mensualité M = P i / (1 - v), avec v = (1 + i)^-n :
+#   dM/di = P [(1 - v) - i n v / (1 + i)] / (1 - v)^2     (P (n + 1) / 2n à taux nul)
+#   dM/dn = -P i v ln(1 + i) / (1 - v)^2                   (-P / n^2 à taux nul)
+# Le coût total (M + assurance) n - P s'en déduit : d/di = n dM/di, d/dn = M + assurance + n dM/dn.
+
+def calculer_sensibilites(
+    montant_emprunte,
+    taux_annuel_nominal_pct,
+    duree_mois,
+    taux_annuel_assurance_pct,
+    salaire_total=None,
+    taux_endettement_max_pct=TAUX_ENDETTEMENT_MAX_PCT
+) -> dict:
+    """
+    Calcule les détails de prêts et leurs sensibilités au taux et à la durée, par dérivation analytique.
+
+    Les arguments sont diffusés entre eux (au sens NumPy), comme pour `calculer_details_prets_lot` ;
+    la durée est exprimée en mois pour permettre des grilles fines.
+
+    Returns:
+        dict: Les tableaux de `calculer_details_prets_lot` (sauf `duree_annees`), plus `duree_mois` et, pour
+        la mensualité, le coût total et le taux d'endettement (si le salaire est fourni), la variation pour
+        +0,1 point de taux (`..._par_01_pt`) et pour une année de plus (`..._par_annee`), au premier ordre.
+    """
+    duree_mois = np.asarray(duree_mois)
+    details = _calculer_details_prets_tableaux(
+        montant_emprunte,
+        taux_annuel_nominal_pct,
+        duree_mois / 12,
+        taux_annuel_assurance_pct,
+        salaire_total,
+        taux_endettement_max_pct
+    )
+    details.pop("duree_annees")
+    montant_emprunte = np.asarray(montant_emprunte, dtype=float)
+    taux_mensuel_nominal = np.asarray(taux_annuel_nominal_pct, dtype=float) / 1200
+
+    # --- Dérivées de la mensualité (hors assurance) ---
+    taux_positif = taux_mensuel_nominal > 0
+    taux_calcul = np.where(taux_positif, taux_mensuel_nominal, 1.0)
+    actualisation = (1 + taux_calcul)**-duree_mois
+    derivee_taux = np.where(
+        taux_positif,
+        montant_emprunte * ((1 - actualisation) - taux_calcul * duree_mois * actualisation / (1 + taux_calcul)) / (1 - actualisation)**2,
+        montant_emprunte * (duree_mois + 1) / (2 * duree_mois)
+    )
+    derivee_duree = np.where(
+        taux_positif,
+        -montant_emprunte * taux_calcul * actualisation * np.log1p(taux_calcul) / (1 - actualisation)**2,
+        -montant_emprunte / duree_mois**2
+    )
+
+    # Un point de taux annuel vaut 1/1200 de taux mensuel ; une année vaut 12 mois
+    mensualite_par_01_pt = derivee_taux / 1200 * 0.1
+    mensualite_par_annee = derivee_duree * 12
+
+    resultats = {
+        "duree_mois": np.broadcast_to(duree_mois, details["mensualite_avec_assurance"].shape),
+        **details,
+        "mensualite_par_01_pt": mensualite_par_01_pt,
+        "mensualite_par_annee": mensualite_par_annee,
+        "cout_par_01_pt": duree_mois * mensualite_par_01_pt,
+        "cout_par_annee": (details["mensualite_avec_assurance"] + duree_mois * derivee_duree) * 12,
+    }
+
+    if salaire_total is not None:
+        salaire_total = np.asarray(salaire_total, dtype=float)
+        salaire_positif = salaire_total > 0
+        salaire_calcul = np.where(salaire_positif, salaire_total, 1.0)
+        resultats["taux_endettement_par_01_pt"] = np.where(salaire_positif, mensualite_par_01_pt / salaire_calcul * 100, 0.0)
+        resultats["taux_endettement_par_annee"] = np.where(salaire_positif, mensualite_par_annee / salaire_calcul * 100, 0.0)
+
+    return resultats
+
+
+def calculer_surface_sensibilite(
+    montant_emprunte: float,
+    taux_annuel_nominal_pct,
+    durees_mois,
+    taux_annuel_assurance_pct: float,
+    salaire_total: float = None,
+    taux_endettement_max_pct: float = TAUX_ENDETTEMENT_MAX_PCT
+) -> dict:
+    """
+    Évalue la mensualité, le coût total et le taux d'endettement sur toute une grille taux x durée, en une passe.
+
+    Args:
+        montant_emprunte (float): Le montant du prêt.
+        taux_annuel_nominal_pct (array-like): Les taux nominaux de la grille, en pourcentage.
+        durees_mois (array-like): Les durées de la grille, en mois.
+        taux_annuel_assurance_pct (float): Le taux d'assurance annuel, en pourcentage.
+        salaire_total (float, optional): Le salaire net mensuel du foyer, pour le taux d'endettement.
+        taux_endettement_max_pct (float): Le taux d'endettement maximal, pour le salaire minimum.
+
+    Returns:
+        dict: Les coordonnées `taux_pct` et `durees_mois`, et les tableaux de `calculer_sensibilites`
+        de forme (n_taux, n_durees).
+    """
+    taux_annuel_nominal_pct = np.asarray(taux_annuel_nominal_pct, dtype=float)
+    durees_mois = np.asarray(durees_mois)
+    surface = calculer_sensibilites(
+        montant_emprunte,
+        taux_annuel_nominal_pct[:, None],
+        durees_mois[None, :],
+        taux_annuel_assurance_pct,
+        salaire_total,
+        taux_endettement_max_pct
+    )
+    surface.pop("duree_mois")
+    surface.pop("taux_nominal_pct")
+    return {"taux_pct": taux_annuel_nominal_pct, "durees_mois": durees_mois, **surface}
+
+
+# --- Capacité d'emprunt ---
+
+def _capacite_emprunt_tableaux(
+    salaire_total,
+    taux_annuel_nominal_pct,
+    duree_annees,
+    taux_annuel_assurance_pct,
+    taux_endettement_max_pct=TAUX_ENDETTEMENT_MAX_PCT,
+    frais_notaire_pct=0.0,
+    apport=0.0
+) -> dict:
+    """
+    Inverse la formule d'annuité : du salaire et du taux d'endettement visé, déduit le montant maximal
+    empruntable et le prix maximal du bien.
+
+    Tous les arguments sont diffusés entre eux (au sens NumPy), ce qui permet d'évaluer en une passe
+    toutes les durées et toute une grille de taux.
+
+    Returns:
+        dict: La mensualité maximale (assurance comprise), le montant maximal empruntable et le prix maximal du bien.
+    """
+    taux_mensuel_nominal = np.asarray(taux_annuel_nominal_pct, dtype=float) / 1200
+    nombre_mensualites = np.asarray(duree_annees) * 12
+    taux_positif = taux_mensuel_nominal > 0
+    taux_calcul = np.where(taux_positif, taux_mensuel_nominal, 1.0)
+
+    # Mensualité (assurance comprise) pour 1 € emprunté
+    mensualite_par_euro = np.where(
+        taux_positif,
+        taux_calcul / (1 - (1 + taux_calcul)**-nombre_mensualites),
+        1 / nombre_mensualites
+    ) + np.asarray(taux_annuel_assurance_pct, dtype=float) / 1200
+
+    mensualite_max = np.asarray(salaire_total, dtype=float) * np.asarray(taux_endettement_max_pct, dtype=float) / 100
+    montant_max = mensualite_max / mensualite_par_euro
+
+    # Le coût du projet (prix + frais de notaire) est couvert par l'emprunt et l'apport
+    prix_bien_max = (montant_max + apport) / (1 + np.asarray(frais_notaire_pct, dtype=float) / 100)
+
+    return {
+        "mensualite_max": np.broadcast_to(mensualite_max, montant_max.shape),
+        "montant_max": montant_max,
+        "prix_bien_max": prix_bien_max,
+    }
+
+
+def calculer_capacite_emprunt(
+    salaire_total: float,
+    durees_taux: dict,
+    taux_assurance_pct: float,
+    taux_endettement_max_pct: float = TAUX_ENDETTEMENT_MAX_PCT,
+    frais_notaire_pct: float = 0.0,
+    apport: float = 0.0
+) -> pd.DataFrame:
+    """
+    Calcule, pour chaque durée, le montant maximal empruntable et le prix maximal du bien
+    compatibles avec le taux d'endettement visé.
+
+    Args:
+        salaire_total (float): Le salaire net mensuel du foyer.
+        durees_taux (dict): Les taux nominaux annuels (en %) par durée de prêt (en années).
+        taux_assurance_pct (float): Le taux d'assurance annuel, en pourcentage.
+        taux_endettement_max_pct (float): Le taux d'endettement visé, en pourcentage.
+        frais_notaire_pct (float): Les frais de notaire, en pourcentage du prix du bien.
+        apport (float): L'apport personnel.
+
+    Returns:
+        pd.DataFrame: Une ligne par durée, avec la mensualité, le montant emprunté et le prix du bien maximaux.
+    """
+    durees = np.array(list(durees_taux.keys()))
+    taux = np.array(list(durees_taux.values()), dtype=float)
+
+    capacite = _capacite_emprunt_tableaux(
+        salaire_total,
+        taux,
+        durees,
+        taux_assurance_pct,
+        taux_endettement_max_pct,
+        frais_notaire_pct,
+        apport
+    )
+
+    return pd.DataFrame({
+        "duree_annees": durees,
+        "taux_nominal_pct": taux,
+        **capacite,
+    })
+
+
+# --- Projection de l'épargne et date d'achat au plus tôt ---
+
+def projeter_epargne(epargne_totale: float, epargne_mensuelle: float, nombre_mois: int, rendement_epargne_pct: float = 0.0, croissance_revenus_pct: float = 0.0) -> dict:
+    """
+    Projette mois par mois l'épargne du foyer : épargne placée, versements mensuels et hausse des revenus.
+
+    L'épargne rapporte `rendement_epargne_pct` par an (capitalisation mensuelle) ; les salaires et
+    les versements mensuels augmentent de `croissance_revenus_pct` par an. Le calcul se fait par
+    somme cumulée, sans boucle sur les mois.
+
+    Args:
+        epargne_totale (float): L'épargne disponible aujourd'hui.
+        epargne_mensuelle (float): L'épargne mensuelle actuelle.
+        nombre_mois (int): L'horizon de la projection, en mois.
+        rendement_epargne_pct (float): Le rendement annuel de l'épargne, en pourcentage.
+        croissance_revenus_pct (float): La hausse annuelle des revenus (et de l'épargne mensuelle), en pourcentage.
+
+    Returns:
+        dict: Des tableaux NumPy de `nombre_mois + 1` valeurs (mois 0 à `nombre_mois`) : `mois`, `epargne`
+        (épargne accumulée) et `indice_revenus` (revenus rapportés à ceux d'aujourd'hui).
+    """
+    mois = np.arange(nombre_mois + 1)
+    capitalisation = (1 + rendement_epargne_pct / 100)**(mois / 12)
+    indice_revenus = (1 + croissance_revenus_pct / 100)**(mois / 12)
+
+    # Épargne du mois m : (S0 + somme des versements actualisés jusqu'à m) capitalisée jusqu'à m
+    versements = np.where(mois > 0, epargne_mensuelle * indice_revenus, 0.0)
+    epargne = capitalisation * (epargne_totale + np.cumsum(versements / capitalisation))
+
+    return {"mois": mois, "epargne": epargne, "indice_revenus": indice_revenus}
+
+
+def calculer_date_achat_au_plus_tot(
+    prix_biens,
+    epargne_totale: float,
+    epargne_mensuelle: float,
+    salaire_total: float,
+    taux_nominal_pct: float,
+    duree_annees: int,
+    taux_assurance_pct: float,
+    frais_notaire_pct: float,
+    apport_souhaite_pct: float,
+    taux_endettement_max_pct: float = TAUX_ENDETTEMENT_MAX_PCT,
+    rendement_epargne_pct: float = 0.0,
+    croissance_revenus_pct: float = 0.0,
+    evolution_prix_pct: float = 0.0,
+    horizon_mois: int = 360
+) -> pd.DataFrame:
+    """
+    Cherche, pour chaque prix de bien, le premier mois où le foyer réunit l'apport souhaité et reste
+    sous le taux d'endettement maximal.
+
+    Le prix du bien évolue de `evolution_prix_pct` par an. Au mois d'achat, l'apport est le maximum entre
+    l'apport souhaité et l'épargne accumulée, dans la limite du prix, comme dans `calculer_synthese_financement`.
+    La mensualité étant proportionnelle au montant emprunté, toute la grille prix x mois est évaluée d'un coup.
+
+    Args:
+        prix_biens (array-like): Les prix des biens, aux conditions d'aujourd'hui.
+        epargne_totale, epargne_mensuelle, rendement_epargne_pct, croissance_revenus_pct: Voir `projeter_epargne`.
+        salaire_total (float): Le salaire net mensuel actuel du foyer.
+        taux_nominal_pct (float): Le taux nominal du prêt, en pourcentage.
+        duree_annees (int): La durée du prêt en années.
+        taux_assurance_pct (float): Le taux d'assurance annuel, en pourcentage.
+        frais_notaire_pct (float): Les frais de notaire, en pourcentage du prix du bien.
+        apport_souhaite_pct (float): L'apport souhaité, en pourcentage du prix du bien.
+        taux_endettement_max_pct (float): Le taux d'endettement maximal, en pourcentage.
+        evolution_prix_pct (float): L'évolution annuelle des prix de l'immobilier, en pourcentage.
+        horizon_mois (int): Le nombre maximal de mois examinés.
+
+    Returns:
+        pd.DataFrame: Une ligne par prix : `prix_bien`, `mois_achat` (NaN si l'achat n'est pas possible dans
+        l'horizon) et, à cette date, `prix_achat`, `epargne`, `apport`, `montant_emprunte`,
+        `mensualite_avec_assurance` et `taux_endettement_pct`.
+    """
+    prix_biens = np.asarray(prix_biens, dtype=float)
+    projection = projeter_epargne(epargne_totale, epargne_mensuelle, horizon_mois, rendement_epargne_pct, croissance_revenus_pct)
+
+    # Axes : (prix, mois)
+    epargne = projection["epargne"][None, :]
+    salaire = salaire_total * projection["indice_revenus"][None, :]
+    prix = prix_biens[:, None] * (1 + evolution_prix_pct / 100)**(projection["mois"][None, :] / 12)
+
+    apport_objectif = prix * apport_souhaite_pct / 100
+    apport = np.minimum(np.maximum(apport_objectif, epargne), prix)
+    montant_emprunte = np.maximum(prix * (1 + frais_notaire_pct / 100) - apport, 0.0)
+
+    # Mensualité pour 1 € emprunté, assurance comprise
+    mensualite_unitaire = _calculer_details_prets_tableaux(1.0, taux_nominal_pct, duree_annees, taux_assurance_pct)["mensualite_avec_assurance"].item()
+    mensualite = montant_emprunte * mensualite_unitaire
+    taux_endettement_pct = np.where(salaire > 0, mensualite / np.where(salaire > 0, salaire, 1.0) * 100, np.where(mensualite > 0, np.inf, 0.0))
+
+    possible = (epargne >= apport_objectif) & (taux_endettement_pct <= taux_endettement_max_pct)
+    trouve = possible.any(axis=1)
+    indice = possible.argmax(axis=1)
+    lignes = np.arange(len(prix_biens))
+
+    def au_mois_achat(valeurs):
+        return np.where(trouve, np.broadcast_to(valeurs, possible.shape)[lignes, indice], np.nan)
+
+    return pd.DataFrame({
+        "prix_bien": prix_biens,
+        "mois_achat": au_mois_achat(projection["mois"][None, :]),
+        "prix_achat": au_mois_achat(prix),
+        "epargne": au_mois_achat(epargne),
+        "apport": au_mois_achat(apport),
+        "montant_emprunte": au_mois_achat(montant_emprunte),
+        "mensualite_avec_assurance": au_mois_achat(mensualite),
+        "taux_endettement_pct": au_mois_achat(taux_endettement_pct),
+    })
+
+
+# --- Tableaux d'amortissement ---
+
+def _tableaux_amortissement(montant_emprunte, taux_mensuel_nominal, mensualite_hors_assurance, mensualite_assurance, nombre_mensualites, mois) -> dict:
+    """
+    Calcule les lignes d'amortissement par formule fermée, sans boucle sur les mois.
+
+    Tous les arguments sont diffusés entre eux (au sens NumPy) : typiquement des colonnes (n_prets, 1)
+    pour les paramètres des prêts et une ligne (1, n_mois) pour les numéros de mois.
+    Les mois au-delà de la durée du prêt sont mis à zéro.
+
+    Returns:
+        dict: Un dictionnaire de tableaux NumPy (intérêts, capital remboursé, assurance, capital restant dû...).
+    """
+    taux_positif = taux_mensuel_nominal > 0
+    taux_calcul = np.where(taux_positif, taux_mensuel_nominal, 1.0)
+
+    def capital_restant(k):
+        # Capital restant dû après k mensualités : P(1+r)^k - M((1+r)^k - 1)/r, ou P - M*k à taux nul
+        facteur = (1 + taux_calcul)**k
+        return np.where(
+            taux_positif,
+            montant_emprunte * facteur - mensualite_hors_assurance * (facteur - 1) / taux_calcul,
+            montant_emprunte - mensualite_hors_assurance * k
+        )
+
+    actif = mois <= nombre_mensualites
+    capital_debut = capital_restant(mois - 1)
+    interets = capital_debut * taux_mensuel_nominal
+    # Le dernier mois rembourse exactement le capital restant (absorbe les erreurs d'arrondi)
+    capital_rembourse = np.where(mois == nombre_mensualites, capital_debut, mensualite_hors_assurance - interets)
+
+    return {
+        "mensualite_hors_assurance": np.where(actif, interets + capital_rembourse, 0.0),
+        "interets": np.where(actif, interets, 0.0),
+        "capital_rembourse": np.where(actif, capital_rembourse, 0.0),
+        "assurance": np.where(actif, mensualite_assurance, 0.0),
+        "capital_restant_du": np.where(actif, np.maximum(capital_debut - capital_rembourse, 0.0), 0.0),
+        "actif": actif,
+    }
+
+
+def generer_tableau_amortissement(montant_emprunte: float, taux_annuel_nominal_pct: float, duree_annees: int, taux_annuel_assurance_pct: float) -> pd.DataFrame:
+    """
+    Génère le tableau d'amortissement mois par mois d'un prêt, en une seule passe vectorisée.
+
+    Args:
+        montant_emprunte (float): Le montant total du prêt.
+        taux_annuel_nominal_pct (float): Le taux d'intérêt annuel du crédit (hors assurance), en pourcentage.
+        duree_annees (int): La durée du prêt en années.
+        taux_annuel_assurance_pct (float): Le taux d'assurance annuel, en pourcentage.
+
+    Returns:
+        pd.DataFrame: Une ligne par mois avec la mensualité, les intérêts, le capital remboursé,
+        l'assurance et le capital restant dû.
+    """
+    details = _calculer_details_prets_tableaux(montant_emprunte, taux_annuel_nominal_pct, duree_annees, taux_annuel_assurance_pct)
+    nombre_mensualites = int(duree_annees * 12)
+    mois = np.arange(1, nombre_mensualites + 1)
+
+    lignes = _tableaux_amortissement(
+        float(montant_emprunte),
+        taux_annuel_nominal_pct / 1200,
+        details["mensualite_hors_assurance"].item(),
+        details["mensualite_avec_assurance"].item() - details["mensualite_hors_assurance"].item(),
+        nombre_mensualites,
+        mois
+    )
+
+    return pd.DataFrame({
+        "mois": mois,
+        "annee": (mois - 1) // 12 + 1,
+        "mensualite_avec_assurance": lignes["mensualite_hors_assurance"] + lignes["assurance"],
+        "mensualite_hors_assurance": lignes["mensualite_hors_assurance"],
+        "interets": lignes["interets"],
+        "capital_rembourse": lignes["capital_rembourse"],
+        "assurance": lignes["assurance"],
+        "capital_restant_du": lignes["capital_restant_du"],
+    })
+
+
+def iterer_tableaux_amortissement(portefeuille: pd.DataFrame, taille_lot: int = 1000):
+    """
+    Génère les tableaux d'amortissement d'un portefeuille de prêts, lot par lot.
+
+    Seul un lot est présent en mémoire à la fois : chaque lot est calculé en une passe vectorisée
+    (matrice prêts x mois), puis restitué au format long avant de passer au suivant.
+
+    Args:
+        portefeuille (pd.DataFrame): Les prêts, avec les colonnes `montant_emprunte`, `taux_nominal_pct`,
+            `duree_annees` et `taux_assurance_pct` (comme pour `calculer_details_prets_df`).
+        taille_lot (int): Le nombre de prêts traités par lot.
+
+    Yields:
+        pd.DataFrame: Les lignes d'amortissement du lot, avec une colonne `pret` reprenant l'index du portefeuille.
+    """
+    for debut in range(0, len(portefeuille), taille_lot):
+        lot = portefeuille.iloc[debut:debut + taille_lot]
+        details = calculer_details_prets_df(lot)
+
+        nombre_mensualites = (lot['duree_annees'].to_numpy() * 12).astype(int)[:, None]
+        mois = np.arange(1, nombre_mensualites.max() + 1)[None, :]
+
+        lignes = _tableaux_amortissement(
+            lot['montant_emprunte'].to_numpy(dtype=float)[:, None],
+            lot['taux_nominal_pct'].to_numpy(dtype=float)[:, None] / 1200,
+            details['mensualite_hors_assurance'].to_numpy()[:, None],
+            (details['mensualite_avec_assurance'] - details['mensualite_hors_assurance']).to_numpy()[:, None],
+            nombre_mensualites,
+            mois
+        )
+        actif = lignes.pop("actif")
+
+        yield pd.DataFrame({
+            "pret": np.broadcast_to(lot.index.to_numpy()[:, None], actif.shape)[actif],
+            "mois": np.broadcast_to(mois, actif.shape)[actif],
+            "mensualite_avec_assurance": (lignes["mensualite_hors_assurance"] + lignes["assurance"])[actif],
+            **{cle: valeurs[actif] for cle, valeurs in lignes.items()},
+        })
+
+
+# --- Financement en plusieurs tranches (PTZ, prêt employeur) et lissage ---
+# Les prêts complémentaires (PTZ, prêt employeur...) ont un échéancier fixe. La banque "lisse" le prêt
+# principal : sa mensualité est choisie pour que la mensualité totale reste constante. Quand une tranche
+# complémentaire dépasse à elle seule ce niveau, le prêt principal est suspendu ce mois-là et la mensualité
+# totale présente plusieurs paliers.
+
+def _echeanciers_complementaires(tranches: list, taux_annuel_assurance_pct: float, mois) -> dict:
+    """
+    Calcule l'échéancier mois par mois des tranches complémentaires, par formule fermée.
+
+    Pendant le différé, seuls les intérêts (nuls pour un PTZ) et l'assurance sont payés ;
+    le capital est ensuite amorti à mensualités constantes sur la durée restante.
+
+    Returns:
+        dict: Des tableaux NumPy (n_tranches, n_mois) : mensualités hors assurance, intérêts,
+        assurance et capital restant dû.
+    """
+    lignes = {cle: np.zeros((len(tranches), len(mois))) for cle in ["mensualite_hors_assurance", "interets", "assurance", "capital_restant_du"]}
+
+    for i, tranche in enumerate(tranches):
+        montant = float(tranche['montant'])
+        taux_mensuel = tranche['taux_pct'] / 1200
+        nombre_mensualites = int(round(tranche['duree_annees'] * 12))
+        differe_mois = int(round(tranche.get('differe_annees', 0) * 12))
+        mois_amortissement = nombre_mensualites - differe_mois
+
+        mensualite = _calculer_details_prets_tableaux(montant, tranche['taux_pct'], mois_amortissement / 12, 0.0)["mensualite_hors_assurance"].item()
+        amortissement = _tableaux_amortissement(montant, taux_mensuel, mensualite, 0.0, mois_amortissement, mois - differe_mois)
+        en_differe = mois <= differe_mois
+
+        lignes["interets"][i] = np.where(en_differe, montant * taux_mensuel, amortissement["interets"])
+        lignes["mensualite_hors_assurance"][i] = np.where(en_differe, montant * taux_mensuel, amortissement["mensualite_hors_assurance"])
+        lignes["capital_restant_du"][i] = np.where(en_differe, montant, amortissement["capital_restant_du"])
+        lignes["assurance"][i] = np.where(mois <= nombre_mensualites, montant * taux_annuel_assurance_pct / 1200, 0.0)
+
+    return lignes
+
+
+def _lisser_tableaux(montant_principal, taux_mensuel_nominal, nombre_mensualites, charge_complementaire, mois) -> np.ndarray:
+    """
+    Calcule, pour un lot de prêts principaux, le niveau de mensualité totale lissée.
+
+    Le prêt principal paie chaque mois max(C - charge, 0), où `charge` est la mensualité des tranches
+    complémentaires (assurance comprise) ; C est tel que la valeur actualisée de ces paiements égale
+    le montant du prêt principal. Cette valeur actualisée est linéaire par morceaux en C, avec un
+    morceau par palier de la charge : la solution est exacte, sans itération.
+
+    Args:
+        montant_principal, taux_mensuel_nominal, nombre_mensualites: Des tableaux (n_prets,).
+        charge_complementaire: Un tableau (n_mois,), la charge mensuelle des tranches complémentaires.
+        mois: Un tableau (n_mois,), les numéros de mois (1 à n_mois).
+
+    Returns:
+        np.ndarray: Le niveau lissé C de chaque prêt (hors assurance du prêt principal).
+    """
+    actif = mois[None, :] <= nombre_mensualites[:, None]
+    actualisation = np.where(actif, (1 + taux_mensuel_nominal[:, None]) ** -mois[None, :], 0.0)
+
+    # Valeur actualisée des paiements du prêt principal pour C égal à chaque palier : A * palier - B
+    paliers = np.unique(charge_complementaire)
+    sous_palier = charge_complementaire[None, :] <= paliers[:, None]
+    A = actualisation @ sous_palier.T
+    B = actualisation @ (sous_palier * charge_complementaire[None, :]).T
+    valeur_aux_paliers = A * paliers[None, :] - B
+
+    # Le palier retenu est le dernier dont la valeur actualisée ne dépasse pas le montant à financer
+    indice = (valeur_aux_paliers <= montant_principal[:, None]).sum(axis=1) - 1
+    lignes = np.arange(len(indice))
+    A_retenu, B_retenu = A[lignes, indice], B[lignes, indice]
+    return np.where(
+        A_retenu > 0,
+        (montant_principal + B_retenu) / np.where(A_retenu > 0, A_retenu, 1.0),
+        paliers[indice]
+    )
+
+
+def _financement_tranches_tableaux(montant_a_emprunter: float, taux_annuel_nominal_pct, duree_annees, taux_annuel_assurance_pct: float, tranches: list) -> dict:
+    """
+    Construit, pour plusieurs durées du prêt principal, l'échéancier combiné lissé de toutes les tranches.
+
+    Returns:
+        dict: Les paramètres des prêts principaux (n_prets,) et les échéanciers (n_prets, n_mois).
+    """
+    taux_annuel_nominal_pct = np.asarray(taux_annuel_nominal_pct, dtype=float)
+    duree_annees = np.asarray(duree_annees)
+    montant_principal = montant_a_emprunter - sum(tranche['montant'] for tranche in tranches)
+    if montant_principal < 0:
+        raise ValueError("Les prêts complémentaires dépassent le montant à emprunter.")
+
+    nombre_mensualites = (duree_annees * 12).astype(int)
+    horizon = max(nombre_mensualites.max(), *(int(round(tranche['duree_annees'] * 12)) for tranche in tranches))
+    mois = np.arange(1, horizon + 1)
+    complementaires = _echeanciers_complementaires(tranches, taux_annuel_assurance_pct, mois)
+    charge = (complementaires["mensualite_hors_assurance"] + complementaires["assurance"]).sum(axis=0)
+
+    taux_mensuel = taux_annuel_nominal_pct / 1200
+    niveau = _lisser_tableaux(np.full(len(nombre_mensualites), montant_principal), taux_mensuel, nombre_mensualites, charge, mois)
+
+    # --- Échéancier du prêt principal ---
+    actif = mois[None, :] <= nombre_mensualites[:, None]
+    mensualite_principal = np.where(actif, np.maximum(niveau[:, None] - charge[None, :], 0.0), 0.0)
+    # Capital restant dû : (1+r)^k * (P - somme des paiements actualisés jusqu'au mois k)
+    capitalisation = (1 + taux_mensuel[:, None]) ** mois[None, :]
+    capital_restant_du = np.maximum(capitalisation * (montant_principal - np.cumsum(mensualite_principal / capitalisation, axis=1)), 0.0)
+    capital_debut = np.concatenate([np.full((len(niveau), 1), montant_principal), capital_restant_du[:, :-1]], axis=1)
+    interets_principal = np.where(actif, capital_debut * taux_mensuel[:, None], 0.0)
+
+    return {
+        "montant_principal": montant_principal,
+        "niveau_lisse": niveau,
+        "mois": mois,
+        "mensualite_principal": mensualite_principal,
+        "interets_principal": interets_principal,
+        "assurance_principal": np.where(actif, montant_principal * taux_annuel_assurance_pct / 1200, 0.0),
+        "capital_restant_du_principal": np.where(actif, capital_restant_du, 0.0),
+        "complementaires": complementaires,
+    }
+
+
+def calculer_financement_tranches(
+    montant_a_emprunter: float,
+    durees_taux: dict,
+    taux_assurance_pct: float,
+    tranches: list,
+    salaire_total: float = None,
+    taux_endettement_max_pct: float = TAUX_ENDETTEMENT_MAX_PCT,
+    frais_dossier: float = 0.0,
+    frais_garantie_pct: float = 0.0
+) -> pd.DataFrame:
+    """
+    Calcule, pour chaque durée du prêt principal, le financement combiné lissé : prêt principal + tranches complémentaires.
+
+    Args:
+        montant_a_emprunter (float): Le montant total à financer, toutes tranches confondues.
+        durees_taux (dict): Les durées du prêt principal (en années) et leurs taux nominaux (en %).
+        taux_assurance_pct (float): Le taux d'assurance annuel, appliqué à chaque tranche, en pourcentage.
+        tranches (list): Les prêts complémentaires, un dictionnaire par tranche avec les clés `nom`, `montant`,
+            `taux_pct`, `duree_annees` et, facultativement, `differe_annees` (ex. un PTZ différé de 5 ans).
+        salaire_total (float, optional): Le salaire net mensuel du foyer, pour le taux d'endettement.
+        taux_endettement_max_pct (float): Le taux d'endettement maximal, pour le salaire minimum.
+        frais_dossier (float): Les frais de dossier, en euros, pour le TAEG.
+        frais_garantie_pct (float): Les frais de garantie du prêt principal, en pourcentage de son montant, pour le TAEG.
+
+    Returns:
+        pd.DataFrame: Une ligne par durée, avec les colonnes de `calculer_details_prets_lot` calculées sur la
+        mensualité totale la plus élevée, plus `montant_pret_principal`, `mensualite_lissee` (premier palier),
+        `nombre_paliers` et `taeg_pct` (TAEG du financement combiné).
+    """
+    duree_annees = np.array(list(durees_taux.keys()))
+    taux_annuel_nominal_pct = np.array(list(durees_taux.values()), dtype=float)
+    financement = _financement_tranches_tableaux(montant_a_emprunter, taux_annuel_nominal_pct, duree_annees, taux_assurance_pct, tranches)
+    complementaires = financement["complementaires"]
+
+    mensualite_hors_assurance = financement["mensualite_principal"] + complementaires["mensualite_hors_assurance"].sum(axis=0)
+    assurance = financement["assurance_principal"] + complementaires["assurance"].sum(axis=0)
+    mensualite_avec_assurance = mensualite_hors_assurance + assurance
+
+    # Les paliers sont comptés au centime près, tant qu'il reste une tranche à rembourser
+    en_cours = mensualite_avec_assurance > 0.005
+    changements = (np.abs(np.diff(mensualite_avec_assurance, axis=1)) > 0.005) & en_cours[:, 1:]
+    interets = financement["interets_principal"].sum(axis=1) + complementaires["interets"].sum()
+
+    df = pd.DataFrame({
+        "duree_annees": duree_annees,
+        "taux_nominal_pct": taux_annuel_nominal_pct,
+        "mensualite_avec_assurance": mensualite_avec_assurance.max(axis=1),
+        "mensualite_hors_assurance": mensualite_hors_assurance.max(axis=1),
+        "cout_total_credit": interets + assurance.sum(axis=1),
+        "salaire_mensuel_minimum": mensualite_avec_assurance.max(axis=1) / (taux_endettement_max_pct / 100),
+        "montant_pret_principal": financement["montant_principal"],
+        "mensualite_lissee": mensualite_avec_assurance[:, 0],
+        "nombre_paliers": changements.sum(axis=1) + 1,
+        "taeg_pct": _taeg_flux_tableaux(
+            np.full(len(duree_annees), montant_a_emprunter - frais_dossier - financement["montant_principal"] * frais_garantie_pct / 100),
+            mensualite_avec_assurance
+        ),
+    })
+    if salaire_total is not None:
+        df["taux_endettement_pct"] = df["mensualite_avec_assurance"] / salaire_total * 100 if salaire_total > 0 else 100.0
+    return df
+
+
+def generer_echeancier_lisse(montant_a_emprunter: float, taux_annuel_nominal_pct: float, duree_annees: int, taux_annuel_assurance_pct: float, tranches: list) -> pd.DataFrame:
+    """
+    Génère l'échéancier combiné mois par mois d'un financement en plusieurs tranches, avec le prêt principal lissé.
+
+    Returns:
+        pd.DataFrame: Une ligne par mois, avec la mensualité (hors assurance) du prêt principal et de chaque tranche,
+        l'assurance totale, la mensualité totale et le capital restant dû toutes tranches confondues.
+    """
+    financement = _financement_tranches_tableaux(montant_a_emprunter, [taux_annuel_nominal_pct], [duree_annees], taux_annuel_assurance_pct, tranches)
+    complementaires = financement["complementaires"]
+    mois = financement["mois"]
+
+    df = pd.DataFrame({
+        "mois": mois,
+        "annee": (mois - 1) // 12 + 1,
+        "pret_principal": financement["mensualite_principal"][0],
+        **{tranche['nom']: complementaires["mensualite_hors_assurance"][i] for i, tranche in enumerate(tranches)},
+        "assurance": financement["assurance_principal"][0] + complementaires["assurance"].sum(axis=0),
+        "interets": financement["interets_principal"][0] + complementaires["interets"].sum(axis=0),
+        "capital_restant_du": financement["capital_restant_du_principal"][0] + complementaires["capital_restant_du"].sum(axis=0),
+    })
+    df.insert(2, "mensualite_avec_assurance", df["pret_principal"] + complementaires["mensualite_hors_assurance"].sum(axis=0) + df["assurance"])
+    return df
+
+
+def generer_tableau_comparatif(
+    montant_a_emprunter: float,
+    durees_taux: dict,
+    taux_assurance_pct: float,
+    salaire_total: float,
+    taux_endettement_max_pct: float = TAUX_ENDETTEMENT_MAX_PCT,
+    tranches: list = None,
+    frais_dossier: float = 0.0,
+    frais_garantie_pct: float = 0.0
+) -> pd.DataFrame:
+    """
+    Génère un DataFrame Pandas comparant plusieurs scénarios de prêt et le dayaframe adapté pour l'affichage associé.
+
+    Si des prêts complémentaires (`tranches`, voir `calculer_financement_tranches`) sont fournis, chaque durée
+    correspond au prêt principal lissé, et la mensualité et le taux d'endettement portent sur le financement combiné.
+    Le TAEG intègre l'assurance, les frais de dossier et les frais de garantie.
+    """
+    if tranches:
+        df = calculer_financement_tranches(
+            montant_a_emprunter,
+            durees_taux,
+            taux_assurance_pct,
+            tranches,
+            salaire_total,
+            taux_endettement_max_pct,
+            frais_dossier,
+            frais_garantie_pct
+        )
+    else:
+        df = calculer_details_prets_lot(
+            montant_a_emprunter,
+            list(durees_taux.values()),
+            list(durees_taux.keys()),
+            taux_assurance_pct,
+            salaire_total,
+            taux_endettement_max_pct
+        )
+        df['taeg_pct'] = calculer_taeg(
+            montant_a_emprunter,
+            df['mensualite_avec_assurance'].to_numpy(),
+            df['duree_annees'].to_numpy(),
+            frais_dossier,
+            frais_garantie_pct
+        )
+
+    def get_verdict(x):
+        if x['taux_endettement_pct'] > taux_endettement_max_pct:
+            salaire_manquant = x['salaire_mensuel_minimum'] - salaire_total
+            return f"❌ Élevé : il manque {formater_nombre(salaire_manquant)}"
+        elif x['taux_endettement_pct'] > taux_endettement_max_pct - MARGE_PRUDENCE_PCT:
+            return "⚠️ Prudent"
+        else:
+            return "✅ Faisable"
+
+    df['Verdict'] = df.apply(get_verdict, axis=1)
+
+    # --- Préparation du DataFrame pour l'affichage ---
+    df_display = df.copy()
+
+    # 1. Formatage des devises en chaînes de caractères avec séparateur d'espace
+    df_display['mensualite_avec_assurance'] = df_display['mensualite_avec_assurance'].apply(
+        lambda x: formater_nombre(x)
+    )
+    df_display['cout_total_credit'] = df_display['cout_total_credit'].apply(
+        lambda x: formater_nombre(x)
+    )
+    df_display['salaire_mensuel_minimum'] = df_display['salaire_mensuel_minimum'].apply(
+        lambda x: formater_nombre(x)
+    )
+
+    # 2. Renommage des colonnes pour un affichage plus clair
+    df_display = df_display.rename(columns={
+        'duree_annees': 'Durée (ans)',
+        'taux_nominal_pct': 'Taux nominal (%)',
+        'taeg_pct': 'TAEG (%)',
+        'mensualite_avec_assurance': 'Mensualité',
+        'cout_total_credit': 'Coût total du crédit',
+        'salaire_mensuel_minimum': 'Salaire mensuel minimum',
+        'taux_endettement_pct': "Taux d'endettement (%)"
+    })
+
+    # 3. Sélection et réorganisation de l'ordre final des colonnes
+    df_display = df_display[[
+        'Durée (ans)',
+        'Taux nominal (%)',
+        'TAEG (%)',
+        'Mensualité',
+        'Coût total du crédit',
+        'Salaire mensuel minimum',
+        "Taux d'endettement (%)",
+        'Verdict'
+    ]]
+
+    return df, df_display
+
+
+CHOIX_IMPACT = ["Réduire la durée du prêt", "Réduire les mensualités"]
+
+
+def _remboursement_anticipe_tableaux(
+    reduire_duree,
+    mensualite_hors_assurance,
+    duree_initiale_mois,
+    taux_mensuel_nominal,
+    mois_remboursement,
+    montant_remboursement_anticipe
+) -> dict:
+    """
+    Simule un remboursement anticipé pour des tableaux de paramètres, en une seule passe vectorisée.
+
+    Tous les arguments sont diffusés entre eux (au sens NumPy), ce qui permet d'évaluer d'un coup
+    une grille prêts x modes x dates x montants. Les formules sont celles de `calculer_remboursement_anticipe` ;
+    le cas du taux nul est traité sans repli en Python.
+
+    Returns:
+        dict: Les mêmes clés que `calculer_remboursement_anticipe`, sous forme de tableaux NumPy,
+        plus `nouvelle_duree_restante_mois`.
+    """
+    reduire_duree, mensualite_hors_assurance, duree_initiale_mois, taux_mensuel_nominal, mois_remboursement, montant_remboursement_anticipe = np.broadcast_arrays(
+        np.asarray(reduire_duree, dtype=bool),
+        np.asarray(mensualite_hors_assurance, dtype=float),
+        np.asarray(duree_initiale_mois),
+        np.asarray(taux_mensuel_nominal, dtype=float),
+        np.asarray(mois_remboursement),
+        np.asarray(montant_remboursement_anticipe, dtype=float),
+    )
+    taux_positif = taux_mensuel_nominal > 0
+    taux_calcul = np.where(taux_positif, taux_mensuel_nominal, 1.0)
+
+    # --- ÉTAPE 1: Calculer le capital restant dû au moment du remboursement ---
+    duree_initiale_restante_mois = duree_initiale_mois - mois_remboursement
+    capital_restant_du = np.where(
+        taux_positif,
+        mensualite_hors_assurance * ((1 - (1 + taux_calcul)**-duree_initiale_restante_mois) / taux_calcul),
+        mensualite_hors_assurance * duree_initiale_restante_mois
+    )
+
+    # Si le remboursement est supérieur au capital restant, on ajuste
+    montant_remboursement_anticipe = np.minimum(montant_remboursement_anticipe, capital_restant_du)
+
+    # --- ÉTAPE 2: Appliquer le remboursement anticipé ---
+    nouveau_capital_a_rembourser = capital_restant_du - montant_remboursement_anticipe
+    solde = nouveau_capital_a_rembourser > 0
+
+    # --- ÉTAPE 3: Calculer le nouveau plan pour les deux choix possibles ---
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # "Réduire la durée du prêt"
+        duree_reduite = np.ceil(np.where(
+            taux_positif,
+            -np.log(1 - (nouveau_capital_a_rembourser * taux_calcul / mensualite_hors_assurance)) / np.log(1 + taux_calcul),
+            nouveau_capital_a_rembourser / mensualite_hors_assurance
+        ))
+        # "Réduire les mensualités"
+        facteur = (1 + taux_calcul)**duree_initiale_restante_mois
+        mensualite_reduite = np.where(
+            taux_positif,
+            (nouveau_capital_a_rembourser * taux_calcul * facteur) / (facteur - 1),
+            nouveau_capital_a_rembourser / duree_initiale_restante_mois
+        )
+
+    nouvelle_duree_restante_mois = np.where(solde, np.where(reduire_duree, duree_reduite, duree_initiale_restante_mois), 0)
+    nouvelle_mensualite_hors_assurance = np.where(solde, np.where(reduire_duree, mensualite_hors_assurance, mensualite_reduite), 0.0)
+
+    # --- ÉTAPE 4: Calculer les gains ---
+    cout_interets_restants_avant = (mensualite_hors_assurance * duree_initiale_restante_mois) - capital_restant_du
+    cout_interets_restants_apres = (nouvelle_mensualite_hors_assurance * nouvelle_duree_restante_mois) - nouveau_capital_a_rembourser
+    gain_interets = cout_interets_restants_avant - cout_interets_restants_apres
+
+    # --- ÉTAPE 5: Retourner les résultats ---
+    nouvelle_duree_totale_mois = mois_remboursement + nouvelle_duree_restante_mois
+
+    return {
+        "gain_interets": gain_interets,
+        "nouvelle_duree_totale_ans": nouvelle_duree_totale_mois / 12,
+        "duree_reduite_mois": duree_initiale_restante_mois - nouvelle_duree_restante_mois,
+        "ancienne_mensualite": mensualite_hors_assurance,
+        "nouvelle_mensualite": nouvelle_mensualite_hors_assurance,
+        "reduction_mensualite": mensualite_hors_assurance - nouvelle_mensualite_hors_assurance,
+        "nouvelle_duree_restante_mois": nouvelle_duree_restante_mois,
+    }
+
+
+def calculer_remboursement_anticipe(
+    choix_impact: str,
+    mensualite_hors_assurance: float,
+    duree_initiale_mois: int,
+    taux_mensuel_nominal: float,
+    annee_remboursement: int,
+    montant_remboursement_anticipe: float
+) -> dict:
+    """
+    Simule l'impact d'un remboursement anticipé sur un prêt, en permettant
+    soit de réduire la durée, soit de réduire les mensualités.
+
+    Returns:
+        Un dictionnaire avec les résultats : 
+        - gain_interets: Le montant total des intérêts économisés grâce au remboursement.
+        - nouvelle_duree_totale_ans: La nouvelle durée totale du prêt en années.
+        - duree_reduite_mois: Le nombre de mois gagnés sur la durée du prêt.
+        - etc.
+    """
+    resultats = _remboursement_anticipe_tableaux(
+        choix_impact == "Réduire la durée du prêt",
+        mensualite_hors_assurance,
+        duree_initiale_mois,
+        taux_mensuel_nominal,
+        annee_remboursement * 12,
+        montant_remboursement_anticipe
+    )
+    del resultats["nouvelle_duree_restante_mois"]
+    return {cle: valeurs.item() for cle, valeurs in resultats.items()}
+
+
+def simuler_remboursements_multiples(
+    montant_emprunte: float,
+    taux_annuel_nominal_pct: float,
+    duree_annees: int,
+    taux_annuel_assurance_pct: float,
+    evenements: list
+) -> dict:
+    """
+    Applique une liste de remboursements anticipés à un prêt, à n'importe quel mois et
+    en choisissant pour chacun de réduire la durée ou les mensualités.
+
+    Le moteur avance d'événement en événement : entre deux remboursements, le capital restant dû
+    et les intérêts payés sont obtenus par les formules fermées d'annuité, sans parcourir les mois.
+    Avec un seul événement placé en fin d'année, les résultats sont ceux de `calculer_remboursement_anticipe`.
+
+    Args:
+        montant_emprunte (float): Le montant total du prêt.
+        taux_annuel_nominal_pct (float): Le taux d'intérêt annuel du crédit (hors assurance), en pourcentage.
+        duree_annees (int): La durée initiale du prêt en années.
+        taux_annuel_assurance_pct (float): Le taux d'assurance annuel, en pourcentage.
+        evenements (list): Des dictionnaires avec les clés `mois` (nombre de mensualités payées avant le
+            remboursement), `montant` et `choix_impact` (une des valeurs de `CHOIX_IMPACT`).
+
+    Returns:
+        dict: Les gains, la nouvelle durée, la mensualité finale et la liste des remboursements appliqués (`jalons`).
+    """
+    details = calculer_details_pret(montant_emprunte, taux_annuel_nominal_pct, duree_annees, taux_annuel_assurance_pct)
+    taux_mensuel_nominal = taux_annuel_nominal_pct / 1200
+    mensualite_initiale = details['mensualite_hors_assurance']
+    mensualite_assurance = details['mensualite_avec_assurance'] - mensualite_initiale
+    duree_initiale_mois = duree_annees * 12
+
+    # --- État du prêt : capital restant dû, mensualité, nombre de mensualités restantes, mois écoulés ---
+    capital_restant_du = float(montant_emprunte)
+    mensualite = mensualite_initiale
+    duree_restante_mois = duree_initiale_mois
+    mois_ecoule = 0
+    interets_payes = 0.0
+    jalons = []
+
+    for evenement in sorted(evenements, key=lambda e: e['mois']):
+        if evenement['montant'] <= 0 or evenement['mois'] < mois_ecoule:
+            continue
+        if evenement['mois'] >= mois_ecoule + duree_restante_mois:
+            break
+
+        # --- Saut jusqu'à l'événement par formule fermée ---
+        k = evenement['mois'] - mois_ecoule
+        if taux_mensuel_nominal > 0:
+            facteur = (1 + taux_mensuel_nominal)**k
+            capital_apres_k = capital_restant_du * facteur - mensualite * (facteur - 1) / taux_mensuel_nominal
+        else:
+            capital_apres_k = capital_restant_du - mensualite * k
+        interets_payes += mensualite * k - (capital_restant_du - capital_apres_k)
+        capital_restant_du = capital_apres_k
+        duree_restante_mois -= k
+        mois_ecoule = evenement['mois']
+
+        # --- Application du remboursement ---
+        capital_avant = capital_restant_du
+        montant = min(evenement['montant'], capital_restant_du)
+        capital_restant_du -= montant
+
+        if capital_restant_du <= 0:
+            capital_restant_du = 0.0
+            duree_restante_mois = 0
+            mensualite = 0.0
+        elif evenement['choix_impact'] == "Réduire la durée du prêt":
+            if taux_mensuel_nominal > 0:
+                duree_restante_mois = ceil(-log(1 - (capital_restant_du * taux_mensuel_nominal / mensualite)) / log(1 + taux_mensuel_nominal))
+            else:
+                duree_restante_mois = ceil(capital_restant_du / mensualite)
+        else: # "Réduire les mensualités"
+            if taux_mensuel_nominal > 0:
+                facteur = (1 + taux_mensuel_nominal)**duree_restante_mois
+                mensualite = capital_restant_du * taux_mensuel_nominal * facteur / (facteur - 1)
+            else:
+                mensualite = capital_restant_du / duree_restante_mois
+
+        jalons.append({
+            "mois": mois_ecoule,
+            "montant": montant,
+            "choix_impact": evenement['choix_impact'],
+            "capital_restant_du_avant": capital_avant,
+            "capital_restant_du_apres": capital_restant_du,
+            "nouvelle_mensualite": mensualite,
+            "duree_restante_mois": duree_restante_mois,
+        })
+
+        if duree_restante_mois == 0:
+            break
+
+    # --- Fin du prêt : les mensualités restantes soldent le capital ---
+    interets_payes += mensualite * duree_restante_mois - capital_restant_du
+    nouvelle_duree_totale_mois = mois_ecoule + duree_restante_mois
+
+    gain_interets = (mensualite_initiale * duree_initiale_mois - montant_emprunte) - interets_payes
+    duree_reduite_mois = duree_initiale_mois - nouvelle_duree_totale_mois
+    gain_assurance = mensualite_assurance * duree_reduite_mois
+
+    return {
+        "gain_interets": gain_interets,
+        "gain_assurance": gain_assurance,
+        "gain_total": gain_interets + gain_assurance,
+        "nouvelle_duree_totale_mois": nouvelle_duree_totale_mois,
+        "duree_reduite_mois": duree_reduite_mois,
+        "ancienne_mensualite": mensualite_initiale,
+        "nouvelle_mensualite": mensualite,
+        "mensualite_assurance": mensualite_assurance,
+        "jalons": jalons,
+    }
+
+
+def calculer_grille_remboursement_anticipe(df_prets: pd.DataFrame, montants, annees) -> dict:
+    """
+    Évalue en un seul appel vectorisé l'impact d'un remboursement anticipé sur toute une grille :
+    prêts x choix d'impact x années de remboursement x montants remboursés.
+
+    Args:
+        df_prets (pd.DataFrame): Les prêts, tels que retournés par `generer_tableau_comparatif`.
+        montants (array-like): Les montants de remboursement anticipé à évaluer.
+        annees (array-like): Les années de remboursement à évaluer.
+
+    Returns:
+        dict: Les coordonnées de la grille (`durees_annees`, `choix_impact`, `annees`, `montants`) et
+        les cubes de gains `gain_interets`, `gain_assurance` et `gain_total`, de forme
+        (n_prets, 2, n_annees, n_montants). Les cases où l'année de remboursement est supérieure
+        ou égale à la durée du prêt valent NaN.
+    """
+    montants = np.asarray(montants, dtype=float)
+    annees = np.asarray(annees)
+
+    # Axes : (prêt, choix d'impact, année, montant)
+    duree_initiale_mois = (df_prets['duree_annees'].to_numpy() * 12)[:, None, None, None]
+    mensualite_hors_assurance = df_prets['mensualite_hors_assurance'].to_numpy()[:, None, None, None]
+    mensualite_assurance = (df_prets['mensualite_avec_assurance'] - df_prets['mensualite_hors_assurance']).to_numpy()[:, None, None, None]
+    taux_mensuel_nominal = (df_prets['taux_nominal_pct'].to_numpy() / 1200)[:, None, None, None]
+    reduire_duree = np.array([choix == "Réduire la durée du prêt" for choix in CHOIX_IMPACT])[None, :, None, None]
+    mois_remboursement = (annees * 12)[None, None, :, None]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sim_ra = _remboursement_anticipe_tableaux(
+            reduire_duree,
+            mensualite_hors_assurance,
+            duree_initiale_mois,
+            taux_mensuel_nominal,
+            mois_remboursement,
+            montants[None, None, None, :]
+        )
+
+    # On calcule le gain sur l'assurance, comme dans l'onglet de remboursement anticipé
+    gain_assurance = mensualite_assurance * sim_ra['duree_reduite_mois']
+    valide = mois_remboursement < duree_initiale_mois
+
+    return {
+        "durees_annees": df_prets['duree_annees'].to_numpy(),
+        "choix_impact": CHOIX_IMPACT,
+        "annees": annees,
+        "montants": montants,
+        "gain_interets": np.where(valide, sim_ra['gain_interets'], np.nan),
+        "gain_assurance": np.where(valide, gain_assurance, np.nan),
+        "gain_total": np.where(valide, sim_ra['gain_interets'] + gain_assurance, np.nan),
+    }
+
+
+# --- Rachat de crédit (renégociation) ---
+
+def calculer_indemnites_remboursement_anticipe(capital_rembourse, taux_mensuel_nominal, capital_restant_du=None):
+    """
+    Calcule les indemnités légales de remboursement anticipé : le plus faible de six mois d'intérêts
+    sur le capital remboursé et de 3 % du capital restant dû avant le remboursement.
+
+    Args:
+        capital_rembourse (array-like): Le capital remboursé par anticipation.
+        taux_mensuel_nominal (array-like): Le taux mensuel du prêt.
+        capital_restant_du (array-like, optional): Le capital restant dû avant le remboursement
+            (par défaut, le capital remboursé : remboursement total).
+
+    Returns:
+        array-like: Le montant des indemnités.
+    """
+    if capital_restant_du is None:
+        capital_restant_du = capital_rembourse
+    return np.minimum(6 * taux_mensuel_nominal * capital_rembourse, 0.03 * capital_restant_du)
+
+
+def calculer_grille_rachat(
+    df_prets: pd.DataFrame,
+    nouveaux_taux_pct,
+    mois_rachat,
+    nouvelles_durees_annees,
+    frais_dossier: float = 0.0,
+    frais_garantie_pct: float = 0.0
+) -> dict:
+    """
+    Évalue en un seul appel vectorisé le rachat des prêts existants par un nouveau prêt, sur toute une grille :
+    prêts x nouveaux taux x mois du rachat x nouvelles durées.
+
+    Le capital restant dû est refinancé par le nouveau prêt, au même taux d'assurance. Les indemnités de
+    remboursement anticipé et les frais du nouveau prêt (dossier, garantie) sont payés au moment du rachat.
+    Les sommes ne sont pas actualisées, comme pour les gains de remboursement anticipé.
+
+    Args:
+        df_prets (pd.DataFrame): Les prêts existants, tels que retournés par `generer_tableau_comparatif`.
+        nouveaux_taux_pct (array-like): Les taux nominaux du nouveau prêt à évaluer, en pourcentage.
+        mois_rachat (array-like): Les mois du rachat (nombre de mensualités déjà payées).
+        nouvelles_durees_annees (array-like): Les durées du nouveau prêt à évaluer, en années.
+        frais_dossier (float): Les frais de dossier du nouveau prêt.
+        frais_garantie_pct (float): Les frais de garantie du nouveau prêt, en pourcentage du capital refinancé.
+
+    Returns:
+        dict: Les coordonnées de la grille (`durees_annees`, `nouveaux_taux_pct`, `mois_rachat`, `nouvelles_durees_annees`)
+        et des cubes de forme (n_prets, n_taux, n_mois, n_durees) : `capital_restant_du`, `indemnites`, `frais`,
+        `nouvelle_mensualite` (assurance comprise), `economie_mensuelle`, `economie_nette` (gain total, coûts déduits)
+        et `mois_equilibre` (nombre de mois après le rachat pour que les économies couvrent les coûts).
+        Les cases où le rachat intervient après la fin du prêt valent NaN, ainsi que `mois_equilibre`
+        quand les coûts ne sont jamais couverts.
+    """
+    nouveaux_taux_pct = np.asarray(nouveaux_taux_pct, dtype=float)
+    mois_rachat = np.asarray(mois_rachat)
+    nouvelles_durees_annees = np.asarray(nouvelles_durees_annees)
+
+    # Axes : (prêt, nouveau taux, mois du rachat, nouvelle durée)
+    duree_initiale_mois = (df_prets['duree_annees'].to_numpy() * 12)[:, None, None, None]
+    mensualite_hors_assurance = df_prets['mensualite_hors_assurance'].to_numpy()[:, None, None, None]
+    mensualite_assurance = (df_prets['mensualite_avec_assurance'] - df_prets['mensualite_hors_assurance']).to_numpy()[:, None, None, None]
+    taux_mensuel = (df_prets['taux_nominal_pct'].to_numpy() / 1200)[:, None, None, None]
+    mois = mois_rachat[None, None, :, None]
+
+    # --- Capital restant dû du prêt existant au moment du rachat (formule fermée) ---
+    taux_positif = taux_mensuel > 0
+    taux_calcul = np.where(taux_positif, taux_mensuel, 1.0)
+    montant_initial = np.where(taux_positif, mensualite_hors_assurance * (1 - (1 + taux_calcul)**-duree_initiale_mois) / taux_calcul, mensualite_hors_assurance * duree_initiale_mois)
+    facteur = (1 + taux_calcul)**mois
+    capital_restant_du = np.where(
+        taux_positif,
+        montant_initial * facteur - mensualite_hors_assurance * (facteur - 1) / taux_calcul,
+        montant_initial - mensualite_hors_assurance * mois
+    )
+    capital_restant_du = np.maximum(capital_restant_du, 0.0)
+
+    # --- Coûts du rachat ---
+    indemnites = calculer_indemnites_remboursement_anticipe(capital_restant_du, taux_mensuel)
+    frais = frais_dossier + capital_restant_du * frais_garantie_pct / 100
+    couts = indemnites + frais
+
+    # --- Nouveau prêt, même taux d'assurance rapporté au capital ---
+    taux_assurance_pct = np.where(montant_initial > 0, mensualite_assurance * 1200 / montant_initial, 0.0)
+    nouveau = _calculer_details_prets_tableaux(
+        capital_restant_du,
+        nouveaux_taux_pct[None, :, None, None],
+        nouvelles_durees_annees[None, None, None, :],
+        taux_assurance_pct
+    )
+    nouvelle_mensualite = nouveau["mensualite_avec_assurance"]
+    ancienne_mensualite = mensualite_hors_assurance + mensualite_assurance
+
+    # --- Économies cumulées : linéaires par morceaux en fonction du mois après le rachat ---
+    mois_restants = duree_initiale_mois - mois
+    nouvelle_duree_mois = nouvelles_durees_annees[None, None, None, :] * 12
+    periode_commune = np.minimum(mois_restants, nouvelle_duree_mois)
+    economie_mensuelle = ancienne_mensualite - nouvelle_mensualite
+    economie_nette = ancienne_mensualite * mois_restants - nouvelle_mensualite * nouvelle_duree_mois - couts
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # 1. Pendant que les deux prêts courent, les économies mensuelles remboursent les coûts
+        equilibre_commun = np.ceil(couts / economie_mensuelle)
+        # 2. Si le nouveau prêt se termine avant l'ancien, les mensualités de l'ancien sont entièrement économisées
+        reste_a_couvrir = couts - economie_mensuelle * periode_commune
+        equilibre_apres = periode_commune + np.ceil(reste_a_couvrir / ancienne_mensualite)
+    mois_equilibre = np.where(
+        (economie_mensuelle > 0) & (equilibre_commun <= periode_commune),
+        np.maximum(equilibre_commun, 0),
+        np.where((nouvelle_duree_mois < mois_restants) & (equilibre_apres <= mois_restants), equilibre_apres, np.nan)
+    )
+
+    valide = mois < duree_initiale_mois
+    forme = np.broadcast_shapes(valide.shape, nouvelle_mensualite.shape)
+
+    def grille(valeurs):
+        return np.where(valide, np.broadcast_to(valeurs, forme), np.nan)
+
+    return {
+        "durees_annees": df_prets['duree_annees'].to_numpy(),
+        "nouveaux_taux_pct": nouveaux_taux_pct,
+        "mois_rachat": mois_rachat,
+        "nouvelles_durees_annees": nouvelles_durees_annees,
+        "capital_restant_du": grille(capital_restant_du),
+        "indemnites": grille(indemnites),
+        "frais": grille(frais),
+        "nouvelle_mensualite": grille(nouvelle_mensualite),
+        "economie_mensuelle": grille(economie_mensuelle),
+        "economie_nette": grille(economie_nette),
+        "mois_equilibre": grille(mois_equilibre),
+    }
@@ -0,0 +1,30 @@
+import streamlit as st
+
+from cache import calculer_cle
+from mesures import chronometre
+
+
+def executer_etape(nom: str, fonction, **entrees):
+    """
+    Exécute une étape de l'application seulement si ses entrées ont changé depuis le dernier rerun.
+
+    Chaque étape déclare ses entrées par des arguments nommés. Leur empreinte et le dernier résultat
+    sont conservés dans la session : si un widget sans rapport avec l'étape a changé, le résultat
+    précédent est réutilisé sans recalcul.
+
+    Args:
+        nom (str): Le nom de l'étape, unique dans l'application.
+        fonction (callable): Le calcul de l'étape, appelé avec les entrées en arguments nommés.
+        **entrees: Les entrées de l'étape.
+    """
+    etapes = st.session_state.setdefault("_etapes", {})
+    with chronometre(f"etape.{nom}"):
+        cle = calculer_cle(**entrees)
+
+        precedent = etapes.get(nom)
+        if precedent is not None and precedent[0] == cle:
+            return precedent[1]
+
+        resultat = fonction(**entrees)
+        etapes[nom] = (cle, resultat)
+        return resultat
@@ -0,0 +1,588 @@
+import csv
+import io
+import zipfile
+from contextlib import contextmanager
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+import calculs
+
+# --- Export des simulations (Excel, CSV, PDF) ---
+# Une simulation (`preparer_simulation`) regroupe les informations du dossier, le tableau comparatif,
+# les résultats du remboursement anticipé et de quoi recalculer les tableaux d'amortissement.
+# Les trois formats sont écrits en flux : le classeur Excel en mode « constant_memory » de xlsxwriter
+# (chaque ligne est écrite sur disque dès que la suivante commence), les CSV ligne par ligne dans une
+# archive zip et le PDF page par page. Pour les CSV et le PDF, les échéanciers sont calculés une durée à
+# la fois, au moment de leur écriture. Le classeur les place côte à côte (chaque ligne couvre toutes les
+# durées) : ceux d'une simulation sont donc calculés ensemble avant l'écriture de la feuille, soit quelques
+# centaines de lignes par durée. La mémoire est ainsi bornée par dossier, et exporter des milliers de
+# dossiers (voir `batch.py --exports`) ne l'accumule pas.
+# xlsxwriter n'est importé qu'à l'export d'un classeur.
+
+FORMATS = {
+    "xlsx": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": (".zip", "application/zip"),
+    "pdf": (".pdf", "application/pdf"),
+}
+
+# Colonnes exportées : (colonne, libellé du classeur d'origine, format)
+COLONNES_COMPARATIF = [
+    ("duree_annees", "Durée (années)", "entier"),
+    ("taux_nominal_pct", "Taux d'intérêt annuel", "pct"),
+    ("taeg_pct", "TAEG", "pct"),
+    ("mensualite_avec_assurance", "Mensualité (avec assurance)", "euros_centimes"),
+    ("cout_total_credit", "Coût total du crédit (avec assurance)", "euros_centimes"),
+    ("salaire_mensuel_minimum", "Salaire mensuel net minimum requis", "euros_centimes"),
+    ("verdict", "Analyse salaire actuel", "texte"),
+    ("taux_endettement_pct", "Taux d'endettement", "pct_1"),
+]
+COLONNES_REMBOURSEMENT = [
+    ("duree_annees", "Durée du prêt (années)", "entier"),
+    ("gain_interets", "Intérêts économisés", "euros"),
+    ("gain_assurance", "Assurance économisée", "euros"),
+    ("gain_total", "Gain total", "euros"),
+    ("nouvelle_duree_totale_ans", "Nouvelle durée (années)", "decimal"),
+    ("duree_reduite_mois", "Gain de temps (mois)", "entier"),
+    ("nouvelle_mensualite_avec_assurance", "Nouvelle mensualité (avec assurance)", "euros_centimes"),
+    ("reduction_mensualite", "Baisse de la mensualité", "euros_centimes"),
+]
+COLONNES_ECHEANCIER = [
+    ("mois", "Mois", "entier"),
+    ("mensualite_avec_assurance", "Mensualité", "euros_centimes"),
+    ("mensualite_hors_assurance", "Mensualité du crédit (hors assurance)", "euros_centimes"),
+    ("interets", "Part d'intérêts", "euros_centimes"),
+    ("capital_rembourse", "Part de capital", "euros_centimes"),
+    ("assurance", "Assurance", "euros_centimes"),
+    ("capital_restant_du", "Capital restant dû", "euros_centimes"),
+    ("part_remboursee", "Part remboursée", "pct_1"),
+]
+
+# Formats de nombre du classeur d'origine
+FORMATS_EXCEL = {
+    "euros": "#,##0\\ [$€-1]",
+    "euros_centimes": "#,##0.00\\ [$€-1]",
+    "pct": "0.00%",
+    "pct_1": "0.0%",
+    "entier": "0",
+    "decimal": "0.0",
+    "texte": None,
+}
+
+
+# --- Préparation d'une simulation ---
+
+def informations_dossier(
+    prix_bien: float,
+    frais_notaire_pct: float,
+    apport: float,
+    montant_a_emprunter: float,
+    epargne_totale: float,
+    salaire_total: float,
+    taux_assurance_pct: float,
+    taux_endettement_max_pct: float = calculs.TAUX_ENDETTEMENT_MAX_PCT,
+    epargne_mensuelle_totale: float = None
+) -> list:
+    """Retourne le bloc « Objectif et informations » du classeur : une liste de (libellé, valeur, format)."""
+    informations = [
+        ("Montant du bien immobilier", prix_bien, "euros"),
+        ("Estimation frais de notaire", frais_notaire_pct / 100, "pct"),
+        ("Coût total du projet", prix_bien * (1 + frais_notaire_pct / 100), "euros"),
+        ("Taux annuel effectif d'assurance", taux_assurance_pct / 100, "pct"),
+        ("Apport personnel", apport, "euros"),
+        ("Montant réel à emprunter", montant_a_emprunter, "euros"),
+        ("Épargne totale", epargne_totale, "euros"),
+        ("Épargne mensuelle totale", epargne_mensuelle_totale, "euros"),
+        ("Salaire mensuel net total", salaire_total, "euros"),
+        ("Taux d'endettement maximal", taux_endettement_max_pct / 100, "pct_1"),
+    ]
+    return [information for information in informations if information[1] is not None]
+
+
+def _remboursements(df_prets: pd.DataFrame, montant_remboursement_anticipe: float, annee_remboursement: int, choix_impact: str) -> pd.DataFrame:
+    """Simule le remboursement anticipé sur chaque durée du comparatif (mêmes calculs que l'onglet Remboursement anticipé)."""
+    prets = df_prets[df_prets["duree_annees"] > annee_remboursement]
+    mensualite_hors_assurance = prets["mensualite_hors_assurance"].to_numpy(dtype=float)
+    mensualite_assurance = prets["mensualite_avec_assurance"].to_numpy(dtype=float) - mensualite_hors_assurance
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sim_ra = calculs._remboursement_anticipe_tableaux(
+            choix_impact == calculs.CHOIX_IMPACT[0],
+            mensualite_hors_assurance,
+            prets["duree_annees"].to_numpy() * 12,
+            prets["taux_nominal_pct"].to_numpy(dtype=float) / 1200,
+            annee_remboursement * 12,
+            montant_remboursement_anticipe
+        )
+    gain_assurance = mensualite_assurance * sim_ra["duree_reduite_mois"]
+    return pd.DataFrame({
+        "duree_annees": prets["duree_annees"].to_numpy(),
+        "gain_interets": sim_ra["gain_interets"],
+        "gain_assurance": gain_assurance,
+        "gain_total": sim_ra["gain_interets"] + gain_assurance,
+        "nouvelle_duree_totale_ans": sim_ra["nouvelle_duree_totale_ans"],
+        "duree_reduite_mois": sim_ra["duree_reduite_mois"],
+        "nouvelle_mensualite_avec_assurance": sim_ra["nouvelle_mensualite"] + mensualite_assurance,
+        "reduction_mensualite": sim_ra["reduction_mensualite"],
+    })
+
+
+def preparer_simulation(
+    informations: list,
+    df_prets: pd.DataFrame,
+    montant_a_emprunter: float,
+    taux_assurance_pct: float,
+    tranches: list = None,
+    remboursement: dict = None,
+    df_prets_remboursement: pd.DataFrame = None,
+    titre: str = "Simulation de prêt immobilier"
+) -> dict:
+    """
+    Rassemble le contenu d'un export.
+
+    Args:
+        informations (list): Le bloc d'informations du dossier (voir `informations_dossier`).
+        df_prets (pd.DataFrame): Le tableau comparatif (`generer_tableau_comparatif` ou une ligne par durée
+            au format de `batch.traiter_lot`).
+        montant_a_emprunter (float): Le montant total emprunté, pour recalculer les échéanciers.
+        taux_assurance_pct (float): Le taux d'assurance annuel, en pourcentage.
+        tranches (list, optional): Les prêts complémentaires (les échéanciers sont alors lissés).
+        remboursement (dict, optional): `montant_remboursement_anticipe`, `annee_remboursement` et
+            `choix_impact` d'un remboursement anticipé à simuler.
+        df_prets_remboursement (pd.DataFrame, optional): Les prêts sur lesquels porte le remboursement
+            anticipé (par défaut `df_prets` ; le prêt principal seul s'il y a des prêts complémentaires).
+        titre (str): Le titre du document.
+
+    Returns:
+        dict: La simulation, à passer à `exporter`.
+    """
+    comparatif = df_prets.rename(columns={"Verdict": "verdict"})
+    remboursements = None
+    if remboursement and remboursement.get("montant_remboursement_anticipe", 0) > 0:
+        remboursements = _remboursements(
+            df_prets if df_prets_remboursement is None else df_prets_remboursement,
+            remboursement["montant_remboursement_anticipe"],
+            remboursement["annee_remboursement"],
+            remboursement.get("choix_impact", calculs.CHOIX_IMPACT[0])
+        )
+    return {
+        "titre": titre,
+        "informations": informations,
+        "comparatif": comparatif[[colonne for colonne, _, _ in COLONNES_COMPARATIF if colonne in comparatif.columns]],
+        "remboursement": remboursement if remboursements is not None else None,
+        "remboursements": remboursements,
+        "montant_a_emprunter": montant_a_emprunter,
+        "taux_assurance_pct": taux_assurance_pct,
+        "tranches": tranches or [],
+    }
+
+
+def iterer_echeanciers(simulation: dict):
+    """
+    Calcule les tableaux d'amortissement de la simulation, une durée à la fois.
+
+    Yields:
+        tuple: (durée en années, DataFrame aux colonnes de `COLONNES_ECHEANCIER`).
+    """
+    for pret in simulation["comparatif"].itertuples(index=False):
+        if simulation["tranches"]:
+            df = calculs.generer_echeancier_lisse(
+                simulation["montant_a_emprunter"], pret.taux_nominal_pct, pret.duree_annees, simulation["taux_assurance_pct"], simulation["tranches"]
+            )
+            df["mensualite_hors_assurance"] = df["mensualite_avec_assurance"] - df["assurance"]
+            df["capital_rembourse"] = df["mensualite_hors_assurance"] - df["interets"]
+        else:
+            df = calculs.generer_tableau_amortissement(
+                simulation["montant_a_emprunter"], pret.taux_nominal_pct, pret.duree_annees, simulation["taux_assurance_pct"]
+            )
+        df["part_remboursee"] = (1 - df["capital_restant_du"] / simulation["montant_a_emprunter"]) * 100
+        yield int(pret.duree_annees), df[[colonne for colonne, _, _ in COLONNES_ECHEANCIER]]
+
+
+def _valeur(valeur, format_colonne: str):
+    """Valeur telle qu'écrite dans le classeur : les pourcentages du simulateur deviennent des fractions."""
+    if format_colonne in ("pct", "pct_1") and not isinstance(valeur, str):
+        return valeur / 100
+    return valeur
+
+
+# --- Excel ---
+
+def exporter_xlsx(simulation: dict, destination):
+    """
+    Écrit la simulation dans un classeur disposé comme `source_excel/Simulation_prêt.xlsx`.
+
+    La feuille « Réel » contient les informations du dossier, la grille des taux et le scénario de
+    remboursement anticipé ; la feuille « Tableau damortissement » les échéanciers côte à côte, un bloc
+    par durée. Les lignes sont écrites dans l'ordre (mode constant_memory de xlsxwriter) ; comme chaque ligne
+    de la seconde feuille couvre toutes les durées, les échéanciers de la simulation sont calculés avant elle.
+
+    Args:
+        simulation (dict): La simulation (`preparer_simulation`).
+        destination: Un chemin ou un fichier binaire ouvert en écriture (ex. io.BytesIO).
+    """
+    import xlsxwriter
+
+    classeur = xlsxwriter.Workbook(destination, {"constant_memory": True, "nan_inf_to_errors": True})
+    try:
+        formats = {nom: classeur.add_format({"num_format": motif}) if motif else None for nom, motif in FORMATS_EXCEL.items()}
+        titre = classeur.add_format({"bold": True, "font_size": 12, "align": "center", "bg_color": "#DDEBF7", "border": 1})
+        entete = classeur.add_format({"bold": True, "text_wrap": True, "align": "center", "valign": "vcenter", "bg_color": "#F2F2F2", "border": 1})
+
+        # --- Feuille « Réel » : petite, préparée ligne par ligne puis écrite dans l'ordre ---
+        reel = classeur.add_worksheet("Réel")
+        reel.set_column(1, 1, 34)
+        reel.set_column(2, 4, 14)
+        reel.set_column(5, 12, 16)
+        lignes = {}
+
+        def cellule(ligne, colonne, valeur, format_cellule=None):
+            lignes.setdefault(ligne, []).append((colonne, valeur, format_cellule))
+
+        fusions = [(1, 5, 1, 4 + len(COLONNES_COMPARATIF), "Grille taux d'intérêts"), (2, 1, 2, 2, "Objectif et informations")]
+        for numero, (colonne, libelle, _) in enumerate(COLONNES_COMPARATIF):
+            cellule(2, 5 + numero, libelle, entete)
+        for numero, (libelle, valeur, format_valeur) in enumerate(simulation["informations"]):
+            cellule(3 + numero, 1, libelle)
+            cellule(3 + numero, 2, valeur, formats[format_valeur])
+        for numero, pret in enumerate(simulation["comparatif"].to_dict("records")):
+            for decalage, (colonne, _, format_colonne) in enumerate(COLONNES_COMPARATIF):
+                if colonne in pret:
+                    cellule(3 + numero, 5 + decalage, _valeur(pret[colonne], format_colonne), formats[format_colonne])
+
+        if simulation["remboursements"] is not None:
+            remboursement = simulation["remboursement"]
+            debut = 3 + max(len(simulation["informations"]), len(simulation["comparatif"])) + 3
+            remboursements = simulation["remboursements"]
+            fusions.append((debut, 1, debut, 1 + max(len(remboursements), 1), "Scénario de remboursement anticipé"))
+            cellule(debut + 1, 1, "Montant du remboursement")
+            cellule(debut + 1, 2, remboursement["montant_remboursement_anticipe"], formats["euros"])
+            cellule(debut + 2, 1, "Au bout de combien de mois ?")
+            cellule(debut + 2, 2, remboursement["annee_remboursement"] * 12, formats["entier"])
+            cellule(debut + 3, 1, "Objectif")
+            cellule(debut + 3, 2, remboursement.get("choix_impact", calculs.CHOIX_IMPACT[0]))
+            for numero, (colonne, libelle, format_colonne) in enumerate(COLONNES_REMBOURSEMENT):
+                cellule(debut + 4 + numero, 1, libelle, entete if numero == 0 else None)
+                for decalage, valeur in enumerate(remboursements[colonne]):
+                    if numero == 0:
+                        cellule(debut + 4, 2 + decalage, f"{valeur} ans", entete)
+                    else:
+                        cellule(debut + 4 + numero, 2 + decalage, valeur, formats[format_colonne])
+
+        for premiere_ligne, premiere_colonne, derniere_ligne, derniere_colonne, texte in fusions:
+            cellule(premiere_ligne, premiere_colonne, (texte, derniere_ligne, derniere_colonne), titre)
+        reel.set_row(2, 45)
+        for ligne in sorted(lignes):
+            for colonne, valeur, format_cellule in sorted(lignes[ligne], key=lambda element: element[0]):
+                if isinstance(valeur, tuple):
+                    texte, derniere_ligne, derniere_colonne = valeur
+                    reel.merge_range(ligne, colonne, derniere_ligne, derniere_colonne, texte, format_cellule)
+                else:
+                    reel.write(ligne, colonne, valeur, format_cellule)
+
+        # --- Feuille « Tableau damortissement » : un bloc de colonnes par durée, espacés de deux colonnes ---
+        amortissement = classeur.add_worksheet("Tableau damortissement")
+        largeur_bloc = len(COLONNES_ECHEANCIER) + 2
+        # Tous les échéanciers du dossier à la fois : la disposition côte à côte l'impose
+        echeanciers = [
+            (duree, [_valeur(df[colonne].to_numpy(), format_colonne) for colonne, _, format_colonne in COLONNES_ECHEANCIER])
+            for duree, df in iterer_echeanciers(simulation)
+        ]
+        amortissement.freeze_panes(2, 1)
+        for numero, (duree, _) in enumerate(echeanciers):
+            debut = numero * largeur_bloc
+            amortissement.set_column(debut, debut, 7)
+            amortissement.set_column(debut + 1, debut + len(COLONNES_ECHEANCIER) - 1, 14)
+            amortissement.merge_range(0, debut, 0, debut + len(COLONNES_ECHEANCIER) - 1, f"Prêt sur {duree} ans", titre)
+        amortissement.set_row(1, 45)
+        for numero in range(len(echeanciers)):
+            for decalage, (_, libelle, _) in enumerate(COLONNES_ECHEANCIER):
+                amortissement.write(1, numero * largeur_bloc + decalage, libelle, entete)
+        nombre_mois = max((len(colonnes[0]) for _, colonnes in echeanciers), default=0)
+        formats_echeancier = [formats[format_colonne] for _, _, format_colonne in COLONNES_ECHEANCIER]
+        for mois in range(nombre_mois):
+            for numero, (_, colonnes) in enumerate(echeanciers):
+                if mois < len(colonnes[0]):
+                    for decalage, (valeurs, format_cellule) in enumerate(zip(colonnes, formats_echeancier)):
+                        amortissement.write_number(2 + mois, numero * largeur_bloc + decalage, valeurs[mois].item(), format_cellule)
+    finally:
+        classeur.close()
+
+
+# --- CSV ---
+
+def _nombre_csv(valeur) -> str:
+    # Séparateur décimal français, pour une ouverture directe dans Excel
+    if isinstance(valeur, str):
+        return valeur
+    if isinstance(valeur, (int, np.integer)):
+        return str(valeur)
+    return f"{valeur:.2f}".replace(".", ",")
+
+
+@contextmanager
+def _fichier_csv(archive: zipfile.ZipFile, nom: str):
+    with archive.open(nom, "w") as brut:
+        texte = io.TextIOWrapper(brut, encoding="utf-8-sig", newline="")
+        yield csv.writer(texte, delimiter=";")
+        texte.flush()
+        texte.detach()
+
+
+def exporter_csv(simulation: dict, destination):
+    """
+    Écrit la simulation dans une archive zip de fichiers CSV (séparateur « ; », virgule décimale) :
+    informations.csv, comparatif.csv, remboursement_anticipe.csv (si simulé) et amortissement.csv
+    (une ligne par durée et par mois, échéancier par échéancier).
+
+    Args:
+        simulation (dict): La simulation (`preparer_simulation`).
+        destination: Un chemin ou un fichier binaire ouvert en écriture.
+    """
+    with zipfile.ZipFile(destination, "w", zipfile.ZIP_DEFLATED) as archive:
+        with _fichier_csv(archive, "informations.csv") as ecrivain:
+            ecrivain.writerow(["Information", "Valeur"])
+            for libelle, valeur, format_valeur in simulation["informations"]:
+                ecrivain.writerow([libelle, _nombre_csv(valeur * 100 if format_valeur.startswith("pct") else valeur)])
+
+        tables = [("comparatif.csv", simulation["comparatif"], COLONNES_COMPARATIF)]
+        if simulation["remboursements"] is not None:
+            tables.append(("remboursement_anticipe.csv", simulation["remboursements"], COLONNES_REMBOURSEMENT))
+        for nom, df, colonnes in tables:
+            colonnes = [(colonne, libelle, format_colonne) for colonne, libelle, format_colonne in colonnes if colonne in df.columns]
+            with _fichier_csv(archive, nom) as ecrivain:
+                ecrivain.writerow([f"{libelle} (%)" if format_colonne.startswith("pct") else libelle for _, libelle, format_colonne in colonnes])
+                for ligne in df.itertuples(index=False):
+                    ecrivain.writerow([_nombre_csv(getattr(ligne, colonne)) for colonne, _, _ in colonnes])
+
+        with _fichier_csv(archive, "amortissement.csv") as ecrivain:
+            ecrivain.writerow(["Durée (années)", *(f"{libelle} (%)" if format_colonne.startswith("pct") else libelle for _, libelle, format_colonne in COLONNES_ECHEANCIER)])
+            for duree, df in iterer_echeanciers(simulation):
+                ecrivain.writerows([duree, *map(_nombre_csv, ligne)] for ligne in df.itertuples(index=False))
+
+
+# --- PDF ---
+
+class _DocumentPDF:
+    """
+    Écrivain PDF minimal (polices standard, texte seul) qui écrit chaque page dès qu'elle est terminée.
+
+    Seuls les numéros et positions des objets déjà écrits sont gardés en mémoire, pour la table
+    de références finale.
+    """
+
+    LARGEUR, HAUTEUR, MARGE = 595.28, 841.89, 40.0
+    POLICES = {"F1": "Helvetica", "F2": "Helvetica-Bold", "F3": "Courier"}
+
+    def __init__(self, fichier):
+        self.fichier = fichier
+        self._taille = 0
+        self._positions = {}
+        self._pages = []
+        # Objets réservés : 1 catalogue, 2 arbre des pages, puis une police par entrée de POLICES
+        self._prochain_objet = 3 + len(self.POLICES)
+        self._contenu = []
+        self.y = None
+        self._ecrire(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _ecrire(self, octets: bytes):
+        self.fichier.write(octets)
+        self._taille += len(octets)
+
+    def _objet(self, numero: int, corps: bytes):
+        self._positions[numero] = self._taille
+        self._ecrire(b"%d 0 obj\n" % numero + corps + b"\nendobj\n")
+
+    @staticmethod
+    def _chaine(texte: str) -> bytes:
+        # Les polices standard sont en WinAnsi : les caractères absents (emojis) sont ignorés
+        octets = texte.replace("\u202f", "\xa0").encode("cp1252", "ignore")
+        return b"(" + octets.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+    def texte(self, texte: str, taille: float = 9, police: str = "F1", interligne: float = None):
+        """Écrit une ligne de texte au curseur, en changeant de page si nécessaire."""
+        interligne = interligne or taille * 1.35
+        if self.y is None or self.y - interligne < self.MARGE:
+            self.nouvelle_page()
+        self.y -= interligne
+        self._contenu.append(b"BT /%s %.1f Tf %.2f %.2f Td %s Tj ET" % (police.encode(), taille, self.MARGE, self.y, self._chaine(texte)))
+
+    def espace(self, hauteur: float):
+        if self.y is not None:
+            self.y -= hauteur
+
+    def filet(self):
+        """Trace un trait horizontal sous la dernière ligne."""
+        if self.y is not None:
+            self._contenu.append(b"0.6 w %.2f %.2f m %.2f %.2f l S" % (self.MARGE, self.y - 3, self.LARGEUR - self.MARGE, self.y - 3))
+            self.y -= 4
+
+    def reste(self) -> float:
+        """Hauteur encore disponible sur la page courante."""
+        return 0.0 if self.y is None else self.y - self.MARGE
+
+    def nouvelle_page(self):
+        self._terminer_page()
+        self.y = self.HAUTEUR - self.MARGE
+
+    def _terminer_page(self):
+        if self.y is None:
+            return
+        flux = b"\n".join(self._contenu)
+        numero_page, numero_flux = self._prochain_objet, self._prochain_objet + 1
+        self._prochain_objet += 2
+        self._objet(numero_flux, b"<< /Length %d >>\nstream\n" % len(flux) + flux + b"\nendstream")
+        polices = b" ".join(b"/%s %d 0 R" % (nom.encode(), 3 + indice) for indice, nom in enumerate(self.POLICES))
+        self._objet(numero_page, (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.2f %.2f] /Resources << /Font << %s >> >> /Contents %d 0 R >>"
+            % (self.LARGEUR, self.HAUTEUR, polices, numero_flux)
+        ))
+        self._pages.append(numero_page)
+        self._contenu = []
+        self.y = None
+
+    def terminer(self):
+        """Écrit la dernière page, les polices, l'arbre des pages, le catalogue et la table de références."""
+        if self.y is None and not self._pages:
+            self.nouvelle_page()
+        self._terminer_page()
+        for indice, police in enumerate(self.POLICES.values()):
+            self._objet(3 + indice, b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>" % police.encode())
+        enfants = b" ".join(b"%d 0 R" % numero for numero in self._pages)
+        self._objet(2, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (enfants, len(self._pages)))
+        self._objet(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+        debut_references = self._taille
+        nombre_objets = self._prochain_objet
+        references = [b"xref\n0 %d\n0000000000 65535 f \n" % nombre_objets]
+        references += [b"%010d 00000 n \n" % self._positions[numero] for numero in range(1, nombre_objets)]
+        self._ecrire(b"".join(references))
+        self._ecrire(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (nombre_objets, debut_references))
+
+
+def _texte_pdf(valeur, format_colonne: str) -> str:
+    """Met en forme une valeur pour le PDF (les pourcentages sont en points : 3.5 -> « 3,50 % »)."""
+    if isinstance(valeur, str):
+        return valeur
+    if format_colonne == "euros":
+        return calculs.formater_nombre(valeur)
+    if format_colonne == "euros_centimes":
+        return f"{valeur:,.2f} €".replace(",", " ").replace(".", ",")
+    if format_colonne.startswith("pct"):
+        return f"{valeur:.{1 if format_colonne == 'pct_1' else 2}f} %".replace(".", ",")
+    if format_colonne == "decimal":
+        return f"{valeur:.1f}".replace(".", ",")
+    return f"{valeur:.0f}"
+
+
+def _tableau_pdf(document: _DocumentPDF, colonnes: list, lignes, largeurs: list, taille: float = 7.5):
+    """Écrit un tableau en police à chasse fixe ; l'en-tête est répété en haut de chaque page."""
+    entete = " ".join(libelle[:largeur].rjust(largeur) for (_, libelle, _), largeur in zip(colonnes, largeurs))
+    interligne = taille * 1.3
+
+    def ecrire_entete():
+        document.texte(entete, taille, "F3", interligne)
+        document.filet()
+
+    if document.reste() < 4 * interligne:
+        document.nouvelle_page()
+    ecrire_entete()
+    for ligne in lignes:
+        if document.reste() < interligne:
+            document.nouvelle_page()
+            ecrire_entete()
+        cellules = [_texte_pdf(valeur, format_colonne) for valeur, (_, _, format_colonne) in zip(ligne, colonnes)]
+        document.texte(" ".join(cellule[:largeur].rjust(largeur) for cellule, largeur in zip(cellules, largeurs)), taille, "F3", interligne)
+
+
+def exporter_pdf(simulation: dict, destination):
+    """
+    Écrit la simulation dans un document PDF : informations du dossier, comparatif des prêts,
+    remboursement anticipé puis un tableau d'amortissement par durée.
+
+    Args:
+        simulation (dict): La simulation (`preparer_simulation`).
+        destination: Un chemin ou un fichier binaire ouvert en écriture.
+    """
+    with _ouvrir(destination) as fichier:
+        document = _DocumentPDF(fichier)
+        document.texte(simulation["titre"], 16, "F2", 24)
+        document.texte(f"Édité le {date.today().strftime('%d/%m/%Y')}", 8)
+        document.espace(8)
+
+        document.texte("Objectif et informations", 11, "F2", 18)
+        for libelle, valeur, format_valeur in simulation["informations"]:
+            document.texte(f"{libelle} : {_texte_pdf(valeur * 100 if format_valeur.startswith('pct') else valeur, format_valeur)}", 9)
+        document.espace(8)
+
+        document.texte("Grille taux d'intérêts", 11, "F2", 18)
+        comparatif = simulation["comparatif"]
+        colonnes = [colonne for colonne in COLONNES_COMPARATIF if colonne[0] in comparatif.columns]
+        _tableau_pdf(
+            document,
+            [(colonne, {"duree_annees": "Durée", "taux_nominal_pct": "Taux", "mensualite_avec_assurance": "Mensualité",
+                        "cout_total_credit": "Coût total", "salaire_mensuel_minimum": "Salaire min.",
+                        "verdict": "Analyse", "taux_endettement_pct": "Endett."}.get(colonne, libelle), format_colonne)
+             for colonne, libelle, format_colonne in colonnes],
+            comparatif[[colonne for colonne, _, _ in colonnes]].itertuples(index=False),
+            [{"verdict": 30, "duree_annees": 5}.get(colonne, 12) for colonne, _, _ in colonnes]
+        )
+        document.espace(8)
+
+        if simulation["remboursements"] is not None:
+            remboursement = simulation["remboursement"]
+            document.texte("Scénario de remboursement anticipé", 11, "F2", 18)
+            document.texte(
+                f"{calculs.formater_nombre(remboursement['montant_remboursement_anticipe'])} remboursés au bout de "
+                f"{remboursement['annee_remboursement']} an(s) - {remboursement.get('choix_impact', calculs.CHOIX_IMPACT[0])}", 9
+            )
+            _tableau_pdf(
+                document,
+                [(colonne, {"duree_annees": "Durée", "gain_interets": "Intérêts", "gain_assurance": "Assurance",
+                            "gain_total": "Gain total", "nouvelle_duree_totale_ans": "Nv. durée", "duree_reduite_mois": "Mois gagnés",
+                            "nouvelle_mensualite_avec_assurance": "Nv. mensualité", "reduction_mensualite": "Baisse"}[colonne], format_colonne)
+                 for colonne, _, format_colonne in COLONNES_REMBOURSEMENT],
+                simulation["remboursements"][[colonne for colonne, _, _ in COLONNES_REMBOURSEMENT]].itertuples(index=False),
+                [5, 12, 12, 12, 9, 11, 14, 12]
+            )
+
+        libelles_echeancier = ["Mois", "Mensualité", "Hors assur.", "Intérêts", "Capital", "Assurance", "Restant dû", "Remboursé"]
+        for duree, df in iterer_echeanciers(simulation):
+            document.nouvelle_page()
+            document.texte(f"Tableau d'amortissement - prêt sur {duree} ans", 11, "F2", 18)
+            _tableau_pdf(
+                document,
+                [(colonne, libelle, format_colonne) for (colonne, _, format_colonne), libelle in zip(COLONNES_ECHEANCIER, libelles_echeancier)],
+                df.itertuples(index=False),
+                [5, 13, 13, 12, 12, 11, 14, 10]
+            )
+        document.terminer()
+
+
+@contextmanager
+def _ouvrir(destination):
+    """Ouvre un chemin en écriture binaire, ou utilise tel quel un fichier déjà ouvert."""
+    if hasattr(destination, "write"):
+        yield destination
+    else:
+        with open(destination, "wb") as fichier:
+            yield fichier
+
+
+# --- Point d'entrée commun ---
+
+EXPORTEURS = {"xlsx": exporter_xlsx, "csv": exporter_csv, "pdf": exporter_pdf}
+
+
+def exporter(simulation: dict, format_export: str, destination):
+    """Exporte la simulation au format donné (`xlsx`, `csv` ou `pdf`) vers un chemin ou un fichier binaire."""
+    if format_export not in EXPORTEURS:
+        raise ValueError(f"Format d'export inconnu : {format_export} (formats possibles : {', '.join(EXPORTEURS)})")
+    EXPORTEURS[format_export](simulation, destination)
+
+
+def exporter_octets(simulation: dict, format_export: str) -> bytes:
+    """Exporte la simulation en mémoire, pour un bouton de téléchargement."""
+    tampon = io.BytesIO()
+    exporter(simulation, format_export, tampon)
+    return tampon.getvalue()
@@ -0,0 +1,172 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+from cache import CACHES
+
+# --- Mesure des temps d'exécution ---
+# Les étapes de l'application, les calculs mis en cache, les graphiques et les sections sont chronométrés :
+# nombre d'appels, durée cumulée et durée maximale, pour l'ensemble du processus, pour la session et
+# pour le rerun en cours. Les mesures s'activent avec la variable d'environnement SIMULATEUR_MESURES=1 ;
+# désactivées, `mesurer` retourne la fonction telle quelle et `chronometre` un contexte vide partagé,
+# si bien qu'elles ne coûtent rien. Si SIMULATEUR_MESURES_FICHIER est défini, les mesures y sont écrites
+# au format texte de Prometheus à la fin de chaque rerun (collecteur « textfile » de node_exporter).
+
+MESURES_ACTIVEES = os.environ.get("SIMULATEUR_MESURES", "").lower() not in ("", "0", "false", "non")
+FICHIER_PROMETHEUS = os.environ.get("SIMULATEUR_MESURES_FICHIER")
+
+
+class Compteurs:
+    """Nombre d'appels, durée cumulée et durée maximale par nom de mesure ; utilisable depuis plusieurs threads."""
+
+    def __init__(self):
+        self._valeurs = {}  # nom -> (appels, durée cumulée en s, durée maximale en s)
+        self._verrou = threading.Lock()
+
+    def enregistrer(self, nom: str, duree_s: float):
+        with self._verrou:
+            appels, total, maximum = self._valeurs.get(nom, (0, 0.0, 0.0))
+            self._valeurs[nom] = (appels + 1, total + duree_s, max(maximum, duree_s))
+
+    def vider(self):
+        with self._verrou:
+            self._valeurs.clear()
+
+    def instantane(self) -> dict:
+        """Retourne une copie des mesures : nom -> {appels, duree_s, duree_max_s}."""
+        with self._verrou:
+            return {
+                nom: {"appels": appels, "duree_s": total, "duree_max_s": maximum}
+                for nom, (appels, total, maximum) in self._valeurs.items()
+            }
+
+
+# Mesures de tout le processus (toutes sessions confondues)
+COMPTEURS_GLOBAUX = Compteurs()
+
+# Compteurs supplémentaires du contexte courant (rerun et session) ; chaque session Streamlit
+# s'exécute dans son propre thread, donc avec son propre contexte.
+_compteurs_contexte = contextvars.ContextVar("compteurs_contexte", default=())
+
+
+def enregistrer(nom: str, duree_s: float):
+    """Ajoute une durée mesurée aux compteurs du processus et à ceux du contexte courant."""
+    COMPTEURS_GLOBAUX.enregistrer(nom, duree_s)
+    for compteurs in _compteurs_contexte.get():
+        compteurs.enregistrer(nom, duree_s)
+
+
+class _Chronometre:
+    __slots__ = ("nom", "_debut")
+
+    def __init__(self, nom: str):
+        self.nom = nom
+
+    def __enter__(self):
+        self._debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        enregistrer(self.nom, time.perf_counter() - self._debut)
+        return False
+
+
+_CONTEXTE_VIDE = nullcontext()
+
+
+def chronometre(nom: str):
+    """Contexte qui chronomètre son bloc sous le nom donné (contexte vide si les mesures sont désactivées)."""
+    return _Chronometre(nom) if MESURES_ACTIVEES else _CONTEXTE_VIDE
+
+
+def mesurer(nom: str = None):
+    """
+    Décorateur qui chronomètre chaque appel de la fonction (sous son nom, par défaut).
+
+    Si les mesures sont désactivées, la fonction est retournée sans enveloppe.
+    """
+    def decorateur(fonction):
+        if not MESURES_ACTIVEES:
+            return fonction
+        nom_mesure = nom or fonction.__name__
+
+        @wraps(fonction)
+        def enveloppe(*args, **kwargs):
+            debut = time.perf_counter()
+            try:
+                return fonction(*args, **kwargs)
+            finally:
+                enregistrer(nom_mesure, time.perf_counter() - debut)
+
+        return enveloppe
+
+    return decorateur
+
+
+def demarrer_rerun(compteurs_session: Compteurs) -> Compteurs:
+    """
+    Ouvre les compteurs d'un rerun : jusqu'à `terminer_rerun`, les mesures du thread courant sont aussi
+    comptées pour ce rerun et pour la session. Retourne None si les mesures sont désactivées.
+    """
+    if not MESURES_ACTIVEES:
+        return None
+    compteurs_rerun = Compteurs()
+    compteurs_rerun.debut = time.perf_counter()
+    _compteurs_contexte.set((compteurs_rerun, compteurs_session))
+    return compteurs_rerun
+
+
+def terminer_rerun(compteurs_rerun: Compteurs):
+    """Enregistre la durée totale du rerun (sous le nom `rerun`) et met à jour le fichier Prometheus s'il est configuré."""
+    if compteurs_rerun is None:
+        return
+    enregistrer("rerun", time.perf_counter() - compteurs_rerun.debut)
+    _compteurs_contexte.set(())
+    if FICHIER_PROMETHEUS:
+        temporaire = f"{FICHIER_PROMETHEUS}.{os.getpid()}.tmp"
+        with open(temporaire, "w", encoding="utf-8") as fichier:
+            fichier.write(exporter_prometheus())
+        os.replace(temporaire, FICHIER_PROMETHEUS)
+
+
+# --- Export au format texte de Prometheus ---
+
+def _etiquette(valeur: str) -> str:
+    return str(valeur).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def exporter_prometheus(compteurs: Compteurs = COMPTEURS_GLOBAUX, prefixe: str = "simulateur") -> str:
+    """
+    Retourne les mesures et les statistiques des caches au format d'exposition texte de Prometheus.
+
+    Returns:
+        str: Une famille de métriques par indicateur, une ligne par nom de mesure (ou par cache).
+    """
+    mesures = compteurs.instantane()
+    familles = [
+        ("appels_total", "counter", "Nombre d'appels mesurés.", "nom", {nom: m["appels"] for nom, m in mesures.items()}),
+        ("duree_secondes_total", "counter", "Durée cumulée des appels, en secondes.", "nom", {nom: m["duree_s"] for nom, m in mesures.items()}),
+        ("duree_max_secondes", "gauge", "Durée du plus long appel, en secondes.", "nom", {nom: m["duree_max_s"] for nom, m in mesures.items()}),
+    ]
+
+    statistiques = [cache.statistiques() for cache in CACHES.values()]
+    for cle, type_metrique, aide in [
+        ("succes", "counter", "Nombre de lectures trouvées dans le cache."),
+        ("echecs", "counter", "Nombre de lectures absentes du cache."),
+        ("evictions", "counter", "Nombre d'entrées évincées (LRU)."),
+        ("entrees", "gauge", "Nombre d'entrées en cache."),
+        ("octets", "gauge", "Mémoire estimée du cache, en octets."),
+    ]:
+        nom_famille = f"cache_{cle}_total" if type_metrique == "counter" else f"cache_{cle}"
+        familles.append((nom_famille, type_metrique, aide, "cache", {stat["nom"]: stat[cle] for stat in statistiques}))
+
+    lignes = []
+    for nom_famille, type_metrique, aide, etiquette, valeurs in familles:
+        lignes.append(f"# HELP {prefixe}_{nom_famille} {aide}")
+        lignes.append(f"# TYPE {prefixe}_{nom_famille} {type_metrique}")
+        for nom, valeur in sorted(valeurs.items()):
+            lignes.append(f'{prefixe}_{nom_famille}{{{etiquette}="{_etiquette(nom)}"}} {valeur:.9g}')
+    return "\n".join(lignes) + "\n"
@@ -0,0 +1,261 @@
+import numpy as np
+import pandas as pd
+
+from calculs import CHOIX_IMPACT, TAUX_ENDETTEMENT_MAX_PCT, _calculer_details_prets_tableaux
+
+# --- Optimisation du plan de financement ---
+# Un plan de financement combine une durée (au mois près), un apport pris sur l'épargne disponible et
+# un plan de remboursements anticipés financé par l'épargne mensuelle : tous les `periode_mois` mois,
+# le foyer rembourse une part de ce qu'il a mis de côté depuis le remboursement précédent.
+# Chaque plan est jugé sur deux critères : le coût total du crédit (intérêts et assurance) et l'épargne
+# restante à l'horizon (épargne non engagée dans le projet, à la fin de la plus longue durée envisagée).
+# Les plans qui dépassent le taux d'endettement maximal sont écartés avant la simulation (formules fermées
+# sur la grille apports x durées) ; les autres sont simulés ensemble, puis les plans dominés sont éliminés
+# pour ne garder que le front de Pareto coût / épargne. Avec des remboursements périodiques, le coût n'est
+# pas monotone en la durée (une durée un peu plus longue peut recevoir un remboursement de plus et finir
+# plus tôt) : aucune durée n'est écartée a priori.
+
+OBJECTIFS = {"cout": "Coût total minimal", "epargne": "Épargne restante maximale"}
+
+# Plans de remboursement anticipé envisagés : part de l'épargne mensuelle affectée et périodicité
+PARTS_EPARGNE = (0.25, 0.5, 0.75, 1.0)
+PERIODES_MOIS = (12, 24, 60)
+
+
+def interpoler_taux(durees_taux: dict, durees_mois) -> np.ndarray:
+    """
+    Retourne le taux nominal de chaque durée (en mois), par interpolation linéaire entre les durées
+    de la barre latérale (et le taux de la durée la plus proche en dehors de la grille).
+    """
+    durees_annees = np.array(sorted(durees_taux), dtype=float)
+    taux_pct = np.array([durees_taux[duree] for duree in sorted(durees_taux)], dtype=float)
+    return np.interp(np.asarray(durees_mois) / 12, durees_annees, taux_pct)
+
+
+def _plans_remboursement_tableaux(
+    capital,
+    taux_mensuel_nominal,
+    duree_mois,
+    mensualite_hors_assurance,
+    montant_remboursement,
+    periode_mois,
+    reduire_duree,
+    capitalisation_mensuelle: float = 1.0
+) -> dict:
+    """
+    Applique à un lot de prêts un remboursement anticipé périodique (un montant fixe tous les `periode_mois` mois).
+    Les arguments sont des scalaires ou des tableaux à une dimension, diffusés entre eux.
+
+    Mêmes formules que `simuler_remboursements_multiples`, mais tous les prêts avancent ensemble
+    d'événement en événement : la boucle ne porte que sur le nombre de remboursements (25 au plus pour
+    un remboursement annuel sur 25 ans), et seuls les prêts encore en cours sont mis à jour.
+
+    Returns:
+        dict: Les tableaux `interets` (payés sur toute la vie du prêt), `duree_totale_mois`, `total_rembourse`,
+        `nombre_remboursements` et `rembourse_actualise` (somme des remboursements divisés par la capitalisation
+        de l'épargne à leur date, pour calculer l'épargne restante).
+    """
+    capital, taux_mensuel_nominal, duree_restante, mensualite, montant_remboursement, periode_mois, reduire_duree = (
+        np.array(np.atleast_1d(valeurs), dtype=type_) for valeurs, type_ in zip(
+            np.broadcast_arrays(capital, taux_mensuel_nominal, duree_mois, mensualite_hors_assurance, montant_remboursement, periode_mois, reduire_duree),
+            (float, float, float, float, float, int, bool)
+        )
+    )
+    taux_positif = taux_mensuel_nominal > 0
+    taux_calcul = np.where(taux_positif, taux_mensuel_nominal, 1.0)
+
+    # --- État de chaque prêt : capital restant dû, mensualité, mensualités restantes, mois écoulés ---
+    mois_ecoule = np.zeros(capital.shape, dtype=int)
+    interets = np.zeros(capital.shape)
+    total_rembourse = np.zeros(capital.shape)
+    rembourse_actualise = np.zeros(capital.shape)
+    nombre_remboursements = np.zeros(capital.shape, dtype=int)
+
+    # Un remboursement n'a lieu que si le prêt court encore à sa date
+    actifs = np.flatnonzero((montant_remboursement > 0) & (periode_mois < duree_restante))
+    while actifs.size:
+        r, positif, k = taux_calcul[actifs], taux_positif[actifs], periode_mois[actifs]
+        c, m = capital[actifs], mensualite[actifs]
+
+        # --- Saut jusqu'au remboursement suivant par formule fermée ---
+        facteur = (1 + r)**k
+        capital_apres_k = np.where(positif, c * facteur - m * (facteur - 1) / r, c - m * k)
+        interets[actifs] += m * k - (c - capital_apres_k)
+        restant = duree_restante[actifs] - k
+        mois_ecoule[actifs] += k
+
+        # --- Application du remboursement ---
+        montant = np.minimum(montant_remboursement[actifs], capital_apres_k)
+        c = capital_apres_k - montant
+        total_rembourse[actifs] += montant
+        rembourse_actualise[actifs] += montant / capitalisation_mensuelle**mois_ecoule[actifs]
+        nombre_remboursements[actifs] += 1
+
+        solde = c > 0
+        c = np.where(solde, c, 0.0)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # "Réduire la durée du prêt" : la mensualité est conservée
+            duree_reduite = np.ceil(np.where(positif, -np.log(1 - (c * r / m)) / np.log(1 + r), c / m))
+            # "Réduire les mensualités" : la durée restante est conservée
+            facteur_restant = (1 + r)**restant
+            mensualite_reduite = np.where(positif, c * r * facteur_restant / (facteur_restant - 1), c / restant)
+        reduire = reduire_duree[actifs]
+        capital[actifs] = c
+        duree_restante[actifs] = np.where(solde, np.where(reduire, duree_reduite, restant), 0)
+        mensualite[actifs] = np.where(solde, np.where(reduire, m, mensualite_reduite), 0.0)
+
+        actifs = actifs[solde & (k < duree_restante[actifs])]
+
+    # --- Fin du prêt : les mensualités restantes soldent le capital ---
+    interets += mensualite * duree_restante - capital
+
+    return {
+        "interets": interets,
+        "duree_totale_mois": mois_ecoule + duree_restante,
+        "total_rembourse": total_rembourse,
+        "nombre_remboursements": nombre_remboursements,
+        "rembourse_actualise": rembourse_actualise,
+    }
+
+
+def front_pareto(cout, epargne) -> np.ndarray:
+    """
+    Retourne les indices des solutions non dominées (coût minimal, épargne maximale), par coût croissant.
+
+    Une solution est dominée si une autre coûte au plus autant et laisse au moins autant d'épargne,
+    l'une des deux inégalités étant stricte. Un tri suffit : en parcourant les solutions par coût
+    croissant, on ne garde que celles qui font mieux que la meilleure épargne déjà vue.
+    """
+    cout, epargne = np.asarray(cout, dtype=float), np.asarray(epargne, dtype=float)
+    ordre = np.lexsort((-epargne, cout))
+    meilleure_precedente = np.maximum.accumulate(np.concatenate([[-np.inf], epargne[ordre][:-1]]))
+    return ordre[epargne[ordre] > meilleure_precedente]
+
+
+def optimiser_financement(
+    prix_bien: float,
+    frais_notaire_pct: float,
+    epargne_totale: float,
+    epargne_mensuelle_totale: float,
+    salaire_total: float,
+    durees_taux: dict,
+    taux_assurance_pct: float,
+    taux_endettement_max_pct: float = TAUX_ENDETTEMENT_MAX_PCT,
+    objectif: str = "cout",
+    epargne_precaution: float = 0.0,
+    rendement_epargne_pct: float = 0.0,
+    pas_duree_mois: int = 1,
+    nombre_apports: int = 21
+) -> dict:
+    """
+    Cherche les meilleurs plans de financement : durée au mois près, apport et remboursements anticipés.
+
+    Args:
+        prix_bien (float): Le prix du bien.
+        frais_notaire_pct (float): Les frais de notaire, en pourcentage du prix du bien.
+        epargne_totale (float): L'épargne disponible, dans laquelle l'apport est pris.
+        epargne_mensuelle_totale (float): L'épargne mensuelle, qui finance les remboursements anticipés.
+        salaire_total (float): Le salaire net mensuel du foyer.
+        durees_taux (dict): Les taux de la barre latérale ; les durées envisagées vont de la plus courte à la
+            plus longue, au pas de `pas_duree_mois`, avec des taux interpolés (`interpoler_taux`).
+        taux_assurance_pct (float): Le taux d'assurance annuel, en pourcentage.
+        taux_endettement_max_pct (float): Le taux d'endettement à ne pas dépasser (sur la première mensualité).
+        objectif (str): `cout` (coût total minimal) ou `epargne` (épargne restante maximale), voir `OBJECTIFS`.
+        epargne_precaution (float): L'épargne à conserver, qui ne peut pas servir d'apport.
+        rendement_epargne_pct (float): Le rendement annuel de l'épargne, en pourcentage (capitalisation mensuelle).
+        pas_duree_mois (int): Le pas de la grille des durées, en mois.
+        nombre_apports (int): Le nombre d'apports envisagés, de 0 à l'épargne disponible hors précaution.
+
+    Returns:
+        dict: `solutions` (les plans simulés et respectant le taux d'endettement), `front` (les plans non dominés,
+        par coût croissant), `meilleure` (le plan retenu pour l'objectif, ou None), `horizon_mois` et les nombres
+        de plans `envisages`, `ecartes_endettement` (avant la simulation) et `simules`.
+    """
+    if objectif not in OBJECTIFS:
+        raise ValueError(f"Objectif inconnu : {objectif} (objectifs possibles : {', '.join(OBJECTIFS)})")
+
+    # --- Grilles des durées, des apports et des plans de remboursement ---
+    durees_mois = np.arange(min(durees_taux) * 12, max(durees_taux) * 12 + 1, pas_duree_mois)
+    taux_pct = interpoler_taux(durees_taux, durees_mois)
+    cout_total_projet = prix_bien * (1 + frais_notaire_pct / 100)
+    apport_max = min(max(epargne_totale - epargne_precaution, 0.0), cout_total_projet)
+    apports = np.unique(np.round(np.linspace(0.0, apport_max, nombre_apports)))
+    # Plans : (part de l'épargne mensuelle, périodicité, réduire la durée) ; le premier est « sans remboursement »
+    plans = [(0.0, 12, True)] + [
+        (part, periode, choix == CHOIX_IMPACT[0]) for part in PARTS_EPARGNE for periode in PERIODES_MOIS for choix in CHOIX_IMPACT
+    ] if epargne_mensuelle_totale > 0 else [(0.0, 12, True)]
+    parts, periodes, reduire_duree = (np.array(valeurs) for valeurs in zip(*plans))
+    envisages = len(apports) * len(durees_mois) * len(plans)
+
+    # --- Élagage : taux d'endettement de la première mensualité, sur la grille apports x durées ---
+    montants = cout_total_projet - apports
+    details = _calculer_details_prets_tableaux(
+        montants[:, None], taux_pct[None, :], durees_mois[None, :] / 12, taux_assurance_pct, salaire_total, taux_endettement_max_pct
+    )
+    admissible = (details["taux_endettement_pct"] <= taux_endettement_max_pct) & (montants > 0)[:, None]
+    ecartes_endettement = int((~admissible).sum()) * len(plans)
+
+    # --- Simulation de tous les plans admissibles en une passe ---
+    indice_apport, indice_duree = np.nonzero(admissible)
+    indice_apport, indice_plan = np.repeat(indice_apport, len(plans)), np.tile(np.arange(len(plans)), len(indice_duree))
+    indice_duree = np.repeat(indice_duree, len(plans))
+    mensualite_hors_assurance = details["mensualite_hors_assurance"][indice_apport, indice_duree]
+    mensualite_assurance = details["mensualite_avec_assurance"][indice_apport, indice_duree] - mensualite_hors_assurance
+    montant_remboursement = parts[indice_plan] * epargne_mensuelle_totale * periodes[indice_plan]
+
+    capitalisation_mensuelle = (1 + rendement_epargne_pct / 100)**(1 / 12)
+    simulation = _plans_remboursement_tableaux(
+        montants[indice_apport],
+        taux_pct[indice_duree] / 1200,
+        durees_mois[indice_duree],
+        mensualite_hors_assurance,
+        montant_remboursement,
+        periodes[indice_plan],
+        reduire_duree[indice_plan],
+        capitalisation_mensuelle
+    )
+
+    # --- Critères : coût total du crédit et épargne restante à l'horizon ---
+    # Épargne à l'horizon H : (épargne disponible - apport + versements mensuels - remboursements), chaque
+    # mouvement étant capitalisé jusqu'à H (même convention que `projeter_epargne`).
+    horizon_mois = int(durees_mois[-1])
+    mois = np.arange(1, horizon_mois + 1)
+    versements_actualises = epargne_mensuelle_totale * np.sum(capitalisation_mensuelle**-mois)
+    epargne_restante = capitalisation_mensuelle**horizon_mois * (
+        epargne_totale - apports[indice_apport] + versements_actualises - simulation["rembourse_actualise"]
+    )
+    cout_total_credit = simulation["interets"] + mensualite_assurance * simulation["duree_totale_mois"]
+
+    solutions = pd.DataFrame({
+        "duree_mois": durees_mois[indice_duree],
+        "taux_nominal_pct": taux_pct[indice_duree],
+        "apport": apports[indice_apport],
+        "montant_a_emprunter": montants[indice_apport],
+        "mensualite_avec_assurance": details["mensualite_avec_assurance"][indice_apport, indice_duree],
+        "taux_endettement_pct": details["taux_endettement_pct"][indice_apport, indice_duree],
+        "part_epargne_pct": parts[indice_plan] * 100,
+        "periode_mois": periodes[indice_plan],
+        "choix_impact": np.where(reduire_duree[indice_plan], CHOIX_IMPACT[0], CHOIX_IMPACT[1]),
+        "montant_remboursement": montant_remboursement,
+        "nombre_remboursements": simulation["nombre_remboursements"],
+        "total_rembourse": simulation["total_rembourse"],
+        "duree_effective_mois": simulation["duree_totale_mois"],
+        "cout_total_credit": cout_total_credit,
+        "epargne_restante": epargne_restante,
+    })
+
+    front = solutions.iloc[front_pareto(cout_total_credit, epargne_restante)].reset_index(drop=True)
+    meilleure = None
+    if not front.empty:
+        # Le front est trié par coût croissant et épargne croissante : ses extrémités sont les deux optimums
+        meilleure = (front.iloc[0] if objectif == "cout" else front.iloc[-1]).to_dict()
+
+    return {
+        "solutions": solutions,
+        "front": front,
+        "meilleure": meilleure,
+        "horizon_mois": horizon_mois,
+        "envisages": envisages,
+        "ecartes_endettement": ecartes_endettement,
+        "simules": len(solutions),
+    }
@@ -0,0 +1,246 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from calculs import _calculer_details_prets_tableaux, _tableaux_amortissement, formater_nombre
+
+# --- Stockage en colonnes des portefeuilles de prêts et de leurs échéanciers ---
+# Un portefeuille est un ensemble de colonnes NumPy de même longueur (une valeur par prêt) plutôt
+# qu'une liste de dictionnaires : 8 octets par valeur (4 pour les durées et les montants en centimes)
+# au lieu de plusieurs centaines. Les échéanciers sont des matrices prêts x mois, écrites lot par lot
+# dans des fichiers .npy et relues par projection en mémoire (memmap) : on peut analyser un million
+# d'échéanciers de 300 mois sans les charger en RAM. Les montants peuvent être stockés en centimes
+# entiers (int32, jusqu'à 21 millions d'euros par valeur), ce qui divise encore la taille par deux.
+
+COLONNES_ENTREE = {
+    "montant_emprunte": np.float64,
+    "taux_nominal_pct": np.float64,
+    "duree_annees": np.int32,
+    "taux_assurance_pct": np.float64,
+}
+COLONNES_CALCULEES = ("mensualite_avec_assurance", "mensualite_hors_assurance", "cout_total_credit")
+COLONNES_MONETAIRES = {"montant_emprunte", *COLONNES_CALCULEES}
+COLONNES_ECHEANCIER = ("interets", "capital_rembourse", "assurance", "capital_restant_du")
+
+FICHIER_META = "meta.json"
+
+
+def _en_centimes(valeurs) -> np.ndarray:
+    """Convertit des montants en euros en centimes entiers (int32), en refusant les dépassements."""
+    centimes = np.rint(np.asarray(valeurs, dtype=float) * 100)
+    limite = np.iinfo(np.int32).max
+    if centimes.size and np.abs(centimes).max() > limite:
+        raise ValueError(f"Montant trop élevé pour un stockage en centimes (int32) : {formater_nombre(np.abs(centimes).max() / 100)}")
+    return centimes.astype(np.int32)
+
+
+def _en_euros(valeurs: np.ndarray, centimes: bool) -> np.ndarray:
+    return valeurs / 100 if centimes else np.asarray(valeurs, dtype=float)
+
+
+def _ecrire_meta(dossier: Path, meta: dict):
+    dossier.mkdir(parents=True, exist_ok=True)
+    (dossier / FICHIER_META).write_text(json.dumps(meta), encoding="utf-8")
+
+
+def _lire_meta(dossier: Path) -> dict:
+    return json.loads((Path(dossier) / FICHIER_META).read_text(encoding="utf-8"))
+
+
+class VuePret:
+    """Accès à un prêt d'un portefeuille, par attributs (`pret.mensualite_avec_assurance`), sans copie des colonnes."""
+
+    __slots__ = ("_portefeuille", "_indice")
+
+    def __init__(self, portefeuille: "Portefeuille", indice: int):
+        self._portefeuille = portefeuille
+        self._indice = indice
+
+    def __getattr__(self, nom: str):
+        if nom not in self._portefeuille.colonnes:
+            raise AttributeError(nom)
+        valeur = self._portefeuille.colonnes[nom][self._indice].item()
+        if self._portefeuille.centimes and nom in COLONNES_MONETAIRES:
+            return valeur / 100
+        return valeur
+
+    def vers_dict(self) -> dict:
+        return {nom: getattr(self, nom) for nom in self._portefeuille.colonnes}
+
+    def __repr__(self):
+        return f"VuePret({self._indice}, {self.vers_dict()})"
+
+
+class Portefeuille:
+    """
+    Portefeuille de prêts stocké en colonnes (une colonne NumPy par champ, une valeur par prêt).
+
+    Les colonnes sont celles de `COLONNES_ENTREE` et de `COLONNES_CALCULEES`. Avec `centimes=True`,
+    les montants (`COLONNES_MONETAIRES`) sont des centimes entiers ; `colonne()` et les vues de prêt
+    les restituent toujours en euros.
+    """
+
+    def __init__(self, colonnes: dict, centimes: bool = False):
+        longueurs = {len(valeurs) for valeurs in colonnes.values()}
+        if len(longueurs) > 1:
+            raise ValueError("Les colonnes d'un portefeuille doivent avoir la même longueur.")
+        self.colonnes = colonnes
+        self.centimes = centimes
+
+    @classmethod
+    def calculer(cls, montant_emprunte, taux_nominal_pct, duree_annees, taux_assurance_pct, centimes: bool = False) -> "Portefeuille":
+        """Construit un portefeuille à partir des caractéristiques des prêts, mensualités et coût total compris."""
+        entrees = {
+            nom: np.ascontiguousarray(valeurs, dtype=COLONNES_ENTREE[nom])
+            for nom, valeurs in zip(COLONNES_ENTREE, np.broadcast_arrays(
+                np.asarray(montant_emprunte, dtype=float),
+                np.asarray(taux_nominal_pct, dtype=float),
+                np.asarray(duree_annees),
+                np.asarray(taux_assurance_pct, dtype=float),
+            ))
+        }
+        details = _calculer_details_prets_tableaux(
+            entrees["montant_emprunte"], entrees["taux_nominal_pct"], entrees["duree_annees"], entrees["taux_assurance_pct"]
+        )
+        colonnes = {**entrees, **{nom: details[nom] for nom in COLONNES_CALCULEES}}
+        if centimes:
+            colonnes = {nom: _en_centimes(valeurs) if nom in COLONNES_MONETAIRES else valeurs for nom, valeurs in colonnes.items()}
+        return cls({nom: np.ravel(valeurs) for nom, valeurs in colonnes.items()}, centimes)
+
+    @classmethod
+    def depuis_df(cls, df: pd.DataFrame, centimes: bool = False) -> "Portefeuille":
+        """Construit un portefeuille à partir d'un DataFrame ayant les colonnes de `COLONNES_ENTREE`."""
+        return cls.calculer(*(df[nom].to_numpy() for nom in COLONNES_ENTREE), centimes=centimes)
+
+    def __len__(self) -> int:
+        return len(next(iter(self.colonnes.values()), ()))
+
+    def __getitem__(self, indice: int) -> VuePret:
+        if not -len(self) <= indice < len(self):
+            raise IndexError(indice)
+        return VuePret(self, indice % len(self))
+
+    def __iter__(self):
+        return (VuePret(self, indice) for indice in range(len(self)))
+
+    def colonne(self, nom: str) -> np.ndarray:
+        """Retourne une colonne, en euros pour les montants."""
+        return _en_euros(self.colonnes[nom], self.centimes and nom in COLONNES_MONETAIRES)
+
+    @property
+    def octets(self) -> int:
+        return sum(valeurs.nbytes for valeurs in self.colonnes.values())
+
+    def vers_df(self) -> pd.DataFrame:
+        return pd.DataFrame({nom: self.colonne(nom) for nom in self.colonnes})
+
+    # --- Fichiers ---
+
+    def enregistrer(self, dossier):
+        """Enregistre le portefeuille dans un dossier : un fichier .npy par colonne."""
+        dossier = Path(dossier)
+        _ecrire_meta(dossier, {"type": "portefeuille", "centimes": self.centimes, "colonnes": list(self.colonnes)})
+        for nom, valeurs in self.colonnes.items():
+            np.save(dossier / f"{nom}.npy", valeurs)
+
+    @classmethod
+    def charger(cls, dossier, memmap: bool = True) -> "Portefeuille":
+        """Ouvre un portefeuille enregistré, par projection en mémoire (lecture seule) par défaut."""
+        dossier = Path(dossier)
+        meta = _lire_meta(dossier)
+        mode = "r" if memmap else None
+        return cls({nom: np.load(dossier / f"{nom}.npy", mmap_mode=mode) for nom in meta["colonnes"]}, meta["centimes"])
+
+
+class Echeanciers:
+    """
+    Échéanciers d'un portefeuille : une matrice (n_prets, n_mois) par colonne de `COLONNES_ECHEANCIER`,
+    en général projetée en mémoire depuis le disque. Les mois au-delà de la durée d'un prêt valent zéro.
+    """
+
+    def __init__(self, colonnes: dict, centimes: bool = False):
+        self.colonnes = colonnes
+        self.centimes = centimes
+
+    @property
+    def forme(self) -> tuple:
+        return next(iter(self.colonnes.values())).shape
+
+    @classmethod
+    def ecrire(cls, portefeuille: Portefeuille, dossier, taille_lot: int = 5_000, centimes: bool = None) -> "Echeanciers":
+        """
+        Calcule les échéanciers de tout le portefeuille et les écrit sur disque, lot par lot.
+
+        Seul un lot de `taille_lot` prêts est calculé en mémoire à la fois. Par défaut, les montants
+        sont stockés en centimes si le portefeuille l'est.
+
+        Returns:
+            Echeanciers: Les échéanciers écrits, ouverts en lecture seule.
+        """
+        dossier = Path(dossier)
+        centimes = portefeuille.centimes if centimes is None else centimes
+        n_prets = len(portefeuille)
+        n_mois = int(portefeuille.colonnes["duree_annees"].max()) * 12 if n_prets else 0
+        _ecrire_meta(dossier, {"type": "echeanciers", "centimes": centimes, "colonnes": list(COLONNES_ECHEANCIER)})
+
+        fichiers = {
+            nom: np.lib.format.open_memmap(dossier / f"{nom}.npy", mode="w+", dtype=np.int32 if centimes else np.float64, shape=(n_prets, n_mois))
+            for nom in COLONNES_ECHEANCIER
+        }
+        mois = np.arange(1, n_mois + 1)[None, :]
+        for debut in range(0, n_prets, taille_lot):
+            lot = slice(debut, debut + taille_lot)
+            # Les mensualités sont recalculées sans arrondi : seules les valeurs écrites sont arrondies au centime
+            montant = portefeuille.colonne("montant_emprunte")[lot]
+            taux_nominal_pct = portefeuille.colonnes["taux_nominal_pct"][lot]
+            duree_annees = portefeuille.colonnes["duree_annees"][lot]
+            details = _calculer_details_prets_tableaux(montant, taux_nominal_pct, duree_annees, portefeuille.colonnes["taux_assurance_pct"][lot])
+            lignes = _tableaux_amortissement(
+                montant[:, None],
+                taux_nominal_pct[:, None] / 1200,
+                details["mensualite_hors_assurance"][:, None],
+                (details["mensualite_avec_assurance"] - details["mensualite_hors_assurance"])[:, None],
+                duree_annees[:, None] * 12,
+                mois
+            )
+            for nom, fichier in fichiers.items():
+                fichier[lot] = _en_centimes(lignes[nom]) if centimes else lignes[nom]
+
+        for fichier in fichiers.values():
+            fichier.flush()
+        del fichiers
+        return cls.charger(dossier)
+
+    @classmethod
+    def charger(cls, dossier) -> "Echeanciers":
+        """Ouvre des échéanciers enregistrés par projection en mémoire, en lecture seule."""
+        dossier = Path(dossier)
+        meta = _lire_meta(dossier)
+        return cls({nom: np.load(dossier / f"{nom}.npy", mmap_mode="r") for nom in meta["colonnes"]}, meta["centimes"])
+
+    def echeancier(self, indice: int) -> pd.DataFrame:
+        """Retourne l'échéancier d'un prêt (seule sa ligne est lue sur le disque)."""
+        lignes = {nom: _en_euros(valeurs[indice], self.centimes) for nom, valeurs in self.colonnes.items()}
+        actif = (lignes["interets"] + lignes["capital_rembourse"]) > 0
+        n_mois = int(actif.nonzero()[0].max()) + 1 if actif.any() else 0
+        return pd.DataFrame({"mois": np.arange(1, n_mois + 1), **{nom: valeurs[:n_mois] for nom, valeurs in lignes.items()}})
+
+    def iterer_lots(self, colonnes=COLONNES_ECHEANCIER, taille_lot: int = 10_000):
+        """
+        Parcourt les échéanciers par lots de prêts.
+
+        Yields:
+            tuple: (indice du premier prêt du lot, dictionnaire de matrices (taille_lot, n_mois) en euros).
+        """
+        n_prets = self.forme[0]
+        for debut in range(0, n_prets, taille_lot):
+            yield debut, {nom: _en_euros(self.colonnes[nom][debut:debut + taille_lot], self.centimes) for nom in colonnes}
+
+    def totaux_par_mois(self, colonne: str, taille_lot: int = 10_000) -> np.ndarray:
+        """Somme une colonne sur tous les prêts, mois par mois (ex. flux d'intérêts du portefeuille), lot par lot."""
+        totaux = np.zeros(self.forme[1], dtype=np.int64 if self.centimes else np.float64)
+        for debut in range(0, self.forme[0], taille_lot):
+            totaux += self.colonnes[colonne][debut:debut + taille_lot].sum(axis=0, dtype=totaux.dtype)
+        return _en_euros(totaux, self.centimes)
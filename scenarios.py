@@ -0,0 +1,460 @@
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import calculs
+from cache import calculer_cle
+
+# --- Base de scénarios enregistrés ---
+# Chaque scénario conserve l'ensemble des saisies de l'application (pour être rechargé tel quel), les
+# paramètres du tableau comparatif et son empreinte. Les résultats du comparatif (`df_prets`) sont
+# stockés une seule fois par empreinte : deux scénarios aux paramètres identiques partagent les mêmes
+# lignes, et comparer des scénarios relit ces lignes au lieu de les recalculer. Seuls les scénarios
+# dont les paramètres (par exemple la grille de taux) ont changé sont recalculés, puis leurs résultats
+# sont ajoutés à la base pour les comparaisons suivantes ; ceux qu'aucun scénario ne référence (comparaison
+# aux taux actuels) sont conservés dans la limite de MAX_RESULTATS_TEMPORAIRES, les moins récemment
+# utilisés étant supprimés au-delà. Le fichier SQLite est local ; son chemin
+# peut être changé avec la variable d'environnement SIMULATEUR_SCENARIOS.
+
+FICHIER_PAR_DEFAUT = Path(os.environ.get("SIMULATEUR_SCENARIOS", Path(__file__).resolve().parent / "scenarios.sqlite"))
+
+# Colonnes de `df_prets` stockées chacune dans une colonne SQL ; les autres (financement en plusieurs
+# tranches) sont regroupées dans la colonne JSON `supplement`.
+COLONNES_RESULTATS = (
+    "taux_nominal_pct",
+    "taeg_pct",
+    "mensualite_avec_assurance",
+    "mensualite_hors_assurance",
+    "cout_total_credit",
+    "salaire_mensuel_minimum",
+    "taux_endettement_pct",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id INTEGER PRIMARY KEY,
+    foyer TEXT NOT NULL,
+    nom TEXT NOT NULL,
+    prix_bien REAL NOT NULL,
+    enregistre_le TEXT NOT NULL,
+    saisies TEXT NOT NULL,
+    parametres TEXT NOT NULL,
+    empreinte TEXT NOT NULL,
+    UNIQUE (foyer, nom)
+);
+CREATE INDEX IF NOT EXISTS idx_scenarios_foyer_date ON scenarios (foyer, enregistre_le);
+CREATE INDEX IF NOT EXISTS idx_scenarios_prix ON scenarios (prix_bien);
+CREATE INDEX IF NOT EXISTS idx_scenarios_date ON scenarios (enregistre_le);
+CREATE INDEX IF NOT EXISTS idx_scenarios_empreinte ON scenarios (empreinte);
+
+CREATE TABLE IF NOT EXISTS utilisations (
+    empreinte TEXT PRIMARY KEY,
+    utilise_le REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+TABLE_RESULTATS = """
+CREATE TABLE IF NOT EXISTS resultats (
+    empreinte TEXT NOT NULL,
+    duree_annees INTEGER NOT NULL,
+    taux_nominal_pct REAL NOT NULL,
+    taeg_pct REAL,
+    mensualite_avec_assurance REAL NOT NULL,
+    mensualite_hors_assurance REAL NOT NULL,
+    cout_total_credit REAL NOT NULL,
+    salaire_mensuel_minimum REAL NOT NULL,
+    taux_endettement_pct REAL NOT NULL,
+    verdict TEXT NOT NULL,
+    supplement TEXT,
+    PRIMARY KEY (empreinte, duree_annees)
+) WITHOUT ROWID
+"""
+
+SCHEMA += TABLE_RESULTATS + ";"
+
+# Nombre maximal de paramètres par requête `IN (...)`
+TAILLE_PAQUET = 500
+
+# Nombre maximal de jeux de résultats conservés sans scénario pour les référencer
+MAX_RESULTATS_TEMPORAIRES = 1000
+
+
+def normaliser_parametres(
+    montant_a_emprunter,
+    durees_taux,
+    taux_assurance_pct,
+    salaire_total,
+    taux_endettement_max_pct=calculs.TAUX_ENDETTEMENT_MAX_PCT,
+    tranches=None,
+    frais_dossier=0.0,
+    frais_garantie_pct=0.0
+) -> dict:
+    """
+    Met les paramètres de `generer_tableau_comparatif` sous une forme stable, sérialisable en JSON.
+
+    Les montants sont arrondis au centime et les taux à 0,01 %, comme dans les champs de saisie ;
+    les durées sont des entiers triés (les clés JSON, elles, sont des chaînes).
+    """
+    return {
+        "montant_a_emprunter": round(float(montant_a_emprunter), 2),
+        "durees_taux": {int(duree): round(float(taux), 2) for duree, taux in sorted(durees_taux.items(), key=lambda item: int(item[0]))},
+        "taux_assurance_pct": round(float(taux_assurance_pct), 2),
+        "salaire_total": round(float(salaire_total), 2),
+        "taux_endettement_max_pct": round(float(taux_endettement_max_pct), 2),
+        "tranches": [{cle: valeur if cle == "nom" else round(float(valeur), 2) for cle, valeur in tranche.items()} for tranche in tranches or []],
+        "frais_dossier": round(float(frais_dossier), 2),
+        "frais_garantie_pct": round(float(frais_garantie_pct), 2),
+    }
+
+
+def _depuis_json(parametres: str) -> dict:
+    parametres = json.loads(parametres)
+    return normaliser_parametres(**parametres)
+
+
+def _lignes_resultats(empreinte: str, df_prets: pd.DataFrame) -> list:
+    """Convertit un `df_prets` en lignes de la table `resultats`."""
+    supplementaires = [colonne for colonne in df_prets.columns if colonne not in ("duree_annees", "Verdict", *COLONNES_RESULTATS)]
+    lignes = []
+    for ligne in df_prets.to_dict("records"):
+        supplement = {colonne: ligne[colonne].item() if isinstance(ligne[colonne], np.generic) else ligne[colonne] for colonne in supplementaires}
+        lignes.append((
+            empreinte,
+            int(ligne["duree_annees"]),
+            *(float(ligne[colonne]) for colonne in COLONNES_RESULTATS),
+            ligne["Verdict"],
+            json.dumps(supplement) if supplement else None,
+        ))
+    return lignes
+
+
+def calculer_comparatifs(parametres: list) -> list:
+    """
+    Calcule les tableaux comparatifs (`df_prets`) de plusieurs scénarios.
+
+    Les scénarios sans prêts complémentaires sont regroupés par grille de durées et calculés en une
+    seule passe vectorisée ; les autres passent par `generer_tableau_comparatif`. Les résultats sont
+    identiques à ceux de `generer_tableau_comparatif`.
+
+    Args:
+        parametres (list): Les paramètres normalisés (`normaliser_parametres`) de chaque scénario.
+
+    Returns:
+        list: Un `df_prets` par scénario, dans le même ordre.
+    """
+    resultats = [None] * len(parametres)
+    groupes = {}
+    for position, parametres_scenario in enumerate(parametres):
+        if parametres_scenario["tranches"]:
+            resultats[position] = calculs.generer_tableau_comparatif(**parametres_scenario)[0]
+        else:
+            groupes.setdefault(tuple(parametres_scenario["durees_taux"]), []).append(position)
+
+    for grille_durees, positions in groupes.items():
+        groupe = [parametres[position] for position in positions]
+
+        def colonne(nom: str) -> np.ndarray:
+            return np.array([parametres_scenario[nom] for parametres_scenario in groupe])[:, None]
+
+        durees = np.array(grille_durees)[None, :]
+        montant = colonne("montant_a_emprunter")
+        salaire = colonne("salaire_total")
+        seuil = colonne("taux_endettement_max_pct")
+        details = calculs._calculer_details_prets_tableaux(
+            montant,
+            np.array([list(parametres_scenario["durees_taux"].values()) for parametres_scenario in groupe]),
+            durees,
+            colonne("taux_assurance_pct"),
+            salaire,
+            seuil
+        )
+        details["duree_annees"] = np.broadcast_to(details["duree_annees"], details["mensualite_avec_assurance"].shape)
+        details["taeg_pct"] = calculs.calculer_taeg(montant, details["mensualite_avec_assurance"], durees, colonne("frais_dossier"), colonne("frais_garantie_pct"))
+
+        # Même verdict que `generer_tableau_comparatif`
+        endettement = details["taux_endettement_pct"]
+        verdicts = np.where(endettement > seuil - calculs.MARGE_PRUDENCE_PCT, "⚠️ Prudent", "✅ Faisable").astype(object)
+        for ligne, colonne_duree in zip(*np.nonzero(endettement > seuil)):
+            salaire_manquant = details["salaire_mensuel_minimum"][ligne, colonne_duree] - salaire[ligne, 0]
+            verdicts[ligne, colonne_duree] = f"❌ Élevé : il manque {calculs.formater_nombre(salaire_manquant)}"
+        details["Verdict"] = verdicts
+
+        for ligne, position in enumerate(positions):
+            resultats[position] = pd.DataFrame({nom: valeurs[ligne] for nom, valeurs in details.items()})
+    return resultats
+
+
+def _par_paquets(valeurs: list, taille: int = TAILLE_PAQUET):
+    for debut in range(0, len(valeurs), taille):
+        yield valeurs[debut:debut + taille]
+
+
+class BaseScenarios:
+    """
+    Base SQLite de scénarios, indexée par foyer, prix du bien et date d'enregistrement.
+
+    Une connexion est ouverte par opération : la base peut être utilisée depuis plusieurs sessions
+    (threads) ou processus, le journal WAL autorisant les lectures pendant une écriture.
+    """
+
+    def __init__(self, chemin=FICHIER_PAR_DEFAUT):
+        self.chemin = Path(chemin)
+        self.chemin.parent.mkdir(parents=True, exist_ok=True)
+        with self._connexion() as connexion:
+            connexion.execute("PRAGMA journal_mode = WAL")
+            connexion.executescript(SCHEMA)
+            self._migrer(connexion)
+
+    def _migrer(self, connexion):
+        """Met à jour les bases créées avec une version antérieure du schéma."""
+        # Le TAEG est indéfini (NaN, stocké NULL) quand il n'a pas de solution, par exemple si les frais dépassent le prêt
+        if connexion.execute("SELECT \"notnull\" FROM pragma_table_info('resultats') WHERE name = 'taeg_pct'").fetchone() == (1,):
+            connexion.execute("ALTER TABLE resultats RENAME TO resultats_ancien")
+            connexion.execute(TABLE_RESULTATS)
+            connexion.execute("INSERT INTO resultats SELECT * FROM resultats_ancien")
+            connexion.execute("DROP TABLE resultats_ancien")
+
+    @contextmanager
+    def _connexion(self):
+        """Connexion validée à la sortie du bloc (annulée en cas d'exception), puis fermée."""
+        with closing(sqlite3.connect(self.chemin, timeout=10)) as connexion:
+            with connexion:
+                yield connexion
+
+    # --- Enregistrement ---
+
+    def enregistrer(self, foyer: str, nom: str, prix_bien: float, parametres: dict, saisies: dict = None, df_prets: pd.DataFrame = None) -> int:
+        """
+        Enregistre (ou remplace) le scénario `nom` du foyer.
+
+        Args:
+            foyer (str): Identifiant du foyer (ex. nom du ménage).
+            nom (str): Nom du scénario, unique pour le foyer.
+            prix_bien (float): Prix du bien immobilier.
+            parametres (dict): Arguments de `generer_tableau_comparatif`.
+            saisies (dict, optional): Valeurs des champs de l'application, pour recharger le scénario.
+            df_prets (pd.DataFrame, optional): Résultats déjà calculés pour ces paramètres ; ils sont
+                calculés si absents et que la base ne les contient pas déjà.
+
+        Returns:
+            int: L'identifiant du scénario.
+        """
+        parametres = normaliser_parametres(**parametres)
+        empreinte = calculer_cle(**parametres)
+        with self._connexion() as connexion:
+            ancienne = connexion.execute("SELECT empreinte FROM scenarios WHERE foyer = ? AND nom = ?", (foyer, nom)).fetchone()
+            if df_prets is None and not self._empreintes_connues(connexion, [empreinte]):
+                df_prets, = calculer_comparatifs([parametres])
+            if df_prets is not None:
+                self._inserer_resultats(connexion, {empreinte: df_prets})
+            identifiant = connexion.execute(
+                """
+                INSERT INTO scenarios (foyer, nom, prix_bien, enregistre_le, saisies, parametres, empreinte)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (foyer, nom) DO UPDATE SET
+                    prix_bien = excluded.prix_bien,
+                    enregistre_le = excluded.enregistre_le,
+                    saisies = excluded.saisies,
+                    parametres = excluded.parametres,
+                    empreinte = excluded.empreinte
+                RETURNING id
+                """,
+                (
+                    foyer, nom, float(prix_bien), datetime.now().isoformat(timespec="seconds"),
+                    json.dumps(saisies or {}), json.dumps(parametres), empreinte,
+                )
+            ).fetchone()[0]
+            # Un scénario remplacé ne référence plus ses anciens résultats
+            if ancienne is not None and ancienne[0] != empreinte:
+                self._supprimer_orphelins(connexion, ancienne[0])
+            return identifiant
+
+    def supprimer(self, identifiant: int):
+        """Supprime un scénario, ainsi que ses résultats s'ils ne servent à aucun autre scénario."""
+        with self._connexion() as connexion:
+            ligne = connexion.execute("DELETE FROM scenarios WHERE id = ? RETURNING empreinte", (identifiant,)).fetchone()
+            if ligne is not None:
+                self._supprimer_orphelins(connexion, ligne[0])
+
+    def _supprimer_orphelins(self, connexion, empreinte: str):
+        """Supprime les résultats d'une empreinte si aucun scénario ne la référence plus."""
+        if connexion.execute("SELECT 1 FROM scenarios WHERE empreinte = ?", (empreinte,)).fetchone() is None:
+            connexion.execute("DELETE FROM resultats WHERE empreinte = ?", (empreinte,))
+            connexion.execute("DELETE FROM utilisations WHERE empreinte = ?", (empreinte,))
+
+    def _limiter_temporaires(self, connexion, empreintes: list):
+        """
+        Date l'utilisation des résultats d'une comparaison et supprime, au-delà de MAX_RESULTATS_TEMPORAIRES,
+        les moins récemment utilisés de ceux qu'aucun scénario ne référence (jamais ceux de `empreintes`).
+        """
+        maintenant = time.time()
+        connexion.executemany(
+            "INSERT INTO utilisations VALUES (?, ?) ON CONFLICT (empreinte) DO UPDATE SET utilise_le = excluded.utilise_le",
+            [(empreinte, maintenant) for empreinte in empreintes]
+        )
+        connexion.execute(
+            """
+            DELETE FROM resultats WHERE empreinte IN (
+                SELECT r.empreinte
+                FROM (SELECT DISTINCT empreinte FROM resultats) AS r
+                LEFT JOIN utilisations AS u ON u.empreinte = r.empreinte
+                WHERE NOT EXISTS (SELECT 1 FROM scenarios AS s WHERE s.empreinte = r.empreinte)
+                ORDER BY u.utilise_le DESC NULLS LAST
+                LIMIT -1 OFFSET ?
+            )
+            """,
+            (max(MAX_RESULTATS_TEMPORAIRES, len(empreintes)),)
+        )
+        connexion.execute("DELETE FROM utilisations WHERE empreinte NOT IN (SELECT empreinte FROM resultats)")
+
+    def _empreintes_connues(self, connexion, empreintes: list) -> set:
+        connues = set()
+        for paquet in _par_paquets(empreintes):
+            connues.update(ligne[0] for ligne in connexion.execute(
+                f"SELECT DISTINCT empreinte FROM resultats WHERE empreinte IN ({', '.join('?' * len(paquet))})", paquet
+            ))
+        return connues
+
+    def _inserer_resultats(self, connexion, resultats: dict):
+        connexion.executemany(
+            f"INSERT OR REPLACE INTO resultats VALUES ({', '.join('?' * (len(COLONNES_RESULTATS) + 4))})",
+            [ligne for empreinte, df_prets in resultats.items() for ligne in _lignes_resultats(empreinte, df_prets)]
+        )
+
+    # --- Consultation ---
+
+    def lister(self, foyer: str = None, prix_min: float = None, prix_max: float = None, depuis: str = None, jusqu_a: str = None) -> pd.DataFrame:
+        """
+        Liste les scénarios, du plus récent au plus ancien, filtrés par foyer, prix du bien et date.
+
+        Les dates sont au format ISO (`"2025-01-31"` ou `"2025-01-31T18:00:00"`) ; `jusqu_a` est inclus.
+
+        Returns:
+            pd.DataFrame: Une ligne par scénario (id, foyer, nom, prix_bien, enregistre_le, empreinte).
+        """
+        conditions, valeurs = [], []
+        for condition, valeur in [
+            ("foyer = ?", foyer),
+            ("prix_bien >= ?", prix_min),
+            ("prix_bien <= ?", prix_max),
+            ("enregistre_le >= ?", depuis),
+            # Une date seule inclut toute la journée
+            ("enregistre_le <= ?", f"{jusqu_a}T99" if jusqu_a is not None and "T" not in jusqu_a else jusqu_a),
+        ]:
+            if valeur is not None:
+                conditions.append(condition)
+                valeurs.append(valeur)
+        filtre = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._connexion() as connexion:
+            return pd.read_sql_query(
+                f"SELECT id, foyer, nom, prix_bien, enregistre_le, empreinte FROM scenarios {filtre} ORDER BY enregistre_le DESC, id DESC",
+                connexion,
+                params=valeurs
+            )
+
+    def foyers(self) -> list:
+        """Retourne la liste triée des foyers ayant au moins un scénario."""
+        with self._connexion() as connexion:
+            return [ligne[0] for ligne in connexion.execute("SELECT DISTINCT foyer FROM scenarios ORDER BY foyer")]
+
+    def charger(self, identifiant: int) -> dict:
+        """
+        Charge un scénario complet.
+
+        Returns:
+            dict: id, foyer, nom, prix_bien, enregistre_le, saisies, parametres et df_prets (résultats stockés).
+        """
+        with self._connexion() as connexion:
+            connexion.row_factory = sqlite3.Row
+            ligne = connexion.execute("SELECT * FROM scenarios WHERE id = ?", (identifiant,)).fetchone()
+            if ligne is None:
+                raise KeyError(f"Scénario introuvable : {identifiant}")
+            scenario = dict(ligne)
+            resultats = self._lire_resultats(connexion, [scenario["empreinte"]])
+        scenario["saisies"] = json.loads(scenario["saisies"])
+        scenario["parametres"] = _depuis_json(scenario["parametres"])
+        scenario["df_prets"] = resultats.drop(columns="empreinte")
+        return scenario
+
+    def _lire_resultats(self, connexion, empreintes: list) -> pd.DataFrame:
+        """Relit les résultats de plusieurs empreintes, au format de `df_prets` (plus la colonne `empreinte`)."""
+        morceaux = [
+            pd.read_sql_query(
+                f"SELECT * FROM resultats WHERE empreinte IN ({', '.join('?' * len(paquet))}) ORDER BY empreinte, duree_annees",
+                connexion,
+                params=paquet
+            )
+            for paquet in _par_paquets(empreintes)
+        ]
+        df = pd.concat(morceaux, ignore_index=True) if morceaux else pd.DataFrame(columns=["empreinte", "duree_annees", *COLONNES_RESULTATS, "verdict", "supplement"])
+        # Un TAEG indéfini est relu NULL : la colonne reste numérique (NaN), comme dans `df_prets`
+        df = df.astype({colonne: float for colonne in COLONNES_RESULTATS})
+        supplements = df.pop("supplement")
+        if supplements.notna().any():
+            df = df.join(pd.DataFrame([json.loads(supplement) if supplement else {} for supplement in supplements], index=df.index))
+        return df.rename(columns={"verdict": "Verdict"})
+
+    # --- Comparaison ---
+
+    def comparer(self, identifiants: list, durees_taux: dict = None) -> pd.DataFrame:
+        """
+        Compare plusieurs scénarios enregistrés, en réutilisant les résultats stockés.
+
+        Args:
+            identifiants (list): Identifiants des scénarios à comparer.
+            durees_taux (dict, optional): Grille de taux {durée en années: taux nominal en %} à appliquer
+                à tous les scénarios (ex. taux actuels du marché) à la place de celle enregistrée.
+
+        Un scénario n'est recalculé que si ses paramètres diffèrent de ceux des résultats déjà en base
+        (nouvelle grille de taux) ; les résultats recalculés sont ajoutés à la base, si bien qu'une
+        nouvelle comparaison aux mêmes taux ne recalcule plus rien (dans la limite de
+        MAX_RESULTATS_TEMPORAIRES jeux de résultats qu'aucun scénario ne référence).
+
+        Returns:
+            pd.DataFrame: Une ligne par scénario et par durée : id, foyer, nom, prix_bien, enregistre_le,
+            les colonnes de `df_prets` et `recalcule` (True si le résultat vient d'être calculé).
+        """
+        identifiants = [int(identifiant) for identifiant in identifiants]
+        with self._connexion() as connexion:
+            scenarios = pd.concat([
+                pd.read_sql_query(
+                    f"SELECT id, foyer, nom, prix_bien, enregistre_le, parametres, empreinte FROM scenarios WHERE id IN ({', '.join('?' * len(paquet))})",
+                    connexion,
+                    params=paquet
+                )
+                for paquet in _par_paquets(identifiants)
+            ] or [pd.DataFrame(columns=["id", "foyer", "nom", "prix_bien", "enregistre_le", "parametres", "empreinte"])], ignore_index=True)
+
+            parametres = [_depuis_json(texte) for texte in scenarios.pop("parametres")]
+            if durees_taux is not None:
+                parametres = [normaliser_parametres(**{**parametres_scenario, "durees_taux": durees_taux}) for parametres_scenario in parametres]
+                scenarios["empreinte"] = [calculer_cle(**parametres_scenario) for parametres_scenario in parametres]
+
+            connues = self._empreintes_connues(connexion, list(scenarios["empreinte"].unique()))
+            manquants = {
+                empreinte: parametres_scenario
+                for empreinte, parametres_scenario in zip(scenarios["empreinte"], parametres)
+                if empreinte not in connues
+            }
+            a_calculer = dict(zip(manquants, calculer_comparatifs(list(manquants.values()))))
+            if a_calculer:
+                self._inserer_resultats(connexion, a_calculer)
+            if durees_taux is not None:
+                self._limiter_temporaires(connexion, list(scenarios["empreinte"].unique()))
+            resultats = self._lire_resultats(connexion, list(scenarios["empreinte"].unique()))
+
+        resultats["recalcule"] = resultats["empreinte"].isin(list(a_calculer))
+        ordre = {identifiant: position for position, identifiant in enumerate(identifiants)}
+        return (
+            scenarios.merge(resultats, on="empreinte")
+            .sort_values(["id", "duree_annees"], key=lambda colonne: colonne.map(ordre) if colonne.name == "id" else colonne, kind="stable")
+            .drop(columns="empreinte")
+            .reset_index(drop=True)
+        )
@@ -0,0 +1,817 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+from datetime import date
+from functools import lru_cache
+from dateutil.relativedelta import relativedelta
+
+from utils import *
+from mesures import Compteurs, exporter_prometheus, mesurer
+from scenarios import BaseScenarios
+
+# --- Sections à recalcul partiel ---
+# Chaque section ci-dessous est un fragment Streamlit : modifier un de ses widgets ne relance que
+# la section elle-même, sans recalculer la synthèse, le comparatif ni le graphique.
+
+@st.fragment
+@mesurer()
+def section_date_achat(
+    montant_bien: float,
+    epargne_totale: float,
+    epargne_mensuelle: float,
+    salaire_total: float,
+    durees_taux: dict,
+    taux_assurance_pct: float,
+    frais_notaire_pct: float,
+    apport_souhaite_pct: float,
+    taux_endettement_max_pct: float
+):
+    # --- PROJECTION DE L'ÉPARGNE ET DATE D'ACHAT AU PLUS TÔT ---
+    with st.expander("📈 Hypothèses de projection"):
+        col_p1, col_p2, col_p3, col_p4 = st.columns(4)
+        rendement_epargne_pct = col_p1.number_input("Rendement de l'épargne (%/an)", min_value=0.0, max_value=10.0, value=2.4, step=0.1, key='rendement_epargne')
+        croissance_revenus_pct = col_p2.number_input("Hausse des revenus (%/an)", min_value=-5.0, max_value=10.0, value=2.0, step=0.1, key='croissance_revenus')
+        evolution_prix_pct = col_p3.number_input("Évolution des prix (%/an)", min_value=-10.0, max_value=10.0, value=1.0, step=0.1, key='evolution_prix')
+        duree_projection = col_p4.selectbox("Durée du prêt", options=list(durees_taux), index=len(durees_taux) - 1, format_func=lambda x: f"{x} ans", key='duree_projection')
+
+    # Grille de prix autour du prix visé (de 50 % à 150 %), le prix visé compris
+    prix_biens = np.union1d(np.linspace(0.5, 1.5, 101) * montant_bien, [montant_bien])
+    df_dates = calculer_date_achat_au_plus_tot(
+        prix_biens,
+        epargne_totale,
+        epargne_mensuelle,
+        salaire_total,
+        durees_taux[duree_projection],
+        duree_projection,
+        taux_assurance_pct,
+        frais_notaire_pct,
+        apport_souhaite_pct,
+        taux_endettement_max_pct,
+        rendement_epargne_pct,
+        croissance_revenus_pct,
+        evolution_prix_pct
+    )
+    achat = df_dates[df_dates['prix_bien'] == montant_bien].iloc[0]
+
+    if np.isnan(achat['mois_achat']):
+        st.warning("Avec ces hypothèses, l'apport et le taux d'endettement ne sont pas réunis dans les 30 prochaines années pour ce bien.")
+    elif achat['mois_achat'] == 0:
+        st.success(f"Vous pouvez acheter dès aujourd'hui avec un prêt sur {duree_projection} ans (taux d'endettement de {achat['taux_endettement_pct']:.1f} %).")
+    else:
+        date_achat = date.today() + relativedelta(months=int(achat['mois_achat']))
+        st.info(
+            f"Il vous faut encore {formater_duree(achat['mois_achat'])}, soit jusqu'en {formater_mois_annee(date_achat)} : "
+            f"le bien coûtera alors {formater_nombre(achat['prix_achat'])}, avec un apport de {formater_nombre(achat['apport'])} "
+            f"et un taux d'endettement de {achat['taux_endettement_pct']:.1f} % sur {duree_projection} ans."
+        )
+
+    st.plotly_chart(creation_graph_date_achat(df_dates, montant_bien), use_container_width=True)
+
+
+@st.fragment
+@mesurer()
+def section_remboursement_anticipe(df_prets: pd.DataFrame):
+    col_ra1, col_ra2 = st.columns(2)
+    with col_ra1:
+        montant_remboursement_anticipe = st.number_input(
+            "Montant du remboursement anticipé (€)",
+            min_value=0,
+            step=500,
+            help="Combien souhaitez-vous rembourser en une seule fois ?",
+            key='montant_remboursement_anticipe'
+        )
+    with col_ra2:
+        annee_remboursement = st.slider(
+            "Année du remboursement",
+            min_value=1,
+            max_value=25, 
+            value=5,
+            help="Au bout de combien d'années prévoyez-vous de faire ce remboursement ?",
+            disabled=(montant_remboursement_anticipe == 0),
+            key='annee_remboursement'
+        )
+
+        resultats_ra_list = []
+
+    if montant_remboursement_anticipe>0:
+
+        choix_impact = st.radio(
+            "Quel est l'objectif de ce remboursement ?",
+            options=CHOIX_IMPACT,
+            horizontal=True,
+            index=0, # Par défaut, on cherche à réduire la durée
+            key='choix_impact'
+        )
+
+        # On itère sur df_prets
+        for index, pret_initial in df_prets.iterrows():
+
+            # On ne fait le calcul que si l'année du RA est inférieure à la durée du prêt
+            if annee_remboursement < pret_initial['duree_annees']:
+
+                sim_ra = calculer_remboursement_anticipe(
+                    choix_impact=choix_impact,
+                    mensualite_hors_assurance=pret_initial['mensualite_hors_assurance'],
+                    duree_initiale_mois=pret_initial['duree_annees']*12,
+                    taux_mensuel_nominal=pret_initial['taux_nominal_pct']/1200,
+                    annee_remboursement=annee_remboursement,
+                    montant_remboursement_anticipe=montant_remboursement_anticipe
+                )
+
+                # On calcule le gain sur l'assurance
+                gain_assurance = (pret_initial['mensualite_avec_assurance'] - pret_initial['mensualite_hors_assurance']) * sim_ra['duree_reduite_mois']
+                gain_total = sim_ra['gain_interets'] + gain_assurance
+
+                # On stocke les résultats de cette simulation dans un dictionnaire
+
+                resultat = {
+                    "Durée Initiale": f"{pret_initial['duree_annees']} ans",
+                    "Gain Total Estimé": formater_nombre(gain_total)
+                }
+
+                if choix_impact == "Réduire la durée du prêt":
+                    resultat["Nouvelle Durée"] = formater_duree(sim_ra['nouvelle_duree_totale_ans'] * 12)
+                    resultat["Temps Économisé"] = formater_duree(sim_ra['duree_reduite_mois'])
+                else: # "Réduire les mensualités"
+                    mensualite_initale = pret_initial['mensualite_avec_assurance']
+                    # On ajoute le coût de l'assurance à la nouvelle mensualité de crédit
+                    nouvelle_mensualite_avec_assurance = sim_ra['nouvelle_mensualite'] + (mensualite_initale - pret_initial['mensualite_hors_assurance'])
+
+                    resultat["Ancienne Mensualité"] = formater_nombre(mensualite_initale)
+                    resultat["Nouvelle Mensualité"] = formater_nombre(nouvelle_mensualite_avec_assurance)
+                    resultat["Baisse par mois"] = formater_nombre(sim_ra['reduction_mensualite'])
+
+                resultats_ra_list.append(resultat)
+
+
+        # On vérifie si on a des résultats à afficher
+        if resultats_ra_list:
+            df_ra = pd.DataFrame(resultats_ra_list)
+
+            if choix_impact == "Réduire la durée du prêt":
+                colonnes_ordonnees = ["Durée Initiale", "Nouvelle Durée", "Temps Économisé", "Gain Total Estimé"]
+            else:
+                colonnes_ordonnees = ["Durée Initiale", "Ancienne Mensualité", "Nouvelle Mensualité", "Baisse par mois", "Gain Total Estimé"]
+
+            # On filtre le DataFrame pour n'avoir que les colonnes pertinentes et dans l'ordre
+            df_ra = df_ra[colonnes_ordonnees]
+
+            st.dataframe(
+                df_ra,
+                hide_index=True,
+                use_container_width=True
+            )
+
+            with st.expander("🤔 Comment est calculé le gain ?"):
+                if choix_impact == "Réduire la durée du prêt":
+                    st.info(
+                        """
+                        Pourquoi le temps économisé est-il si important ?
+
+                        **Ce n'est pas une simple division !**
+
+                        Un remboursement anticipé ne supprime pas simplement les "dernières" mensualités. Il s'attaque directement au **capital restant dû**.
+
+                        **Voici l'effet "boule de neige" :**
+                        1.  Votre capital à rembourser diminue instantanément.
+                        2.  Dès le mois suivant, les **intérêts sont calculés sur un capital plus faible**, et sont donc moins élevés.
+                        3.  Comme votre mensualité reste la même, une **plus grande partie sert à rembourser le capital**, ce qui accélère encore plus le processus.
+
+                        Vous économisez donc non seulement le montant remboursé, mais surtout **tous les intérêts que ce montant aurait générés jusqu'à la fin du prêt.**
+                        """
+                    )
+                else: # "Réduire les mensualités"
+                    st.info(
+                        """
+                        A quoi ça sert ?
+
+                        **Plus de souplesse pour votre budget.**
+
+                        **Voici l'effet "Respiration Financière" :**
+                        1.  Votre capital à rembourser (**capital restant dû**) diminue instantanément.
+                        2.  La banque **recalcule une nouvelle mensualité** pour la même durée restante, mais sur ce capital réduit.
+                        3.  Puisque vous devez moins d'argent au total, votre nouvelle mensualité est mathématiquement plus faible, vous donnant **plus de pouvoir d'achat chaque mois**.
+
+                        Le "Gain Total Estimé" représente **l'économie totale d'intérêts** que vous réaliserez sur toute la durée restante du prêt grâce à ce capital réduit.
+                        """
+                    )
+        else:
+            st.warning("L'année de remboursement choisie est supérieure ou égale aux durées des prêts. Aucune simulation n'est possible.")
+
+
+@st.fragment
+@mesurer()
+def section_remboursements_multiples(df_prets: pd.DataFrame, montant_a_emprunter: float, taux_assurance_pct: float):
+    # --- PLUSIEURS REMBOURSEMENTS ANTICIPÉS ---
+    st.markdown("---")
+    st.subheader("🔁 Plusieurs remboursements anticipés")
+    st.caption("Ajoutez autant de remboursements que vous le souhaitez, à n'importe quel mois du prêt.")
+
+    df_evenements = st.data_editor(
+        pd.DataFrame({
+            "Mois": pd.Series([60], dtype="int64"),
+            "Montant (€)": pd.Series([10000], dtype="int64"),
+            "Objectif": pd.Series([CHOIX_IMPACT[0]], dtype="object"),
+        }),
+        column_config={
+            "Mois": st.column_config.NumberColumn(min_value=1, max_value=299, step=1, help="Nombre de mensualités déjà payées au moment du remboursement."),
+            "Montant (€)": st.column_config.NumberColumn(min_value=0, step=500),
+            "Objectif": st.column_config.SelectboxColumn(options=CHOIX_IMPACT, required=True),
+        },
+        num_rows="dynamic",
+        hide_index=True,
+        use_container_width=True,
+        key='evenements_ra'
+    )
+
+    evenements = [
+        {"mois": int(ligne["Mois"]), "montant": float(ligne["Montant (€)"]), "choix_impact": ligne["Objectif"]}
+        for _, ligne in df_evenements.dropna().iterrows()
+    ]
+
+    if evenements:
+        resultats_multiples = []
+        jalons_multiples = []
+        for _, pret_initial in df_prets.iterrows():
+            sim_multiple = simuler_remboursements_multiples(
+                montant_a_emprunter,
+                pret_initial['taux_nominal_pct'],
+                pret_initial['duree_annees'],
+                taux_assurance_pct,
+                evenements
+            )
+            resultats_multiples.append({
+                "Durée Initiale": f"{pret_initial['duree_annees']} ans",
+                "Nouvelle Durée": formater_duree(sim_multiple['nouvelle_duree_totale_mois']),
+                "Temps Économisé": formater_duree(sim_multiple['duree_reduite_mois']),
+                "Mensualité Finale": formater_nombre(sim_multiple['nouvelle_mensualite'] + sim_multiple['mensualite_assurance']),
+                "Gain Total Estimé": formater_nombre(sim_multiple['gain_total'])
+            })
+            for jalon in sim_multiple['jalons']:
+                jalons_multiples.append({
+                    "Prêt": f"{pret_initial['duree_annees']} ans",
+                    "Mois": jalon['mois'],
+                    "Montant remboursé": formater_nombre(jalon['montant']),
+                    "Objectif": jalon['choix_impact'],
+                    "Capital restant dû": formater_nombre(jalon['capital_restant_du_apres']),
+                    "Nouvelle mensualité (hors assurance)": formater_nombre(jalon['nouvelle_mensualite']),
+                    "Durée restante": formater_duree(jalon['duree_restante_mois'])
+                })
+
+        st.dataframe(pd.DataFrame(resultats_multiples), hide_index=True, use_container_width=True)
+
+        with st.expander("📋 Détail des remboursements appliqués"):
+            st.dataframe(pd.DataFrame(jalons_multiples), hide_index=True, use_container_width=True)
+
+
+@st.fragment
+@mesurer()
+def section_carte_remboursement(df_prets: pd.DataFrame):
+    # --- CARTE DES GAINS SUR TOUTE LA GRILLE MONTANT x ANNÉE ---
+    st.markdown("---")
+    st.subheader("🗺️ Trouver le meilleur moment pour rembourser")
+
+    grille_ra = calculer_grille_remboursement_anticipe(
+        df_prets,
+        montants=np.arange(0, 100_001, 500),
+        annees=np.arange(1, 26)
+    )
+
+    col_carte1, col_carte2 = st.columns(2)
+    with col_carte1:
+        indice_pret_carte = st.selectbox(
+            "Prêt",
+            options=range(len(grille_ra['durees_annees'])),
+            format_func=lambda i: f"{grille_ra['durees_annees'][i]} ans",
+            key='pret_carte_ra'
+        )
+    with col_carte2:
+        indice_choix_carte = st.radio(
+            "Objectif",
+            options=range(len(CHOIX_IMPACT)),
+            format_func=lambda i: CHOIX_IMPACT[i],
+            horizontal=True,
+            key='choix_carte_ra'
+        )
+
+    fig_carte = creation_heatmap_remboursement(grille_ra, indice_pret_carte, indice_choix_carte)
+    st.plotly_chart(fig_carte, use_container_width=True)
+
+
+@st.fragment
+@mesurer()
+def section_rachat_credit(df_prets: pd.DataFrame, frais_dossier: float, frais_garantie_pct: float):
+    # --- RACHAT DE CRÉDIT : NOUVEAU TAUX x MOIS DU RACHAT ---
+    st.markdown("---")
+    st.subheader("🔁 Faire racheter ou renégocier son prêt")
+
+    grille_rachat = calculer_grille_rachat(
+        df_prets,
+        nouveaux_taux_pct=np.round(np.arange(0.5, 5.01, 0.05), 2),
+        mois_rachat=np.arange(1, int(df_prets['duree_annees'].max()) * 12),
+        nouvelles_durees_annees=[10, 15, 20, 25],
+        frais_dossier=frais_dossier,
+        frais_garantie_pct=frais_garantie_pct
+    )
+
+    col_rachat1, col_rachat2, col_rachat3 = st.columns(3)
+    with col_rachat1:
+        indice_pret_rachat = st.selectbox(
+            "Prêt actuel",
+            options=range(len(grille_rachat['durees_annees'])),
+            format_func=lambda i: f"{grille_rachat['durees_annees'][i]} ans",
+            key='pret_rachat'
+        )
+    with col_rachat2:
+        indice_duree_rachat = st.selectbox(
+            "Durée du nouveau prêt",
+            options=range(len(grille_rachat['nouvelles_durees_annees'])),
+            format_func=lambda i: f"{grille_rachat['nouvelles_durees_annees'][i]} ans",
+            index=1,
+            key='duree_rachat'
+        )
+    with col_rachat3:
+        indicateur_rachat = st.radio(
+            "Afficher",
+            options=['economie_nette', 'mois_equilibre'],
+            format_func=lambda x: {'economie_nette': "Économie nette", 'mois_equilibre': "Délai de rentabilité"}[x],
+            horizontal=True,
+            key='indicateur_rachat'
+        )
+
+    fig_rachat = creation_heatmap_rachat(grille_rachat, indice_pret_rachat, indice_duree_rachat, indicateur_rachat)
+    st.plotly_chart(fig_rachat, use_container_width=True)
+    st.caption(
+        "Les indemnités de remboursement anticipé (6 mois d'intérêts, dans la limite de 3 % du capital restant dû) "
+        f"et les frais du nouveau prêt ({formater_nombre(frais_dossier)} de dossier, {frais_garantie_pct:.1f} % de garantie) sont déduits des économies."
+    )
+
+
+@st.fragment
+@mesurer()
+def section_sensibilite(durees_taux: dict, montant_a_emprunter: float, taux_assurance_pct: float, salaire_total: float, taux_endettement_max_pct: float):
+    # --- SENSIBILITÉ AU TAUX ET À LA DURÉE ---
+    indicateur = st.radio(
+        "Afficher",
+        options=['mensualite_avec_assurance', 'cout_total_credit', 'taux_endettement_pct'],
+        format_func=lambda x: {
+            'mensualite_avec_assurance': "Mensualité",
+            'cout_total_credit': "Coût total",
+            'taux_endettement_pct': "Endettement",
+        }[x],
+        horizontal=True,
+        key='indicateur_sensibilite'
+    )
+
+    taux_max = max(6.0, max(durees_taux.values()) + 1.0)
+    surface = calculer_surface_sensibilite(
+        montant_a_emprunter,
+        np.round(np.arange(0.5, taux_max + 0.001, 0.05), 2),
+        np.arange(60, 361),
+        taux_assurance_pct,
+        salaire_total,
+        taux_endettement_max_pct
+    )
+    st.plotly_chart(creation_surface_sensibilite(surface, indicateur, durees_taux, taux_endettement_max_pct), use_container_width=True)
+
+    # Dérivées exactes aux taux et durées de la barre latérale
+    sensibilites = calculer_sensibilites(
+        montant_a_emprunter,
+        np.array(list(durees_taux.values()), dtype=float),
+        np.array(list(durees_taux)) * 12,
+        taux_assurance_pct,
+        salaire_total,
+        taux_endettement_max_pct
+    )
+    if indicateur == 'taux_endettement_pct':
+        prefixe, formater = 'taux_endettement', lambda x: f"{x:+.2f} pt".replace('.', ',')
+    else:
+        prefixe = 'mensualite' if indicateur == 'mensualite_avec_assurance' else 'cout'
+        formater = lambda x: ('+' if x >= 0 else '-') + formater_nombre(abs(x))
+    st.dataframe(
+        pd.DataFrame({
+            "Durée (ans)": list(durees_taux),
+            "+0,1 pt de taux": [formater(x) for x in sensibilites[f"{prefixe}_par_01_pt"]],
+            "+1 an": [formater(x) for x in sensibilites[f"{prefixe}_par_annee"]],
+        }),
+        column_config={"Durée (ans)": st.column_config.NumberColumn(format="%d ans")},
+        hide_index=True,
+        use_container_width=True
+    )
+    st.caption("Variations au premier ordre, calculées par dérivation des formules de la mensualité.")
+
+
+@st.fragment
+@mesurer()
+def section_tableau_amortissement(df_prets: pd.DataFrame, montant_a_emprunter: float, taux_assurance_pct: float, tranches: list = None):
+    # --- TABLEAU D'AMORTISSEMENT ---
+    st.subheader("📅 Tableau d'amortissement")
+
+    duree_amortissement = st.selectbox(
+        "Durée du prêt",
+        options=df_prets['duree_annees'].tolist(),
+        format_func=lambda x: f"{x} ans",
+        key='duree_amortissement'
+    )
+    pret_selectionne = df_prets[df_prets['duree_annees'] == duree_amortissement].iloc[0]
+
+    if tranches:
+        # Échéancier combiné : prêt principal lissé et prêts complémentaires
+        df_amortissement = generer_echeancier_lisse(
+            montant_a_emprunter,
+            pret_selectionne['taux_nominal_pct'],
+            duree_amortissement,
+            taux_assurance_pct,
+            tranches
+        )
+        colonnes = {
+            'mois': 'Mois',
+            'mensualite_avec_assurance': 'Mensualité',
+            'pret_principal': 'Prêt principal',
+            **{tranche['nom']: tranche['nom'] for tranche in tranches},
+            'interets': 'Intérêts',
+            'assurance': 'Assurance',
+            'capital_restant_du': 'Capital restant dû'
+        }
+    else:
+        df_amortissement = generer_tableau_amortissement(
+            montant_a_emprunter,
+            pret_selectionne['taux_nominal_pct'],
+            duree_amortissement,
+            taux_assurance_pct
+        )
+        colonnes = {
+            'mois': 'Mois',
+            'mensualite_avec_assurance': 'Mensualité',
+            'mensualite_hors_assurance': 'Mensualité hors assurance',
+            'interets': 'Intérêts',
+            'capital_rembourse': 'Capital remboursé',
+            'assurance': 'Assurance',
+            'capital_restant_du': 'Capital restant dû'
+        }
+
+    st.dataframe(
+        df_amortissement[list(colonnes)].rename(columns=colonnes),
+        column_config={
+            "Mois": st.column_config.NumberColumn(format="%d"),
+            **{
+                colonne: st.column_config.NumberColumn(format="%.2f €")
+                for colonne in list(colonnes.values())[1:]
+            }
+        },
+        hide_index=True,
+        use_container_width=True,
+        height=400
+    )
+    st.plotly_chart(creation_graph_amortissement(df_amortissement), use_container_width=True)
+
+
+@st.fragment
+@mesurer()
+def section_taux_variable(durees_taux: dict, montant_a_emprunter: float, taux_assurance_pct: float, salaire_total: float, taux_endettement_max_pct: float):
+    col_tv1, col_tv2, col_tv3 = st.columns(3)
+    with col_tv1:
+        duree_tv = st.selectbox("Durée du prêt", options=list(durees_taux), format_func=lambda x: f"{x} ans", key='duree_tv')
+        type_cap = st.radio("Type de prêt", options=["Capé ±1", "Capé ±2", "Non capé"], horizontal=True, key='cap_tv')
+    with col_tv2:
+        indice_initial_pct = st.number_input("Indice actuel (Euribor 12 mois, %)", value=2.30, step=0.05, format="%.2f", key='indice_tv')
+        marge_pct = st.number_input("Marge de la banque (%)", value=1.00, step=0.05, format="%.2f", key='marge_tv')
+    with col_tv3:
+        volatilite_pct = st.slider("Volatilité annuelle de l'indice (points)", min_value=0.0, max_value=2.0, value=0.8, step=0.1, key='volatilite_tv')
+        n_chemins = st.select_slider("Nombre de scénarios", options=[1_000, 5_000, 10_000, 50_000], value=10_000, key='chemins_tv')
+
+    resultats = simuler_taux_variable(
+        montant_a_emprunter,
+        duree_tv,
+        marge_pct,
+        indice_initial_pct,
+        taux_assurance_pct,
+        salaire_total,
+        cap_pct={"Capé ±1": 1.0, "Capé ±2": 2.0, "Non capé": None}[type_cap],
+        volatilite_pct=volatilite_pct,
+        n_chemins=n_chemins,
+        graine=0
+    )
+    resume = resumer_simulation(resultats)
+    pret_fixe = calculer_details_pret(montant_a_emprunter, durees_taux[duree_tv], duree_tv, taux_assurance_pct, taux_endettement_max_pct)
+
+    col_m1, col_m2, col_m3 = st.columns(3)
+    col_m1.metric("Coût total médian", formater_nombre(resume.loc['cout_total_credit', 'p50']),
+                  delta=formater_nombre(resume.loc['cout_total_credit', 'p50'] - pret_fixe['cout_total_credit']) + " vs taux fixe",
+                  delta_color="inverse")
+    col_m2.metric("Mensualité maximale (95 % des cas)", formater_nombre(resume.loc['mensualite_max', 'p95']))
+    col_m3.metric("Endettement maximal (95 % des cas)", f"{resume.loc['taux_endettement_max_pct', 'p95']:.1f} %")
+
+    part_au_dela = (resultats['taux_endettement_max_pct'] > taux_endettement_max_pct).mean() * 100
+    if part_au_dela > 0:
+        st.warning(f"Dans {part_au_dela:.0f} % des scénarios, votre taux d'endettement dépasse {taux_endettement_max_pct:.1f} % à un moment du prêt.")
+
+    st.plotly_chart(creation_histogramme_taux_variable(resultats, pret_fixe['cout_total_credit']), use_container_width=True)
+
+    with st.expander("📋 Détail des distributions"):
+        libelles = {
+            'mensualite_max': "Mensualité maximale",
+            'mensualite_moyenne': "Mensualité moyenne",
+            'cout_total_credit': "Coût total du crédit",
+            'taux_max_pct': "Taux maximal (%)",
+            'taux_endettement_max_pct': "Endettement maximal (%)",
+        }
+        df_resume = resume.rename(index=libelles, columns={'moyenne': 'Moyenne', 'p5': '5 %', 'p50': 'Médiane', 'p95': '95 %'})
+        st.dataframe(df_resume.style.format("{:,.2f}", thousands=" ", decimal=","), use_container_width=True)
+
+
+@st.fragment
+@mesurer()
+def section_optimiseur(
+    montant_bien: float,
+    frais_notaire_pct: float,
+    epargne_totale: float,
+    epargne_mensuelle_totale: float,
+    salaire_total: float,
+    durees_taux: dict,
+    taux_assurance_pct: float,
+    taux_endettement_max_pct: float
+):
+    # --- PLAN DE FINANCEMENT OPTIMAL ---
+    col_o1, col_o2, col_o3 = st.columns(3)
+    objectif = col_o1.radio("Objectif", options=list(OBJECTIFS_OPTIMISATION), format_func=OBJECTIFS_OPTIMISATION.get, key='objectif_optimiseur')
+    epargne_precaution = col_o2.number_input(
+        "Épargne de précaution (€)",
+        min_value=0,
+        value=0,
+        step=1000,
+        key='epargne_precaution',
+        help="Part de l'épargne disponible à conserver : elle ne sert pas d'apport."
+    )
+    rendement_epargne_pct = col_o3.number_input(
+        "Rendement de l'épargne (%/an)",
+        min_value=0.0,
+        max_value=10.0,
+        value=2.4,
+        step=0.1,
+        key='rendement_optimiseur',
+        help="L'épargne non engagée dans le projet (apport et remboursements anticipés) rapporte ce taux jusqu'à l'horizon."
+    )
+
+    resultat = optimiser_financement(
+        montant_bien,
+        frais_notaire_pct,
+        epargne_totale,
+        epargne_mensuelle_totale,
+        salaire_total,
+        durees_taux,
+        taux_assurance_pct,
+        taux_endettement_max_pct,
+        objectif,
+        epargne_precaution,
+        rendement_epargne_pct
+    )
+    plan = resultat['meilleure']
+    if plan is None:
+        st.warning(f"Aucun plan ne respecte un taux d'endettement de {taux_endettement_max_pct:.1f} %, même avec toute l'épargne disponible en apport.")
+        return
+
+    col_m1, col_m2, col_m3, col_m4 = st.columns(4)
+    col_m1.metric("Durée du prêt", formater_duree(plan['duree_mois']), f"taux de {plan['taux_nominal_pct']:.2f} %", delta_color="off")
+    col_m2.metric("Apport", formater_nombre(plan['apport']), f"emprunt de {formater_nombre(plan['montant_a_emprunter'])}", delta_color="off")
+    col_m3.metric("Coût total du crédit", formater_nombre(plan['cout_total_credit']))
+    col_m4.metric(f"Épargne dans {formater_duree(resultat['horizon_mois'])}", formater_nombre(plan['epargne_restante']))
+
+    if plan['nombre_remboursements']:
+        st.info(
+            f"Mensualité de {formater_nombre(plan['mensualite_avec_assurance'])} ({plan['taux_endettement_pct']:.1f} % d'endettement), "
+            f"puis un remboursement anticipé de {formater_nombre(plan['montant_remboursement'])} tous les {plan['periode_mois']} mois "
+            f"({plan['part_epargne_pct']:.0f} % de l'épargne mensuelle, objectif : « {plan['choix_impact'].lower()} »). "
+            f"Le prêt est soldé en {formater_duree(plan['duree_effective_mois'])}, après {plan['nombre_remboursements']} remboursement(s) "
+            f"pour un total de {formater_nombre(plan['total_rembourse'])}."
+        )
+    else:
+        st.info(
+            f"Mensualité de {formater_nombre(plan['mensualite_avec_assurance'])} ({plan['taux_endettement_pct']:.1f} % d'endettement), "
+            "sans remboursement anticipé : l'épargne mensuelle reste placée."
+        )
+
+    st.plotly_chart(creation_graph_pareto(resultat['solutions'], resultat['front'], plan), use_container_width=True)
+
+    front = resultat['front']
+    with st.expander(f"📋 Les {len(front)} plans non dominés"):
+        st.dataframe(
+            pd.DataFrame({
+                "Durée": front['duree_mois'].apply(formater_duree),
+                "Taux nominal (%)": front['taux_nominal_pct'],
+                "Apport": front['apport'].apply(formater_nombre),
+                "Mensualité": front['mensualite_avec_assurance'].apply(formater_nombre),
+                "Remboursement anticipé": [
+                    f"{formater_nombre(ligne.montant_remboursement)} tous les {ligne.periode_mois} mois ({ligne.choix_impact.lower()})"
+                    if ligne.nombre_remboursements else "Aucun"
+                    for ligne in front.itertuples()
+                ],
+                "Prêt soldé en": front['duree_effective_mois'].apply(formater_duree),
+                "Coût total du crédit": front['cout_total_credit'].apply(formater_nombre),
+                "Épargne restante": front['epargne_restante'].apply(formater_nombre),
+            }),
+            column_config={"Taux nominal (%)": st.column_config.NumberColumn(format="%.2f %%")},
+            hide_index=True,
+            use_container_width=True
+        )
+    nombre = lambda n: f"{n:,}".replace(",", " ")
+    st.caption(
+        f"{nombre(resultat['envisages'])} plans envisagés : {nombre(resultat['ecartes_endettement'])} écartés d'emblée pour le taux d'endettement, "
+        f"{nombre(resultat['simules'])} simulés, dont {len(front)} non dominés (aucun autre plan ne coûte moins en laissant autant d'épargne). "
+        "Les taux des durées intermédiaires sont interpolés entre ceux de la barre latérale."
+    )
+
+
+# Champs de l'application enregistrés avec un scénario et restaurés à son chargement
+CLES_SAISIES = [
+    'frais_notaire', 'apport_souhaite', 'taux_assurance', 'taux_endettement_max', 'frais_dossier', 'frais_garantie',
+    'taux_15_ans', 'taux_20_ans', 'taux_25_ans',
+    'montant_bien', 'salaire_a', 'epargne_a', 'epargne_m_a', 'salaire_b', 'epargne_b', 'epargne_m_b', 'apport',
+    'montant_ptz', 'duree_ptz', 'differe_ptz', 'montant_employeur', 'taux_employeur', 'duree_employeur',
+]
+
+
+@st.fragment
+@mesurer()
+def section_export(
+    informations: list,
+    df_prets: pd.DataFrame,
+    montant_a_emprunter: float,
+    taux_assurance_pct: float,
+    tranches: list = None,
+    df_prets_remboursement: pd.DataFrame = None
+):
+    # --- EXPORT DE LA SIMULATION ---
+    st.subheader("📥 Exporter la simulation")
+    col_format, col_preparer, col_telecharger = st.columns([2, 1, 1], vertical_alignment="bottom")
+    format_export = col_format.radio(
+        "Format",
+        options=list(FORMATS_EXPORT),
+        format_func={'xlsx': "Excel", 'csv': "CSV (archive zip)", 'pdf': "PDF"}.get,
+        horizontal=True,
+        key='format_export',
+        help="Informations du dossier, comparatif des prêts, remboursement anticipé de l'onglet suivant et tableaux d'amortissement."
+    )
+    if col_preparer.button("Préparer le fichier", use_container_width=True):
+        # Le remboursement anticipé est celui saisi dans l'onglet « Remboursement anticipé »
+        remboursement = {
+            'montant_remboursement_anticipe': st.session_state.get('montant_remboursement_anticipe', 0),
+            'annee_remboursement': st.session_state.get('annee_remboursement', 5),
+            'choix_impact': st.session_state.get('choix_impact', CHOIX_IMPACT[0]),
+        }
+        simulation = preparer_simulation(
+            informations, df_prets, montant_a_emprunter, taux_assurance_pct, tranches, remboursement, df_prets_remboursement
+        )
+        extension, type_mime = FORMATS_EXPORT[format_export]
+        col_telecharger.download_button(
+            "Télécharger",
+            data=exporter_simulation(simulation, format_export),
+            file_name=f"simulation_pret_{date.today():%Y%m%d}{extension}",
+            mime=type_mime,
+            on_click="ignore",
+            type="primary",
+            use_container_width=True
+        )
+
+
+@lru_cache(maxsize=1)
+def _base_scenarios() -> BaseScenarios:
+    return BaseScenarios()
+
+
+def _charger_scenario(identifiant: int):
+    # Rappel du bouton « Charger » : exécuté avant le rerun, quand les champs peuvent encore être modifiés
+    scenario = _base_scenarios().charger(identifiant)
+    for cle, valeur in scenario['saisies'].items():
+        st.session_state[cle] = valeur
+    st.session_state['_scenario_charge'] = f"{scenario['nom']} ({scenario['foyer']})"
+    st.session_state['_relancer_application'] = True
+
+
+@st.fragment
+@mesurer()
+def section_scenarios(montant_bien: float, parametres: dict, df_prets: pd.DataFrame, durees_taux: dict):
+    # --- SCÉNARIOS ENREGISTRÉS ---
+    if st.session_state.pop('_relancer_application', False):
+        # Les champs chargés sont répartis sur toute la page : l'application entière est relancée
+        st.rerun()
+    if '_scenario_charge' in st.session_state:
+        st.success(f"Scénario « {st.session_state.pop('_scenario_charge')} » chargé.")
+
+    base = _base_scenarios()
+
+    st.subheader("💾 Enregistrer la simulation")
+    col_foyer, col_nom, col_bouton = st.columns([2, 2, 1], vertical_alignment="bottom")
+    foyer = col_foyer.text_input("Foyer", key='foyer_scenario', help="Par exemple le nom du ménage : les scénarios sont classés par foyer.")
+    nom = col_nom.text_input("Nom du scénario", key='nom_scenario', help="Un scénario de même nom est remplacé.")
+    if col_bouton.button("Enregistrer", disabled=parametres is None or not foyer.strip() or not nom.strip(), use_container_width=True):
+        base.enregistrer(
+            foyer.strip(),
+            nom.strip(),
+            montant_bien,
+            parametres,
+            saisies={cle: st.session_state[cle] for cle in CLES_SAISIES if cle in st.session_state},
+            df_prets=df_prets
+        )
+        st.toast(f"Scénario « {nom.strip()} » enregistré.")
+    if parametres is None:
+        st.caption("Complétez l'onglet configuration pour enregistrer une simulation.")
+
+    st.subheader("🗂️ Scénarios enregistrés")
+    col_f1, col_f2, col_f3, col_f4 = st.columns(4)
+    filtre_foyer = col_f1.selectbox("Foyer", options=[None, *base.foyers()], format_func=lambda x: "Tous" if x is None else x, key='filtre_foyer')
+    prix_min = col_f2.number_input("Prix minimal", min_value=0, value=None, step=10000, key='filtre_prix_min')
+    prix_max = col_f3.number_input("Prix maximal", min_value=0, value=None, step=10000, key='filtre_prix_max')
+    depuis = col_f4.date_input("Enregistré depuis le", value=None, format="DD/MM/YYYY", key='filtre_depuis')
+
+    df_scenarios = base.lister(filtre_foyer, prix_min, prix_max, depuis.isoformat() if depuis else None)
+    if df_scenarios.empty:
+        st.info("Aucun scénario enregistré pour ces critères.")
+        return
+
+    libelles = {ligne.id: f"{ligne.nom} ({ligne.foyer}, {formater_nombre(ligne.prix_bien)})" for ligne in df_scenarios.itertuples()}
+    st.dataframe(
+        pd.DataFrame({
+            "Foyer": df_scenarios['foyer'],
+            "Scénario": df_scenarios['nom'],
+            "Prix du bien": df_scenarios['prix_bien'].apply(formater_nombre),
+            "Enregistré le": pd.to_datetime(df_scenarios['enregistre_le']),
+        }),
+        column_config={"Enregistré le": st.column_config.DatetimeColumn(format="DD/MM/YYYY HH:mm")},
+        hide_index=True,
+        use_container_width=True
+    )
+
+    col_choix, col_charger, col_supprimer = st.columns([4, 1, 1], vertical_alignment="bottom")
+    identifiant = col_choix.selectbox("Scénario", options=list(libelles), format_func=libelles.get, key='scenario_selectionne')
+    col_charger.button("Charger", on_click=_charger_scenario, args=(identifiant,), use_container_width=True)
+    col_supprimer.button("Supprimer", on_click=base.supprimer, args=(identifiant,), use_container_width=True)
+
+    # --- COMPARAISON ---
+    st.subheader("⚖️ Comparer des scénarios")
+    selection = st.multiselect("Scénarios à comparer", options=list(libelles), format_func=libelles.get, key='scenarios_compares')
+    aux_taux_actuels = st.toggle(
+        "Aux taux actuels de la barre latérale",
+        key='comparer_taux_actuels',
+        help="Sinon, chaque scénario est comparé avec les taux enregistrés. Seuls les scénarios dont les taux changent sont recalculés."
+    )
+    if selection:
+        df_comparaison = base.comparer(selection, durees_taux if aux_taux_actuels else None)
+        st.dataframe(
+            pd.DataFrame({
+                "Scénario": df_comparaison['id'].map(libelles),
+                "Durée (ans)": df_comparaison['duree_annees'],
+                "Taux nominal (%)": df_comparaison['taux_nominal_pct'],
+                "TAEG (%)": df_comparaison['taeg_pct'],
+                "Mensualité": df_comparaison['mensualite_avec_assurance'].apply(formater_nombre),
+                "Coût total du crédit": df_comparaison['cout_total_credit'].apply(formater_nombre),
+                "Taux d'endettement (%)": df_comparaison['taux_endettement_pct'],
+                "Verdict": df_comparaison['Verdict'],
+            }),
+            column_config={
+                "Durée (ans)": st.column_config.NumberColumn(format="%d ans"),
+                "Taux nominal (%)": st.column_config.NumberColumn(format="%.2f %%"),
+                "TAEG (%)": st.column_config.NumberColumn(format="%.2f %%"),
+                "Taux d'endettement (%)": st.column_config.ProgressColumn(format="%.1f %%", min_value=0, max_value=50),
+                "Verdict": st.column_config.Column(width="medium")
+            },
+            hide_index=True,
+            use_container_width=True
+        )
+        recalcules = df_comparaison.drop_duplicates('id')['recalcule'].sum()
+        st.caption(f"{len(selection) - recalcules} scénario(s) relu(s) dans la base, {recalcules} recalculé(s).")
+
+
+def panneau_mesures(compteurs_rerun: Compteurs, compteurs_session: Compteurs):
+    # --- PANNEAU DE DIAGNOSTIC (SIMULATEUR_MESURES=1) ---
+    def tableau(compteurs: Compteurs) -> pd.DataFrame:
+        mesures = pd.DataFrame.from_dict(compteurs.instantane(), orient='index', columns=['appels', 'duree_s', 'duree_max_s'])
+        return pd.DataFrame({
+            "Mesure": mesures.index,
+            "Appels": mesures['appels'].to_numpy(),
+            "Total (ms)": mesures['duree_s'].to_numpy() * 1000,
+            "Max (ms)": mesures['duree_max_s'].to_numpy() * 1000,
+        }).sort_values("Total (ms)", ascending=False)
+
+    configuration = {
+        "Total (ms)": st.column_config.NumberColumn(format="%.1f"),
+        "Max (ms)": st.column_config.NumberColumn(format="%.1f"),
+    }
+    with st.sidebar.expander("🛠️ Mesures de performance"):
+        st.caption("Ce rerun (jusqu'à l'affichage de ce panneau)")
+        st.dataframe(tableau(compteurs_rerun), column_config=configuration, hide_index=True, use_container_width=True)
+        st.caption("Cette session")
+        st.dataframe(tableau(compteurs_session), column_config=configuration, hide_index=True, use_container_width=True)
+        st.caption("Caches (toutes sessions)")
+        st.dataframe(
+            statistiques_caches()[['nom', 'entrees', 'taux_succes', 'evictions', 'octets']],
+            column_config={"taux_succes": st.column_config.NumberColumn(format="%.2f")},
+            hide_index=True,
+            use_container_width=True
+        )
+        st.download_button(
+            "Exporter (format Prometheus)",
+            data=exporter_prometheus(),
+            file_name="metriques_simulateur.prom",
+            mime="text/plain"
+        )
@@ -0,0 +1,324 @@
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+
+import numpy as np
+
+import calculs
+from batch import VALEURS_PAR_DEFAUT
+from mesures import MESURES_ACTIVEES, enregistrer, exporter_prometheus
+
+# --- Service HTTP/JSON de tarification ---
+# Les portails partenaires interrogent les mêmes calculs que l'application : synthèse du financement,
+# comparatif des prêts et remboursement anticipé. La boucle asyncio ne fait que lire les requêtes et
+# écrire les réponses ; les calculs sont envoyés à un pool de processus. Un corps JSON qui est une
+# liste est traité comme un lot : les éléments sont répartis sur les processus et la réponse est la
+# liste des résultats, dans le même ordre (une erreur sur un élément n'empêche pas les autres).
+
+TAILLE_MAX_CORPS = 10 * 1024 * 1024
+
+
+# --- Opérations exposées ---
+
+def synthese(
+    montant_bien: float,
+    epargne_totale: float,
+    frais_notaire_pct: float = VALEURS_PAR_DEFAUT["frais_notaire_pct"],
+    apport_souhaite_pct: float = VALEURS_PAR_DEFAUT["apport_souhaite_pct"],
+    apport: float = None
+) -> dict:
+    """Synthèse du financement (onglet Configuration) : coût total, apport et montant à emprunter."""
+    if not montant_bien > 0:
+        raise ValueError("montant_bien doit être strictement positif.")
+    return calculs.calculer_synthese_financement(montant_bien, frais_notaire_pct, apport_souhaite_pct, epargne_totale, apport)
+
+
+def comparatif(
+    montant_a_emprunter: float,
+    durees_taux: dict,
+    salaire_total: float,
+    taux_assurance_pct: float = VALEURS_PAR_DEFAUT["taux_assurance_pct"],
+    taux_endettement_max_pct: float = VALEURS_PAR_DEFAUT["taux_endettement_max_pct"],
+    tranches: list = None,
+    frais_dossier: float = VALEURS_PAR_DEFAUT["frais_dossier"],
+    frais_garantie_pct: float = VALEURS_PAR_DEFAUT["frais_garantie_pct"]
+) -> list:
+    """Comparatif des prêts (onglet Comparatif) : une ligne par durée, avec le verdict et le TAEG."""
+    # Les clés d'un objet JSON sont des chaînes : les durées sont reconverties en entiers
+    durees_taux = {int(duree): float(taux) for duree, taux in durees_taux.items()}
+    if not durees_taux or min(durees_taux) < 1:
+        raise ValueError("durees_taux doit contenir au moins une durée, chacune d'au moins 1 an.")
+    if not montant_a_emprunter > 0:
+        raise ValueError("montant_a_emprunter doit être strictement positif.")
+    df_prets, _ = calculs.generer_tableau_comparatif(
+        montant_a_emprunter,
+        durees_taux,
+        taux_assurance_pct,
+        salaire_total,
+        taux_endettement_max_pct,
+        tranches,
+        frais_dossier,
+        frais_garantie_pct
+    )
+    return df_prets.to_dict(orient="records")
+
+
+def remboursement_anticipe(
+    montant_emprunte: float,
+    taux_nominal_pct: float,
+    duree_annees: int,
+    annee_remboursement: int,
+    montant_remboursement_anticipe: float,
+    choix_impact: str = calculs.CHOIX_IMPACT[0],
+    taux_assurance_pct: float = VALEURS_PAR_DEFAUT["taux_assurance_pct"]
+) -> dict:
+    """Remboursement anticipé d'un prêt (onglet Remboursement Anticipé), gain sur l'assurance compris."""
+    if choix_impact not in calculs.CHOIX_IMPACT:
+        raise ValueError(f"choix_impact doit valoir {' ou '.join(repr(choix) for choix in calculs.CHOIX_IMPACT)}")
+    if not montant_emprunte > 0:
+        raise ValueError("montant_emprunte doit être strictement positif.")
+    if duree_annees < 1:
+        raise ValueError("duree_annees doit valoir au moins 1 an.")
+    if not montant_remboursement_anticipe > 0:
+        raise ValueError("montant_remboursement_anticipe doit être strictement positif.")
+    if not 0 < annee_remboursement < duree_annees:
+        raise ValueError("L'année du remboursement doit être comprise entre 1 et la durée du prêt (exclue).")
+
+    pret = calculs.calculer_details_pret(montant_emprunte, taux_nominal_pct, duree_annees, taux_assurance_pct)
+    sim_ra = calculs.calculer_remboursement_anticipe(
+        choix_impact,
+        pret["mensualite_hors_assurance"],
+        duree_annees * 12,
+        taux_nominal_pct / 1200,
+        annee_remboursement,
+        montant_remboursement_anticipe
+    )
+    mensualite_assurance = pret["mensualite_avec_assurance"] - pret["mensualite_hors_assurance"]
+    gain_assurance = mensualite_assurance * sim_ra["duree_reduite_mois"]
+    return {
+        "mensualite_avec_assurance": pret["mensualite_avec_assurance"],
+        **sim_ra,
+        "nouvelle_mensualite_avec_assurance": sim_ra["nouvelle_mensualite"] + mensualite_assurance,
+        "gain_assurance": gain_assurance,
+        "gain_total": sim_ra["gain_interets"] + gain_assurance,
+    }
+
+
+OPERATIONS = {
+    "/synthese": synthese,
+    "/comparatif": comparatif,
+    "/remboursement-anticipe": remboursement_anticipe,
+}
+
+
+# --- Calculs dans les processus du pool ---
+
+def _en_json(valeur):
+    """Convertit récursivement les types NumPy en types Python ; NaN et infinis deviennent null."""
+    if isinstance(valeur, dict):
+        return {str(cle): _en_json(element) for cle, element in valeur.items()}
+    if isinstance(valeur, (list, tuple)):
+        return [_en_json(element) for element in valeur]
+    if isinstance(valeur, np.ndarray):
+        return _en_json(valeur.tolist())
+    if isinstance(valeur, np.generic):
+        valeur = valeur.item()
+    if isinstance(valeur, float) and not math.isfinite(valeur):
+        return None
+    return valeur
+
+
+def calculer(chemin: str, lot: list) -> tuple:
+    """
+    Exécute une opération sur une liste de jeux de paramètres, dans un processus du pool.
+
+    Returns:
+        tuple: (résultats, durée du calcul en secondes). Un élément invalide donne `{"erreur": ...}`.
+    """
+    debut = time.perf_counter()
+    operation = OPERATIONS[chemin]
+    resultats = []
+    for parametres in lot:
+        try:
+            if not isinstance(parametres, dict):
+                raise TypeError("chaque requête doit être un objet JSON")
+            resultats.append(_en_json(operation(**parametres)))
+        except (TypeError, ValueError, KeyError, AttributeError, ArithmeticError) as erreur:
+            resultats.append({"erreur": str(erreur)})
+    return resultats, time.perf_counter() - debut
+
+
+def _prechauffer() -> int:
+    """Tâche vide envoyée au démarrage, pour que chaque processus ait déjà importé les modules de calcul."""
+    return os.getpid()
+
+
+# --- Serveur ---
+
+class ServiceTarification:
+    """
+    Serveur HTTP/1.1 minimal (connexions persistantes, corps JSON) au-dessus d'un pool de processus.
+
+    Chaque réponse porte un en-tête `Server-Timing` : `attente` (file du pool), `calcul` (dans les
+    processus) et `total` (de la fin de la lecture de la requête à l'envoi de la réponse), en millisecondes.
+    """
+
+    def __init__(self, processus: int = os.cpu_count()):
+        self.processus = max(processus, 1)
+        self.pool = ProcessPoolExecutor(max_workers=self.processus)
+
+    async def demarrer(self):
+        boucle = asyncio.get_running_loop()
+        await asyncio.gather(*[boucle.run_in_executor(self.pool, _prechauffer) for _ in range(self.processus)])
+
+    def fermer(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    async def calculer(self, chemin: str, lot: list) -> tuple:
+        """Répartit un lot sur les processus du pool ; retourne (résultats, durée de calcul de la plus longue part, en secondes)."""
+        boucle = asyncio.get_running_loop()
+        taille_part = -(-len(lot) // self.processus)
+        parts = await asyncio.gather(*[
+            boucle.run_in_executor(self.pool, calculer, chemin, lot[debut:debut + taille_part])
+            for debut in range(0, len(lot), taille_part)
+        ])
+        resultats = [resultat for resultats_part, _ in parts for resultat in resultats_part]
+        return resultats, max((duree for _, duree in parts), default=0.0)
+
+    async def repondre(self, methode: str, chemin: str, corps: bytes) -> tuple:
+        """Traite une requête ; retourne (statut, objet JSON de la réponse, durée de calcul, nombre de calculs)."""
+        if chemin == "/sante":
+            return HTTPStatus.OK, {"statut": "ok", "processus": self.processus, "operations": list(OPERATIONS)}, 0.0, 0
+        if chemin == "/metriques":
+            return HTTPStatus.OK, exporter_prometheus(), 0.0, 0
+        if chemin not in OPERATIONS:
+            return HTTPStatus.NOT_FOUND, {"erreur": f"Opération inconnue : {chemin}"}, 0.0, 0
+        if methode != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"erreur": "Les opérations s'appellent en POST."}, 0.0, 0
+        try:
+            requete = json.loads(corps)
+        except ValueError as erreur:
+            return HTTPStatus.BAD_REQUEST, {"erreur": f"JSON invalide : {erreur}"}, 0.0, 0
+
+        est_lot = isinstance(requete, list)
+        lot = requete if est_lot else [requete]
+        if not lot:
+            return HTTPStatus.OK, [], 0.0, 0
+
+        try:
+            resultats, duree_calcul = await self.calculer(chemin, lot)
+        except Exception as erreur:
+            # Erreur imprévue d'un calcul ou du pool (ex. processus interrompu) : la connexion reste utilisable
+            return HTTPStatus.INTERNAL_SERVER_ERROR, {"erreur": f"Erreur interne : {type(erreur).__name__}: {erreur}"}, 0.0, 0
+        if est_lot:
+            return HTTPStatus.OK, resultats, duree_calcul, len(lot)
+        statut = HTTPStatus.BAD_REQUEST if isinstance(resultats[0], dict) and "erreur" in resultats[0] else HTTPStatus.OK
+        return statut, resultats[0], duree_calcul, 1
+
+    async def traiter_connexion(self, lecteur: asyncio.StreamReader, ecrivain: asyncio.StreamWriter):
+        try:
+            while True:
+                ligne = await lecteur.readline()
+                if not ligne:
+                    break
+                debut_lecture = time.perf_counter()
+                try:
+                    methode, cible, version = ligne.decode("latin-1").split()
+                except ValueError:
+                    break
+
+                entetes = {}
+                while (entete := await lecteur.readline()) not in (b"\r\n", b"\n", b""):
+                    nom, _, valeur = entete.decode("latin-1").partition(":")
+                    entetes[nom.strip().lower()] = valeur.strip()
+                garder_connexion = entetes.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+
+                try:
+                    taille_corps = int(entetes.get("content-length", 0))
+                    if taille_corps < 0:
+                        raise ValueError
+                except ValueError:
+                    # Sans longueur valide, la fin du corps est inconnue : la connexion est fermée après la réponse
+                    await self._envoyer(ecrivain, HTTPStatus.BAD_REQUEST, {"erreur": "En-tête Content-Length invalide."}, {}, False)
+                    break
+                if taille_corps > TAILLE_MAX_CORPS:
+                    await self._envoyer(ecrivain, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"erreur": "Corps de requête trop volumineux."}, {}, False)
+                    break
+                corps = await lecteur.readexactly(taille_corps)
+
+                chemin = cible.split("?")[0]
+                debut = time.perf_counter()
+                statut, reponse, duree_calcul, nombre_calculs = await self.repondre(methode, chemin, corps)
+                duree_totale = time.perf_counter() - debut
+                duree_attente = max(duree_totale - duree_calcul, 0.0)
+                if MESURES_ACTIVEES and nombre_calculs:
+                    enregistrer(f"requete{chemin}", duree_totale)
+                    enregistrer(f"calcul{chemin}", duree_calcul)
+                chronometrage = {
+                    "Server-Timing": (
+                        f"lecture;dur={(debut - debut_lecture) * 1000:.3f}, attente;dur={duree_attente * 1000:.3f}, "
+                        f"calcul;dur={duree_calcul * 1000:.3f}, total;dur={duree_totale * 1000:.3f}"
+                    ),
+                    "X-Nombre-Calculs": str(nombre_calculs),
+                }
+                await self._envoyer(ecrivain, statut, reponse, chronometrage, garder_connexion)
+                if not garder_connexion:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            ecrivain.close()
+
+    @staticmethod
+    async def _envoyer(ecrivain: asyncio.StreamWriter, statut: HTTPStatus, reponse, entetes: dict, garder_connexion: bool):
+        # Les métriques sont du texte (format Prometheus), les autres réponses du JSON
+        if isinstance(reponse, str):
+            corps, type_contenu = reponse.encode(), "text/plain; version=0.0.4; charset=utf-8"
+        else:
+            corps, type_contenu = json.dumps(reponse, ensure_ascii=False).encode(), "application/json; charset=utf-8"
+        lignes = [
+            f"HTTP/1.1 {statut.value} {statut.phrase}",
+            f"Content-Type: {type_contenu}",
+            f"Content-Length: {len(corps)}",
+            f"Connection: {'keep-alive' if garder_connexion else 'close'}",
+            *(f"{nom}: {valeur}" for nom, valeur in entetes.items()),
+        ]
+        ecrivain.write(("\r\n".join(lignes) + "\r\n\r\n").encode("latin-1") + corps)
+        await ecrivain.drain()
+
+
+async def servir(hote: str, port: int, processus: int):
+    service = ServiceTarification(processus)
+    try:
+        await service.demarrer()
+        serveur = await asyncio.start_server(service.traiter_connexion, hote, port)
+        print(f"Service de tarification à l'écoute sur http://{hote}:{port} ({service.processus} processus)", file=sys.stderr)
+        async with serveur:
+            await serveur.serve_forever()
+    finally:
+        service.fermer()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Expose la synthèse du financement, le comparatif des prêts et le remboursement anticipé en HTTP/JSON."
+    )
+    parser.add_argument("--hote", default="127.0.0.1", help="Adresse d'écoute (défaut : 127.0.0.1).")
+    parser.add_argument("--port", type=int, default=8000, help="Port d'écoute (défaut : 8000).")
+    parser.add_argument("--processus", type=int, default=os.cpu_count(), help="Nombre de processus de calcul.")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(servir(args.hote, args.port, args.processus))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
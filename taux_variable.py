@@ -0,0 +1,166 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# --- Simulation de prêts à taux variable (Monte Carlo) ---
+# L'indice (ex. Euribor 12 mois) suit un processus de retour à la moyenne, révisé une fois par an.
+# À chaque révision, le taux du prêt vaut indice + marge, borné par le cap autour du taux initial,
+# et la mensualité est recalculée sur le capital et la durée restants. Les chemins sont traités
+# ensemble : seule la boucle sur les révisions (25 pour un prêt de 25 ans) est en Python.
+
+TAILLE_BLOC = 10_000
+
+
+def _simuler_bloc(
+    graine: np.random.SeedSequence,
+    n_chemins: int,
+    montant_emprunte: float,
+    duree_annees: int,
+    marge_pct: float,
+    indice_initial_pct: float,
+    indice_long_terme_pct: float,
+    vitesse_retour: float,
+    volatilite_pct: float,
+    cap_pct: float,
+    taux_assurance_pct: float,
+    periodicite_mois: int
+) -> dict:
+    """Simule un bloc de chemins de taux et le prêt associé ; retourne un tableau par indicateur."""
+    rng = np.random.default_rng(graine)
+    nombre_mensualites = duree_annees * 12
+    nombre_revisions = -(-nombre_mensualites // periodicite_mois)
+    pas_annees = periodicite_mois / 12
+
+    taux_initial_pct = max(indice_initial_pct + marge_pct, 0.0)
+    mensualite_assurance = montant_emprunte * taux_assurance_pct / 1200
+
+    indice = np.full(n_chemins, indice_initial_pct)
+    capital_restant_du = np.full(n_chemins, float(montant_emprunte))
+    interets = np.zeros(n_chemins)
+    mensualite_max = np.zeros(n_chemins)
+    somme_mensualites = np.zeros(n_chemins)
+    taux_max_pct = np.zeros(n_chemins)
+
+    for revision in range(nombre_revisions):
+        if revision > 0:
+            # Retour à la moyenne (schéma de Vasicek discrétisé)
+            indice = indice + vitesse_retour * (indice_long_terme_pct - indice) * pas_annees \
+                + volatilite_pct * np.sqrt(pas_annees) * rng.standard_normal(n_chemins)
+
+        taux_pct = np.maximum(indice + marge_pct, 0.0)
+        if cap_pct is not None:
+            taux_pct = np.clip(taux_pct, max(taux_initial_pct - cap_pct, 0.0), taux_initial_pct + cap_pct)
+        taux_max_pct = np.maximum(taux_max_pct, taux_pct)
+
+        # --- Nouvelle mensualité sur le capital et la durée restants ---
+        mois_restants = nombre_mensualites - revision * periodicite_mois
+        mois_periode = min(periodicite_mois, mois_restants)
+        taux_mensuel = taux_pct / 1200
+        taux_positif = taux_mensuel > 0
+        taux_calcul = np.where(taux_positif, taux_mensuel, 1.0)
+        mensualite = np.where(
+            taux_positif,
+            capital_restant_du * taux_calcul / (1 - (1 + taux_calcul)**-mois_restants),
+            capital_restant_du / mois_restants
+        )
+
+        # --- Capital restant dû en fin de période (formule fermée) ---
+        facteur = (1 + taux_calcul)**mois_periode
+        capital_fin = np.where(
+            taux_positif,
+            capital_restant_du * facteur - mensualite * (facteur - 1) / taux_calcul,
+            capital_restant_du - mensualite * mois_periode
+        )
+        interets += mensualite * mois_periode - (capital_restant_du - capital_fin)
+        capital_restant_du = np.maximum(capital_fin, 0.0)
+
+        mensualite_max = np.maximum(mensualite_max, mensualite + mensualite_assurance)
+        somme_mensualites += (mensualite + mensualite_assurance) * mois_periode
+
+    return {
+        "mensualite_max": mensualite_max,
+        "mensualite_moyenne": somme_mensualites / nombre_mensualites,
+        "cout_total_credit": interets + mensualite_assurance * nombre_mensualites,
+        "taux_max_pct": taux_max_pct,
+    }
+
+
+def simuler_taux_variable(
+    montant_emprunte: float,
+    duree_annees: int,
+    marge_pct: float,
+    indice_initial_pct: float,
+    taux_assurance_pct: float,
+    salaire_total: float,
+    cap_pct: float = 1.0,
+    indice_long_terme_pct: float = None,
+    vitesse_retour: float = 0.2,
+    volatilite_pct: float = 0.8,
+    periodicite_mois: int = 12,
+    n_chemins: int = 10_000,
+    graine: int = 0,
+    processus: int = 1
+) -> dict:
+    """
+    Simule un prêt à taux variable (éventuellement capé) sur un grand nombre de chemins de taux.
+
+    Args:
+        montant_emprunte (float): Le montant du prêt.
+        duree_annees (int): La durée du prêt en années.
+        marge_pct (float): La marge de la banque ajoutée à l'indice, en pourcentage.
+        indice_initial_pct (float): La valeur actuelle de l'indice (ex. Euribor 12 mois), en pourcentage.
+        taux_assurance_pct (float): Le taux d'assurance annuel, en pourcentage.
+        salaire_total (float): Le salaire net mensuel du foyer, pour le taux d'endettement.
+        cap_pct (float, optional): L'écart maximal du taux autour du taux initial (1.0 pour un prêt capé ±1).
+            None pour un prêt non capé.
+        indice_long_terme_pct (float, optional): La moyenne de long terme de l'indice (par défaut, sa valeur actuelle).
+        vitesse_retour (float): La vitesse annuelle de retour de l'indice vers sa moyenne.
+        volatilite_pct (float): La volatilité annuelle de l'indice, en points de pourcentage.
+        periodicite_mois (int): Le nombre de mois entre deux révisions du taux.
+        n_chemins (int): Le nombre de chemins simulés.
+        graine (int): La graine du générateur aléatoire. Les résultats ne dépendent que de la graine,
+            pas du nombre de processus.
+        processus (int): Le nombre de processus de calcul (1 : pas de pool).
+
+    Returns:
+        dict: Un tableau NumPy par indicateur (une valeur par chemin) : `mensualite_max`, `mensualite_moyenne`,
+        `cout_total_credit`, `taux_max_pct` et `taux_endettement_max_pct`.
+    """
+    if indice_long_terme_pct is None:
+        indice_long_terme_pct = indice_initial_pct
+
+    # Les chemins sont découpés en blocs de taille fixe, chacun avec sa propre graine dérivée :
+    # le découpage, et donc les résultats, ne dépendent pas du nombre de processus.
+    tailles = [min(TAILLE_BLOC, n_chemins - debut) for debut in range(0, n_chemins, TAILLE_BLOC)]
+    graines = np.random.SeedSequence(graine).spawn(len(tailles))
+    parametres = (
+        montant_emprunte, duree_annees, marge_pct, indice_initial_pct, indice_long_terme_pct,
+        vitesse_retour, volatilite_pct, cap_pct, taux_assurance_pct, periodicite_mois
+    )
+
+    if processus > 1 and len(tailles) > 1:
+        with ProcessPoolExecutor(max_workers=processus) as pool:
+            blocs = list(pool.map(_simuler_bloc, graines, tailles, *[[valeur] * len(tailles) for valeur in parametres]))
+    else:
+        blocs = [_simuler_bloc(graine_bloc, taille, *parametres) for graine_bloc, taille in zip(graines, tailles)]
+
+    resultats = {cle: np.concatenate([bloc[cle] for bloc in blocs]) for cle in blocs[0]}
+    resultats["taux_endettement_max_pct"] = resultats["mensualite_max"] / salaire_total * 100 if salaire_total > 0 else np.full(n_chemins, 100.0)
+    return resultats
+
+
+def resumer_simulation(resultats: dict, quantiles=(0.05, 0.5, 0.95)) -> pd.DataFrame:
+    """
+    Résume les distributions d'une simulation : moyenne et quantiles de chaque indicateur.
+
+    Returns:
+        pd.DataFrame: Une ligne par indicateur, une colonne par statistique.
+    """
+    lignes = {}
+    for cle, valeurs in resultats.items():
+        lignes[cle] = {
+            "moyenne": valeurs.mean(),
+            **{f"p{round(q * 100)}": valeur for q, valeur in zip(quantiles, np.quantile(valeurs, quantiles))},
+        }
+    return pd.DataFrame.from_dict(lignes, orient="index")
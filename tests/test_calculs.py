@@ -0,0 +1,117 @@
+from math import ceil, log
+
+import numpy as np
+import pytest
+
+import calculs
+
+# --- Implémentations de référence (version scalaire d'origine) ---
+# Le cœur vectorisé doit redonner exactement les résultats des fonctions scalaires qu'il remplace.
+
+def details_pret_reference(montant_emprunte, taux_annuel_nominal_pct, duree_annees, taux_annuel_assurance_pct):
+    taux_mensuel_nominal = (taux_annuel_nominal_pct / 100) / 12
+    nombre_mensualites = duree_annees * 12
+    if taux_mensuel_nominal > 0:
+        mensualite_hors_assurance = (montant_emprunte * taux_mensuel_nominal) / (1 - (1 + taux_mensuel_nominal)**-nombre_mensualites)
+    else:
+        mensualite_hors_assurance = montant_emprunte / nombre_mensualites
+    mensualite_avec_assurance = mensualite_hors_assurance + (montant_emprunte * (taux_annuel_assurance_pct / 100)) / 12
+    return {
+        "duree_annees": duree_annees,
+        "taux_nominal_pct": taux_annuel_nominal_pct,
+        "mensualite_avec_assurance": mensualite_avec_assurance,
+        "mensualite_hors_assurance": mensualite_hors_assurance,
+        "cout_total_credit": (mensualite_avec_assurance * nombre_mensualites) - montant_emprunte,
+        "salaire_mensuel_minimum": mensualite_avec_assurance / 0.35,
+    }
+
+
+def remboursement_anticipe_reference(choix_impact, mensualite_hors_assurance, duree_initiale_mois, taux_mensuel_nominal, annee_remboursement, montant_remboursement_anticipe):
+    mois_remboursement = annee_remboursement * 12
+    capital_restant_du = mensualite_hors_assurance * ((1 - (1 + taux_mensuel_nominal)**-(duree_initiale_mois - mois_remboursement)) / taux_mensuel_nominal)
+    duree_initiale_restante_mois = duree_initiale_mois - mois_remboursement
+    montant_remboursement_anticipe = min(montant_remboursement_anticipe, capital_restant_du)
+    nouveau_capital_a_rembourser = capital_restant_du - montant_remboursement_anticipe
+    if nouveau_capital_a_rembourser <= 0:
+        nouvelle_duree_restante_mois = 0
+        nouvelle_mensualite_hors_assurance = 0
+    elif choix_impact == "Réduire la durée du prêt":
+        nouvelle_duree_restante_mois = ceil(-log(1 - (nouveau_capital_a_rembourser * taux_mensuel_nominal / mensualite_hors_assurance)) / log(1 + taux_mensuel_nominal))
+        nouvelle_mensualite_hors_assurance = mensualite_hors_assurance
+    else:
+        nouvelle_duree_restante_mois = duree_initiale_restante_mois
+        part_1 = nouveau_capital_a_rembourser * taux_mensuel_nominal * (1 + taux_mensuel_nominal)**nouvelle_duree_restante_mois
+        part_2 = (1 + taux_mensuel_nominal)**nouvelle_duree_restante_mois - 1
+        nouvelle_mensualite_hors_assurance = part_1 / part_2
+    cout_interets_restants_avant = (mensualite_hors_assurance * (duree_initiale_mois - mois_remboursement)) - capital_restant_du
+    cout_interets_restants_apres = (nouvelle_mensualite_hors_assurance * nouvelle_duree_restante_mois) - nouveau_capital_a_rembourser
+    return {
+        "gain_interets": cout_interets_restants_avant - cout_interets_restants_apres,
+        "nouvelle_duree_totale_ans": (mois_remboursement + nouvelle_duree_restante_mois) / 12,
+        "duree_reduite_mois": duree_initiale_restante_mois - nouvelle_duree_restante_mois,
+        "ancienne_mensualite": mensualite_hors_assurance,
+        "nouvelle_mensualite": nouvelle_mensualite_hors_assurance,
+        "reduction_mensualite": mensualite_hors_assurance - nouvelle_mensualite_hors_assurance,
+    }
+
+
+def prets_aleatoires(nombre, graine=0):
+    """Tire des prêts (montant, taux nominal %, durée en années, taux d'assurance %), taux nul compris."""
+    generateur = np.random.default_rng(graine)
+    for _ in range(nombre):
+        taux = 0.0 if generateur.random() < 0.05 else round(float(generateur.uniform(0.5, 8.0)), 2)
+        yield (
+            round(float(generateur.uniform(10_000, 1_000_000)), 2),
+            taux,
+            int(generateur.integers(5, 31)),
+            round(float(generateur.uniform(0.0, 0.8)), 2),
+        )
+
+
+# --- Détails d'un prêt ---
+
+def test_calculer_details_pret_identique_a_la_reference():
+    for pret in prets_aleatoires(2000):
+        details = calculs.calculer_details_pret(*pret)
+        for cle, valeur in details_pret_reference(*pret).items():
+            assert details[cle] == valeur, (cle, pret)
+
+
+# --- Remboursement anticipé ---
+
+@pytest.mark.parametrize("choix_impact", calculs.CHOIX_IMPACT)
+def test_calculer_remboursement_anticipe_identique_a_la_reference(choix_impact):
+    generateur = np.random.default_rng(1)
+    for montant, taux, duree, assurance in prets_aleatoires(500, graine=2):
+        if taux == 0:
+            continue
+        mensualite = calculs.calculer_details_pret(montant, taux, duree, assurance)["mensualite_hors_assurance"]
+        annee = int(generateur.integers(1, duree))
+        # Jusqu'à 120 % du montant emprunté : les remboursements totaux sont couverts
+        montant_ra = round(float(generateur.uniform(0, 1.2 * montant)), 2)
+        arguments = (choix_impact, mensualite, duree * 12, taux / 1200, annee, montant_ra)
+        resultat = calculs.calculer_remboursement_anticipe(*arguments)
+        reference = remboursement_anticipe_reference(*arguments)
+        for cle, valeur in reference.items():
+            assert resultat[cle] == pytest.approx(valeur, rel=1e-12, abs=1e-6), (cle, arguments)
+
+
+@pytest.mark.parametrize("choix_impact", calculs.CHOIX_IMPACT)
+def test_un_seul_remboursement_comme_calculer_remboursement_anticipe(choix_impact):
+    generateur = np.random.default_rng(3)
+    for montant, taux, duree, assurance in prets_aleatoires(300, graine=4):
+        if taux == 0:
+            continue
+        details = calculs.calculer_details_pret(montant, taux, duree, assurance)
+        annee = int(generateur.integers(1, duree))
+        montant_ra = round(float(generateur.uniform(1, montant)), 2)
+        multiple = calculs.simuler_remboursements_multiples(
+            montant, taux, duree, assurance, [{"mois": annee * 12, "montant": montant_ra, "choix_impact": choix_impact}]
+        )
+        unique = calculs.calculer_remboursement_anticipe(
+            choix_impact, details["mensualite_hors_assurance"], duree * 12, taux / 1200, annee, montant_ra
+        )
+        assert multiple["duree_reduite_mois"] == unique["duree_reduite_mois"]
+        assert multiple["nouvelle_duree_totale_mois"] / 12 == pytest.approx(unique["nouvelle_duree_totale_ans"])
+        assert multiple["nouvelle_mensualite"] == pytest.approx(unique["nouvelle_mensualite"], rel=1e-9)
+        assert multiple["gain_interets"] == pytest.approx(unique["gain_interets"], rel=1e-9, abs=1e-4)
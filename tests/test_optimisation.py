@@ -0,0 +1,49 @@
+import numpy as np
+
+from optimisation import front_pareto, optimiser_financement
+
+
+def domine(cout_a, epargne_a, cout_b, epargne_b) -> bool:
+    """Vrai si la solution a domine b : coût au plus égal, épargne au moins égale, l'un des deux strictement."""
+    return cout_a <= cout_b and epargne_a >= epargne_b and (cout_a < cout_b or epargne_a > epargne_b)
+
+
+def verifier_front(cout, epargne, indices):
+    cout, epargne = np.asarray(cout, dtype=float), np.asarray(epargne, dtype=float)
+    # Aucune solution du front n'est dominée
+    for i in indices:
+        assert not any(domine(cout[j], epargne[j], cout[i], epargne[i]) for j in range(len(cout))), i
+    # Toute solution non dominée est sur le front (à égalité de coût et d'épargne près)
+    valeurs_front = {(cout[i], epargne[i]) for i in indices}
+    for j in range(len(cout)):
+        if not any(domine(cout[i], epargne[i], cout[j], epargne[j]) for i in range(len(cout))):
+            assert (cout[j], epargne[j]) in valeurs_front, j
+    # Par coût croissant, sans doublon
+    assert np.all(np.diff(cout[indices]) > 0)
+
+
+def test_front_pareto_non_domine():
+    generateur = np.random.default_rng(0)
+    for taille in (1, 2, 10, 200):
+        # Valeurs arrondies pour provoquer des égalités de coût et d'épargne
+        cout = np.round(generateur.uniform(0, 50, taille))
+        epargne = np.round(generateur.uniform(0, 50, taille))
+        verifier_front(cout, epargne, front_pareto(cout, epargne))
+
+
+def test_front_de_l_optimiseur_non_domine():
+    resultat = optimiser_financement(
+        prix_bien=300_000,
+        frais_notaire_pct=7.5,
+        epargne_totale=60_000,
+        epargne_mensuelle_totale=800,
+        salaire_total=5_500,
+        durees_taux={15: 3.2, 20: 3.4, 25: 3.6},
+        taux_assurance_pct=0.34,
+        pas_duree_mois=12,
+        nombre_apports=5
+    )
+    solutions = resultat["solutions"]
+    cout, epargne = solutions["cout_total_credit"].to_numpy(), solutions["epargne_restante"].to_numpy()
+    verifier_front(cout, epargne, front_pareto(cout, epargne))
+    assert len(resultat["front"]) == len(front_pareto(cout, epargne))
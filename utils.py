@@ -1,242 +1,181 @@
-import plotly.graph_objects as go
-import pandas as pd
-from math import log, ceil
-import streamlit as st
-
-# --- Fonctions Utilitaires ---
-
-def formater_nombre(nombre: float) -> str:
-    """Formate un nombre en chaîne de caractères avec un espace comme séparateur de milliers."""
-    return f"{nombre:,.0f} €".replace(",", " ")
-
-def formater_duree(nombre_mois: float) -> str:
-    """Convertit un nombre de mois en une chaîne de caractères "X an(s) et Y mois"."""
-    nombre_mois = int(nombre_mois)
-    
-    if nombre_mois < 1:
-        return "moins d'un mois"
-
-    annees = nombre_mois // 12
-    mois_restants = nombre_mois % 12
-    
-    parts = []
-    if annees > 0:
-        s_an = "s" if annees > 1 else ""
-        parts.append(f"{annees} an{s_an}")
-    
-    if mois_restants > 0:
-        parts.append(f"{mois_restants} mois")
-        
-    return " et ".join(parts)
-
-# --- Fonctions de Calcul Financier ---
-
-def calculer_details_pret(montant_emprunte: float, taux_annuel_nominal_pct: float, duree_annees: int, taux_annuel_assurance_pct: float) -> dict:
-    """
-    Calcule les détails d'un prêt immobilier pour une durée et un taux donnés.
+from typing import TYPE_CHECKING
 
-    Args:
-        montant_emprunte (float): Le montant total du prêt.
-        taux_annuel_nominal_pct (float): Le taux d'intérêt annuel du crédit (hors assurance), en pourcentage.
-        duree_annees (int): La durée du prêt en années.
-        taux_annuel_assurance_pct (float): Le taux d'assurance annuel, en pourcentage.
+import numpy as np
+import pandas as pd
 
-    Returns:
-        dict: Un dictionnaire contenant les détails calculés du prêt.
+import calculs
+import export
+import optimisation
+import taux_variable
+from cache import cache_borne, statistiques_caches
+from mesures import mesurer
+from calculs import *
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+# --- Calculs mis en cache pour l'interface ---
+# Les fonctions de calcul de `calculs` restent pures (numpy/pandas uniquement) : la mise en cache
+# n'est appliquée qu'ici, pour l'application Streamlit. Les caches sont partagés entre les sessions
+# et bornés (LRU + TTL) ; les arguments sont arrondis à la précision des champs de saisie
+# (centimes pour les montants, 0,01 % pour les taux), pour que des flottants quasi identiques
+# partagent la même entrée.
+
+def _normaliser_comparatif(montant_a_emprunter, durees_taux, taux_assurance_pct, salaire_total, taux_endettement_max_pct=TAUX_ENDETTEMENT_MAX_PCT, tranches=None, frais_dossier=0.0, frais_garantie_pct=0.0):
+    return (
+        round(float(montant_a_emprunter), 2),
+        {duree: round(float(taux), 2) for duree, taux in durees_taux.items()},
+        round(float(taux_assurance_pct), 2),
+        round(float(salaire_total), 2),
+        round(float(taux_endettement_max_pct), 2),
+        [{cle: round(float(valeur), 2) if cle != 'nom' else valeur for cle, valeur in tranche.items()} for tranche in tranches or []],
+        round(float(frais_dossier), 2),
+        round(float(frais_garantie_pct), 2),
+    ), {}
+
+
+def _normaliser_graphique(df_prets, salaire_total):
+    return (df_prets, round(float(salaire_total), 2)), {}
+
+
+
+def _normaliser_grille_rachat(df_prets, nouveaux_taux_pct, mois_rachat, nouvelles_durees_annees, frais_dossier=0.0, frais_garantie_pct=0.0):
+    # Seules les colonnes des prêts utilisées par la grille entrent dans la clé (pas le salaire ni le verdict)
+    colonnes = ['duree_annees', 'taux_nominal_pct', 'mensualite_avec_assurance', 'mensualite_hors_assurance']
+    return (
+        df_prets[colonnes].reset_index(drop=True),
+        np.asarray(nouveaux_taux_pct),
+        np.asarray(mois_rachat),
+        np.asarray(nouvelles_durees_annees),
+        round(float(frais_dossier), 2),
+        round(float(frais_garantie_pct), 2),
+    ), {}
+
+
+generer_tableau_comparatif = mesurer("generer_tableau_comparatif")(cache_borne(max_entrees=256, ttl_s=3600, normaliser=_normaliser_comparatif)(
+    calculs.generer_tableau_comparatif
+))
+calculer_grille_remboursement_anticipe = mesurer("calculer_grille_remboursement_anticipe")(cache_borne(max_entrees=32, ttl_s=3600)(
+    calculs.calculer_grille_remboursement_anticipe
+))
+# Une grille de rachat occupe une vingtaine de Mo : le cache est plus petit
+calculer_grille_rachat = mesurer("calculer_grille_rachat")(cache_borne(max_entrees=8, ttl_s=3600, normaliser=_normaliser_grille_rachat)(calculs.calculer_grille_rachat))
+calculer_surface_sensibilite = mesurer("calculer_surface_sensibilite")(cache_borne(max_entrees=32, ttl_s=3600)(calculs.calculer_surface_sensibilite))
+# La simulation est déterministe pour une graine donnée : elle peut être mise en cache
+simuler_taux_variable = mesurer("simuler_taux_variable")(cache_borne(max_entrees=32, ttl_s=3600)(taux_variable.simuler_taux_variable))
+resumer_simulation = taux_variable.resumer_simulation
+optimiser_financement = mesurer("optimiser_financement")(cache_borne(max_entrees=16, ttl_s=3600)(optimisation.optimiser_financement))
+OBJECTIFS_OPTIMISATION = optimisation.OBJECTIFS
+# Un export n'est recalculé que si la simulation ou le format changent (un fichier pèse quelques centaines de Ko)
+exporter_simulation = mesurer("exporter_simulation")(cache_borne(max_entrees=8, ttl_s=600)(export.exporter_octets))
+preparer_simulation = export.preparer_simulation
+informations_dossier = export.informations_dossier
+FORMATS_EXPORT = export.FORMATS
+
+# --- Rendu des graphiques volumineux ---
+# Au-delà de quelques centaines de points, le coût d'un graphique est surtout celui de son envoi au
+# navigateur et de son rendu SVG. Les séries longues sont donc réduites à un budget de points (en
+# gardant le minimum et le maximum de chaque paquet, pour ne pas effacer les pics) et tracées en WebGL ;
+# les grilles denses sont sous-échantillonnées. Les figures étant mises en cache, leur conversion en
+# dictionnaire (données déjà encodées en base64) est faite une fois et réutilisée à chaque affichage.
+
+POINTS_MAX_SERIE = 1_500
+CELLULES_MAX_GRILLE = 10_000
+SEUIL_WEBGL = 1_000
+SEUIL_ETIQUETTES = 40
+
+
+def _reduire_serie(x, y, points_max: int = POINTS_MAX_SERIE):
+    """Réduit une série à au plus `points_max` points environ, en gardant le minimum et le maximum de chaque paquet."""
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    if len(y) <= points_max:
+        return x, y
+
+    # Deux points gardés par paquet ; le dernier paquet est complété par des valeurs neutres
+    taille = -(-2 * len(y) // points_max)
+    n_paquets = -(-len(y) // taille)
+    debuts = np.arange(n_paquets) * taille
+    paquets_min = np.full(n_paquets * taille, np.inf)
+    paquets_min[:len(y)] = y
+    paquets_max = np.full(n_paquets * taille, -np.inf)
+    paquets_max[:len(y)] = y
+    indices = np.unique(np.concatenate([
+        [0, len(y) - 1],
+        debuts + paquets_min.reshape(n_paquets, taille).argmin(axis=1),
+        debuts + paquets_max.reshape(n_paquets, taille).argmax(axis=1),
+    ]))
+    return x[indices], y[indices]
+
+
+def _reduire_grille(x, y, z, cellules_max: int = CELLULES_MAX_GRILLE):
+    """Sous-échantillonne une grille z (len(y), len(x)) à au plus `cellules_max` cellules environ, bords compris."""
+    x, y, z = np.asarray(x), np.asarray(y), np.asarray(z)
+    pas = int(np.ceil(np.sqrt(z.size / cellules_max)))
+    if pas <= 1:
+        return x, y, z
+    lignes = np.unique(np.append(np.arange(0, len(y), pas), len(y) - 1))
+    colonnes = np.unique(np.append(np.arange(0, len(x), pas), len(x) - 1))
+    return x[colonnes], y[lignes], z[np.ix_(lignes, colonnes)]
+
+
+def _trace_courbe(x, y, **kwargs):
+    """Crée la trace d'une courbe, réduite au budget de points et en WebGL si elle reste longue."""
+    import plotly.graph_objects as go
+
+    x, y = _reduire_serie(x, y)
+    trace = go.Scattergl if len(y) > SEUIL_WEBGL else go.Scatter
+    return trace(x=x, y=y, **kwargs)
+
+
+def _figer(fig: "go.Figure") -> "go.Figure":
     """
-    # --- Conversion des pourcentages et des durées ---
-    taux_annuel_nominal = taux_annuel_nominal_pct / 100
-    taux_mensuel_nominal = taux_annuel_nominal / 12
-    nombre_mensualites = duree_annees * 12
-    taux_annuel_assurance = taux_annuel_assurance_pct / 100
-
-    # --- Calcul de la mensualité du crédit (hors assurance) ---
-    if taux_mensuel_nominal > 0:
-        mensualite_hors_assurance = (montant_emprunte * taux_mensuel_nominal) / (1 - (1 + taux_mensuel_nominal)**-nombre_mensualites)
-    else:
-        mensualite_hors_assurance = montant_emprunte / nombre_mensualites
-
-    # --- Calcul de la mensualité de l'assurance ---
-    mensualite_assurance = (montant_emprunte * taux_annuel_assurance) / 12
-
-    # --- Totaux ---
-    mensualite_avec_assurance = mensualite_hors_assurance + mensualite_assurance
-    cout_total_credit = (mensualite_avec_assurance * nombre_mensualites) - montant_emprunte
-
-    # --- Calcul du salaire net mensuel minimum requis ---
-    salaire_minimum = mensualite_avec_assurance / 0.35
+    Convertit une fois pour toutes la figure en dictionnaire, tel que Streamlit l'envoie au navigateur.
 
-    return {
-        "duree_annees": duree_annees,
-        "taux_nominal_pct": taux_annuel_nominal_pct,
-        "mensualite_avec_assurance": mensualite_avec_assurance,
-        "mensualite_hors_assurance": mensualite_hors_assurance,
-        "cout_total_credit": cout_total_credit,
-        "salaire_mensuel_minimum": salaire_minimum,
-    }
-
-@st.cache_data
-def generer_tableau_comparatif(montant_a_emprunter: float, durees_taux: dict, taux_assurance_pct: float, salaire_total: float) -> pd.DataFrame:
-    """
-    Génère un DataFrame Pandas comparant plusieurs scénarios de prêt et le dayaframe adapté pour l'affichage associé.
+    `st.plotly_chart` appelle `to_dict` à chaque affichage (copie profonde et encodage des tableaux) :
+    la figure mise en cache retourne désormais sa conversion mémorisée. Elle ne doit plus être modifiée.
     """
-    resultats_prets = []
-    for duree, taux in durees_taux.items():
-        details_pret = calculer_details_pret(
-            montant_a_emprunter,
-            taux,
-            duree,
-            taux_assurance_pct
-        )
-        details_pret['taux_endettement_pct'] = (details_pret['mensualite_avec_assurance'] / salaire_total) * 100 if salaire_total > 0 else 100
-        resultats_prets.append(details_pret)
-    
-    df = pd.DataFrame(resultats_prets)
-
-    def get_verdict(x):
-        if x['taux_endettement_pct'] > 35:
-            salaire_manquant = x['salaire_mensuel_minimum'] - salaire_total
-            return f"❌ Élevé : il manque {formater_nombre(salaire_manquant)}"
-        elif x['taux_endettement_pct'] > 33:
-            return "⚠️ Prudent"
-        else:
-            return "✅ Faisable"
-
-    df['Verdict'] = df.apply(get_verdict, axis=1)
-
-    # --- Préparation du DataFrame pour l'affichage ---
-    df_display = df.copy()
-
-    # 1. Formatage des devises en chaînes de caractères avec séparateur d'espace
-    df_display['mensualite_avec_assurance'] = df_display['mensualite_avec_assurance'].apply(
-        lambda x: formater_nombre(x)
-    )
-    df_display['cout_total_credit'] = df_display['cout_total_credit'].apply(
-        lambda x: formater_nombre(x)
-    )
-    df_display['salaire_mensuel_minimum'] = df_display['salaire_mensuel_minimum'].apply(
-        lambda x: formater_nombre(x)
-    )
+    dictionnaire = fig.to_dict()
+    fig.to_dict = lambda: dictionnaire
+    return fig
 
-    # 2. Renommage des colonnes pour un affichage plus clair
-    df_display = df_display.rename(columns={
-        'duree_annees': 'Durée (ans)',
-        'taux_nominal_pct': 'Taux nominal (%)',
-        'mensualite_avec_assurance': 'Mensualité',
-        'cout_total_credit': 'Coût total du crédit',
-        'salaire_mensuel_minimum': 'Salaire mensuel minimum',
-        'taux_endettement_pct': "Taux d'endettement (%)"
-    })
-
-    # 3. Sélection et réorganisation de l'ordre final des colonnes
-    df_display = df_display[[
-        'Durée (ans)',
-        'Taux nominal (%)',
-        'Mensualité',
-        'Coût total du crédit',
-        'Salaire mensuel minimum',
-        "Taux d'endettement (%)",
-        'Verdict'
-    ]]
-
-    return df, df_display
-
-
-def calculer_remboursement_anticipe(
-    choix_impact: str,
-    mensualite_hors_assurance: float,
-    duree_initiale_mois: int,
-    taux_mensuel_nominal: float,
-    annee_remboursement: int,
-    montant_remboursement_anticipe: float
-) -> dict:
-    """
-    Simule l'impact d'un remboursement anticipé sur un prêt, en permettant
-    soit de réduire la durée, soit de réduire les mensualités.
-
-    Returns:
-        Un dictionnaire avec les résultats : 
-        - capital_restant_du_avant: Le capital qu'il restait à payer juste avant le remboursement.
-        - interets_economises: Le montant total des intérêts économisés grâce au remboursement.
-        - nouvelle_duree_restante_mois: La nouvelle durée restante du prêt en mois.
-        - etc.
-    """
-    # --- ÉTAPE 1: Calculer le capital restant dû au moment du remboursement ---
-    mois_remboursement = annee_remboursement * 12
-    capital_restant_du = mensualite_hors_assurance * ((1 - (1+taux_mensuel_nominal)**-(duree_initiale_mois-mois_remboursement)) / taux_mensuel_nominal)
-    duree_initiale_restante_mois = duree_initiale_mois - mois_remboursement
-
-    # Si le remboursement est supérieur au capital restant, on ajuste
-    montant_remboursement_anticipe = min(montant_remboursement_anticipe, capital_restant_du)
-    
-    # --- ÉTAPE 2: Appliquer le remboursement anticipé ---
-    nouveau_capital_a_rembourser = capital_restant_du - montant_remboursement_anticipe
-
-    # --- ÉTAPE 3: Calculer le nouveau plan en fonction du choix de l'utilisateur ---
-    if nouveau_capital_a_rembourser <= 0:
-        # Le prêt est entièrement remboursé
-        nouvelle_duree_restante_mois = 0
-        nouvelle_mensualite_hors_assurance = 0
-    elif choix_impact == "Réduire la durée du prêt":
-        nouvelle_duree_restante_mois = -log(1 - (nouveau_capital_a_rembourser * taux_mensuel_nominal / mensualite_hors_assurance)) / log(1 + taux_mensuel_nominal)
-        nouvelle_duree_restante_mois = ceil(nouvelle_duree_restante_mois)
-        nouvelle_mensualite_hors_assurance = mensualite_hors_assurance
-    else: # "Réduire les mensualités"
-        nouvelle_duree_restante_mois = duree_initiale_restante_mois
-        part_1 = nouveau_capital_a_rembourser * taux_mensuel_nominal * (1 + taux_mensuel_nominal)**nouvelle_duree_restante_mois
-        part_2 = (1 + taux_mensuel_nominal)**nouvelle_duree_restante_mois - 1
-        nouvelle_mensualite_hors_assurance = part_1 / part_2
-
-    # --- ÉTAPE 4: Calculer les gains ---
-    cout_interets_restants_avant = (mensualite_hors_assurance * (duree_initiale_mois - mois_remboursement)) - capital_restant_du 
-    cout_interets_restants_apres = (nouvelle_mensualite_hors_assurance * nouvelle_duree_restante_mois) - nouveau_capital_a_rembourser
-    gain_interets = cout_interets_restants_avant - cout_interets_restants_apres
-    
-    # --- ÉTAPE 5: Retourner les résultats ---
-    nouvelle_duree_totale_mois = mois_remboursement + nouvelle_duree_restante_mois
-
-    resultats = {
-        "gain_interets": gain_interets,
-        "nouvelle_duree_totale_ans": nouvelle_duree_totale_mois / 12,
-        "duree_reduite_mois": duree_initiale_restante_mois - nouvelle_duree_restante_mois,
-        "ancienne_mensualite": mensualite_hors_assurance,
-        "nouvelle_mensualite": nouvelle_mensualite_hors_assurance,
-        "reduction_mensualite": mensualite_hors_assurance - nouvelle_mensualite_hors_assurance,
-    }
-    return resultats
 
 # --- Fonctions de Création de Visuels ---
-@st.cache_data
-def creation_graph(df_prets: pd.DataFrame, salaire_total: float) -> go.Figure:
+@mesurer()
+@cache_borne(max_entrees=128, ttl_s=3600, normaliser=_normaliser_graphique)
+def creation_graph(df_prets: pd.DataFrame, salaire_total: float) -> "go.Figure":
     """
-    Crée un graphique Plotly combiné pour visualiser le compromis du prêt.
-    (le code de la fonction reste le même)
+    Crée un graphique Plotly combiné pour visualiser le compromis du prêt : salaire requis et coût total
+    par durée, courbe réduite si elle est longue et étiquettes masquées au-delà de SEUIL_ETIQUETTES durées.
     """
-    # ... (code de la fonction inchangé) ...
+    import plotly.graph_objects as go
+
     fig = go.Figure()
 
+    # Au-delà de quelques dizaines de durées, les étiquettes se chevauchent : seules les infobulles restent
+    etiquettes = len(df_prets) <= SEUIL_ETIQUETTES
+
     # 1. Ajout des barres pour le salaire requis (Axe Y gauche)
     fig.add_trace(go.Bar(
-        x=df_prets['duree_annees'],
-        y=df_prets['salaire_mensuel_minimum'],
+        x=df_prets['duree_annees'].to_numpy(),
+        y=df_prets['salaire_mensuel_minimum'].to_numpy(),
         name='Salaire requis',
         marker_color='darkorange',
-        text=df_prets['salaire_mensuel_minimum'].apply(lambda x: f'{x:,.0f} €'.replace(',', ' ')),
-        textposition='inside', 
-        hoverinfo='x+name+text'
+        text=[formater_nombre(x) for x in df_prets['salaire_mensuel_minimum']] if etiquettes else None,
+        textposition='inside',
+        hovertemplate="%{x} ans<br>Salaire requis : %{y:,.0f} €<extra></extra>"
     ))
 
     # 2. Ajout de la ligne pour le coût total du crédit (Axe Y droit)
-    fig.add_trace(go.Scatter(
-        x=df_prets['duree_annees'],
-        y=df_prets['cout_total_credit'],
+    fig.add_trace(_trace_courbe(
+        df_prets['duree_annees'],
+        df_prets['cout_total_credit'],
         name='Coût total du crédit',
         yaxis='y2',
-        mode='lines+markers+text',
+        mode='lines+markers+text' if etiquettes else 'lines',
         line=dict(color='royalblue', width=3),
-        text=df_prets['cout_total_credit'].apply(lambda x: f'{x:,.0f} €'.replace(',', ' ')),
+        text=[formater_nombre(x) for x in df_prets['cout_total_credit']] if etiquettes else None,
         textposition='bottom center',
-        hoverinfo='x+name+text'
+        hovertemplate="%{x} ans<br>Coût total du crédit : %{y:,.0f} €<extra></extra>"
     ))
 
     # 3. Ajout de la ligne de seuil (salaire actuel)
@@ -269,6 +208,304 @@ def creation_graph(df_prets: pd.DataFrame, salaire_total: float) -> go.Figure:
             side="right"
         ),
         template="plotly_white",
+        separators=", ",
         hovermode="x unified"
     )
-    return fig
\ No newline at end of file
+    return _figer(fig)
+
+@mesurer()
+@cache_borne(max_entrees=64, ttl_s=3600)
+def creation_graph_amortissement(df_amortissement: pd.DataFrame) -> "go.Figure":
+    """
+    Crée un graphique Plotly de l'échéancier : mensualité et intérêts de chaque mois,
+    et capital restant dû sur l'axe de droite.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure()
+    fig.add_trace(_trace_courbe(
+        df_amortissement['mois'],
+        df_amortissement['mensualite_avec_assurance'],
+        name='Mensualité',
+        mode='lines',
+        line=dict(color='darkorange', width=2),
+        hovertemplate="Mois %{x}<br>Mensualité : %{y:,.2f} €<extra></extra>"
+    ))
+    fig.add_trace(_trace_courbe(
+        df_amortissement['mois'],
+        df_amortissement['interets'],
+        name='Intérêts',
+        mode='lines',
+        line=dict(color='firebrick', width=2),
+        hovertemplate="Mois %{x}<br>Intérêts : %{y:,.2f} €<extra></extra>"
+    ))
+    fig.add_trace(_trace_courbe(
+        df_amortissement['mois'],
+        df_amortissement['capital_restant_du'],
+        name='Capital restant dû',
+        yaxis='y2',
+        mode='lines',
+        line=dict(color='royalblue', width=3),
+        hovertemplate="Mois %{x}<br>Capital restant dû : %{y:,.0f} €<extra></extra>"
+    ))
+
+    fig.update_layout(
+        title_text="Évolution des mensualités et du capital restant dû",
+        xaxis_title="Mois",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        yaxis=dict(title="Montant mensuel (€)", rangemode="tozero"),
+        yaxis2=dict(title="Capital restant dû (€)", showgrid=False, overlaying="y", side="right", rangemode="tozero"),
+        template="plotly_white",
+        separators=", "
+    )
+    return _figer(fig)
+
+
+@mesurer()
+@cache_borne(max_entrees=64, ttl_s=3600)
+def creation_heatmap_remboursement(grille: dict, indice_pret: int, indice_choix: int) -> "go.Figure":
+    """
+    Crée une carte de chaleur Plotly du gain total d'un remboursement anticipé,
+    en fonction de l'année et du montant remboursé, pour un prêt et un choix d'impact donnés.
+    """
+    import plotly.graph_objects as go
+
+    montants, annees, gains = _reduire_grille(grille['montants'], grille['annees'], grille['gain_total'][indice_pret, indice_choix])
+
+    fig = go.Figure(go.Heatmap(
+        x=montants,
+        y=annees,
+        z=gains,
+        colorscale='Viridis',
+        colorbar=dict(title="Gain total (€)"),
+        hovertemplate="Montant : %{x:,.0f} €<br>Année : %{y}<br>Gain total : %{z:,.0f} €<extra></extra>"
+    ))
+
+    fig.update_layout(
+        title_text=f"Gain total estimé — prêt sur {grille['durees_annees'][indice_pret]} ans",
+        xaxis_title="Montant du remboursement anticipé (€)",
+        yaxis_title="Année du remboursement",
+        template="plotly_white",
+        separators=", "
+    )
+    return _figer(fig)
+
+
+@mesurer()
+@cache_borne(max_entrees=64, ttl_s=3600)
+def creation_graph_date_achat(df_dates: pd.DataFrame, montant_bien: float) -> "go.Figure":
+    """
+    Crée un graphique Plotly du délai avant l'achat en fonction du prix du bien visé.
+    """
+    import plotly.graph_objects as go
+
+    fig = go.Figure(_trace_courbe(
+        df_dates['prix_bien'],
+        df_dates['mois_achat'] / 12,
+        mode='lines',
+        line=dict(color='royalblue', width=3),
+        hovertemplate="Prix : %{x:,.0f} €<br>Achat possible dans %{y:.1f} ans<extra></extra>"
+    ))
+    fig.add_vline(x=montant_bien, line=dict(color='firebrick', width=2, dash='dash'), annotation_text="Bien visé")
+
+    fig.update_layout(
+        title_text="Délai avant de pouvoir acheter, selon le prix du bien",
+        xaxis_title="Prix du bien aujourd'hui (€)",
+        yaxis_title="Délai (années)",
+        template="plotly_white",
+        separators=", "
+    )
+    return _figer(fig)
+
+
+@mesurer()
+@cache_borne(max_entrees=64, ttl_s=3600)
+def creation_heatmap_rachat(grille: dict, indice_pret: int, indice_duree: int, indicateur: str) -> "go.Figure":
+    """
+    Crée une carte de chaleur Plotly du rachat d'un prêt, en fonction du mois du rachat et du nouveau taux,
+    pour une nouvelle durée donnée. L'indicateur est `economie_nette` ou `mois_equilibre`.
+    """
+    import plotly.graph_objects as go
+
+    mois_rachat, nouveaux_taux_pct, valeurs = _reduire_grille(
+        grille['mois_rachat'], grille['nouveaux_taux_pct'], grille[indicateur][indice_pret, :, :, indice_duree]
+    )
+    if indicateur == 'economie_nette':
+        titre_echelle, format_survol = "Économie nette (€)", "Économie nette : %{z:,.0f} €"
+        echelle = dict(colorscale='RdYlGn', zmid=0)
+    else:
+        titre_echelle, format_survol = "Rentabilisé après (mois)", "Rentabilisé après %{z:.0f} mois"
+        echelle = dict(colorscale='Viridis', reversescale=True)
+
+    fig = go.Figure(go.Heatmap(
+        x=mois_rachat,
+        y=nouveaux_taux_pct,
+        z=valeurs,
+        colorbar=dict(title=titre_echelle),
+        hovertemplate="Rachat au mois %{x}<br>Nouveau taux : %{y:.2f} %<br>" + format_survol + "<extra></extra>",
+        **echelle
+    ))
+
+    fig.update_layout(
+        title_text=f"Rachat du prêt sur {grille['durees_annees'][indice_pret]} ans par un prêt sur {grille['nouvelles_durees_annees'][indice_duree]} ans",
+        xaxis_title="Mois du rachat",
+        yaxis_title="Nouveau taux nominal (%)",
+        template="plotly_white",
+        separators=", "
+    )
+    return _figer(fig)
+
+
+@mesurer()
+@cache_borne(max_entrees=64, ttl_s=3600)
+def creation_surface_sensibilite(surface: dict, indicateur: str, durees_taux: dict, taux_endettement_max_pct: float = None) -> "go.Figure":
+    """
+    Crée une carte en courbes de niveau Plotly d'un indicateur (`mensualite_avec_assurance`, `cout_total_credit`
+    ou `taux_endettement_pct`) en fonction du taux nominal et de la durée, avec les prêts de la barre latérale en repère.
+    Pour le taux d'endettement, la courbe du taux maximal est tracée en rouge.
+    """
+    import plotly.graph_objects as go
+
+    durees_mois, taux_pct, valeurs = _reduire_grille(surface['durees_mois'], surface['taux_pct'], surface[indicateur])
+    titre_echelle, format_survol = {
+        'mensualite_avec_assurance': ("Mensualité (€)", "Mensualité : %{z:,.0f} €"),
+        'cout_total_credit': ("Coût total (€)", "Coût total : %{z:,.0f} €"),
+        'taux_endettement_pct': ("Endettement (%)", "Endettement : %{z:.1f} %"),
+    }[indicateur]
+
+    fig = go.Figure(go.Contour(
+        x=durees_mois / 12,
+        y=taux_pct,
+        z=valeurs,
+        colorscale='Viridis',
+        colorbar=dict(title=titre_echelle),
+        contours=dict(showlabels=True),
+        hovertemplate="Durée : %{x:.1f} ans<br>Taux : %{y:.2f} %<br>" + format_survol + "<extra></extra>"
+    ))
+    if indicateur == 'taux_endettement_pct' and taux_endettement_max_pct is not None:
+        fig.add_trace(go.Contour(
+            x=durees_mois / 12,
+            y=taux_pct,
+            z=valeurs,
+            contours=dict(coloring='none', start=taux_endettement_max_pct, end=taux_endettement_max_pct, size=1),
+            line=dict(color='firebrick', width=3, dash='dash'),
+            showscale=False,
+            hoverinfo='skip',
+            name=f"Endettement de {taux_endettement_max_pct:.1f} %"
+        ))
+    fig.add_trace(go.Scatter(
+        x=list(durees_taux),
+        y=list(durees_taux.values()),
+        mode='markers',
+        marker=dict(color='white', size=10, line=dict(color='black', width=2)),
+        name='Vos taux',
+        hovertemplate="%{x} ans à %{y:.2f} %<extra></extra>"
+    ))
+
+    fig.update_layout(
+        title_text="Sensibilité au taux et à la durée",
+        xaxis_title="Durée du prêt (en années)",
+        yaxis_title="Taux nominal (%)",
+        template="plotly_white",
+        separators=", ",
+        showlegend=False
+    )
+    return _figer(fig)
+
+
+@mesurer()
+@cache_borne(max_entrees=32, ttl_s=3600)
+def creation_histogramme_taux_variable(resultats: dict, cout_taux_fixe: float) -> "go.Figure":
+    """
+    Crée un histogramme Plotly du coût total du crédit sur l'ensemble des chemins de taux simulés,
+    avec le coût du prêt à taux fixe de même durée en repère.
+    """
+    import plotly.graph_objects as go
+
+    # Les chemins sont regroupés en classes avant l'envoi au navigateur
+    effectifs, bornes = np.histogram(resultats['cout_total_credit'], bins=60)
+    centres = (bornes[:-1] + bornes[1:]) / 2
+
+    fig = go.Figure(go.Bar(
+        x=centres,
+        y=effectifs / effectifs.sum() * 100,
+        width=np.diff(bornes),
+        name='Taux variable',
+        marker_color='royalblue',
+        hovertemplate="Coût total : %{x:,.0f} €<br>%{y:.1f} % des scénarios<extra></extra>"
+    ))
+    fig.add_vline(
+        x=cout_taux_fixe,
+        line=dict(color='firebrick', width=2, dash='dash'),
+        annotation_text=f"Taux fixe : {formater_nombre(cout_taux_fixe)}"
+    )
+
+    fig.update_layout(
+        title_text="Distribution du coût total du crédit",
+        xaxis_title="Coût total du crédit (€)",
+        yaxis_title="Part des scénarios (%)",
+        template="plotly_white",
+        separators=", ",
+        bargap=0
+    )
+    return _figer(fig)
+
+
+@mesurer()
+@cache_borne(max_entrees=16, ttl_s=3600)
+def creation_graph_pareto(solutions: pd.DataFrame, front: pd.DataFrame, meilleure: dict) -> "go.Figure":
+    """
+    Crée un nuage de points Plotly des plans de financement simulés (coût total et épargne restante),
+    avec le front de Pareto et le plan retenu pour l'objectif.
+    """
+    import plotly.graph_objects as go
+
+    # Le nuage ne sert que de fond : il est éclairci au budget de points d'une série
+    pas = max(len(solutions) // POINTS_MAX_SERIE, 1)
+    nuage = solutions.iloc[::pas]
+    fig = go.Figure(go.Scattergl(
+        x=nuage['cout_total_credit'].to_numpy(),
+        y=nuage['epargne_restante'].to_numpy(),
+        mode='markers',
+        marker=dict(color='lightgray', size=4),
+        name='Plans simulés',
+        hoverinfo='skip'
+    ))
+    fig.add_trace(go.Scatter(
+        x=front['cout_total_credit'].to_numpy(),
+        y=front['epargne_restante'].to_numpy(),
+        mode='lines+markers',
+        line=dict(color='royalblue', width=2, shape='hv'),
+        name='Front de Pareto',
+        customdata=np.column_stack([
+            front['duree_mois'] / 12,
+            front['apport'],
+            front['part_epargne_pct'],
+            front['periode_mois'],
+            front['duree_effective_mois'] / 12,
+        ]),
+        hovertemplate=(
+            "Coût total : %{x:,.0f} €<br>Épargne restante : %{y:,.0f} €<br>"
+            "Durée : %{customdata[0]:.2f} ans, apport : %{customdata[1]:,.0f} €<br>"
+            "Remboursement de %{customdata[2]:.0f} % de l'épargne tous les %{customdata[3]:.0f} mois<br>"
+            "Fin du prêt après %{customdata[4]:.1f} ans<extra></extra>"
+        )
+    ))
+    fig.add_trace(go.Scatter(
+        x=[meilleure['cout_total_credit']],
+        y=[meilleure['epargne_restante']],
+        mode='markers',
+        marker=dict(color='firebrick', size=14, symbol='star'),
+        name='Plan retenu',
+        hoverinfo='skip'
+    ))
+
+    fig.update_layout(
+        title_text="Coût du crédit et épargne restante des plans de financement",
+        xaxis_title="Coût total du crédit (€)",
+        yaxis_title="Épargne restante à l'horizon (€)",
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        template="plotly_white",
+        separators=", "
+    )
+    return _figer(fig)